@@ -2,9 +2,10 @@ from google.adk.agents import Agent
 from medical_agent.utils.report_tool import ReportToolDocx
 from google.adk.tools import google_search
 from google.adk.tools.agent_tool import AgentTool
-from medical_agent.utils.appointment_tool import AppointmentTool
+from medical_agent.utils.appointment_tool import AsyncAppointmentTool
 from medical_agent.utils.instructions import Instructions
-from medical_agent.utils.medicine_tool import MedicineTool
+from medical_agent.utils.medicine_tool import AsyncMedicineTool
+from medical_agent.utils.database_utils import aflush_pending_writes
 from dotenv import load_dotenv
 import os
 
@@ -30,8 +31,8 @@ appointment_agent=Agent(
     model="gemini-2.5-flash-preview-04-17",
     instruction=booking_agent_instruction,
     tools=[
-        AppointmentTool.book_doctor_appointment_tool,
-        AppointmentTool.get_doctor_details_tool,
+        AsyncAppointmentTool.book_doctor_appointment_tool,
+        AsyncAppointmentTool.get_doctor_details_tool,
         AgentTool(agent=search_agent)
     ]
 )
@@ -43,18 +44,21 @@ medical_store_agent=Agent(
     model="gemini-2.5-flash-preview-04-17",
     instruction=medical_store_agent_instruction,
     tools=[
-        MedicineTool.get_medicines_tool,
-        MedicineTool.prescribe_medication_tool,
-        MedicineTool.get_patient_medications_tool,
-        MedicineTool.update_medication_status_tool,
-        MedicineTool.get_medicines_by_symptom_tool,
-        MedicineTool.purchase_medicine_tool,
-        MedicineTool.get_patient_purchased_medicines_tool,
-        MedicineTool.get_medicine_quantity_tool,
-        MedicineTool.record_medicine_inquiry_tool,
-        MedicineTool.get_patient_medicine_inquiries_tool,
-        MedicineTool.get_medications_counter_tool
-    ]
+        AsyncMedicineTool.get_medicines_tool,
+        AsyncMedicineTool.prescribe_medication_tool,
+        AsyncMedicineTool.get_patient_medications_tool,
+        AsyncMedicineTool.update_medication_status_tool,
+        AsyncMedicineTool.get_medicines_by_symptom_tool,
+        AsyncMedicineTool.get_medicines_by_symptoms_tool,
+        AsyncMedicineTool.purchase_medicine_tool,
+        AsyncMedicineTool.purchase_medicines_tool,
+        AsyncMedicineTool.get_patient_purchased_medicines_tool,
+        AsyncMedicineTool.get_medicine_quantity_tool,
+        AsyncMedicineTool.record_medicine_inquiry_tool,
+        AsyncMedicineTool.get_patient_medicine_inquiries_tool,
+        AsyncMedicineTool.get_medications_counter_tool
+    ],
+    after_agent_callback=aflush_pending_writes
 )
 
 
@@ -1,5 +1,6 @@
 from .appointment import Appointment
 from .firebase_config import firebase_initialized
+from .async_utils import make_async
 from datetime import datetime
 
 
@@ -186,3 +187,16 @@ class AppointmentTool:
             print(f"  Doctor #{idx+1}: {doc['name']} ({doc['specialization']}) - {len(doc['available_slots'])} slots")
         
         return formatted_doctors
+
+
+class AsyncAppointmentTool:
+    """
+    Async versions of the AppointmentTool tools, for registering with ADK agents.
+    
+    The Firestore calls run on the I/O thread pool instead of the event loop.
+    """
+    
+    book_doctor_appointment_tool = staticmethod(make_async(AppointmentTool.book_doctor_appointment_tool))
+    add_doctor_availability_tool = staticmethod(make_async(AppointmentTool.add_doctor_availability_tool))
+    remove_doctor_availability_tool = staticmethod(make_async(AppointmentTool.remove_doctor_availability_tool))
+    get_doctor_details_tool = staticmethod(make_async(AppointmentTool.get_doctor_details_tool))
@@ -0,0 +1,29 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Upper bound on blocking database/file calls running at once for async callers
+IO_THREADS = int(os.environ.get("MEDICAL_AGENT_IO_THREADS", "8"))
+
+IO_EXECUTOR = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="medical-agent-io")
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking function on the shared I/O thread pool without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(IO_EXECUTOR, functools.partial(context.run, func, *args, **kwargs))
+
+def make_async(func: Callable) -> Callable:
+    """
+    Wrap a blocking function in a coroutine function that runs it on the I/O thread pool.
+
+    The wrapper keeps the original name, docstring and signature, so it can be
+    registered as an ADK tool in place of the synchronous version.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+    return wrapper
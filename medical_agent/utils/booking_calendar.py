@@ -0,0 +1,112 @@
+import bisect
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Longest booking accepted, in minutes; bounds how far back a clash check has to look
+MAX_BOOKING_MINUTES = 24 * 60
+
+# Booking time formats with a date ("2025-01-01-09:30" is the one the tools store)
+TIME_FORMATS = ("%Y-%m-%d-%H:%M", "%Y-%m-%d at %H:%M", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M")
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def parse_booking_time(time: str) -> Optional[int]:
+    """Return a booking time as minutes since the epoch, or None if it has no date (e.g. "16:00")"""
+    if not isinstance(time, str):
+        return None
+    for time_format in TIME_FORMATS:
+        try:
+            moment = datetime.datetime.strptime(time.strip(), time_format)
+        except ValueError:
+            continue
+        return (moment - _EPOCH) // datetime.timedelta(minutes=1)
+    return None
+
+
+def booking_duration(duration: Optional[int]) -> int:
+    """Validate a booking duration in minutes (None means the booking is a single point in time)"""
+    if duration is None:
+        return 0
+    if isinstance(duration, bool) or not isinstance(duration, int):
+        raise ValueError(f"Invalid duration: {duration}")
+    if duration < 0 or duration > MAX_BOOKING_MINUTES:
+        raise ValueError(f"Duration must be between 0 and {MAX_BOOKING_MINUTES} minutes")
+    return duration
+
+
+def intervals_overlap(start: int, duration: int, other_start: int, other_duration: int) -> bool:
+    """Check whether two bookings clash: same start, or [start, start + duration) ranges intersect"""
+    return start == other_start or (start < other_start + other_duration and other_start < start + duration)
+
+
+class BookingCalendar:
+    """
+    The booked times of one doctor, kept for clash checks that do not scan every booking.
+
+    Exact time strings are counted in a dict, so an identical booking is
+    found in O(1). Bookings with a parseable date are also kept sorted by
+    start minute (with their time string as booked, which is what a clash
+    reports); an overlap check bisects to the new booking's end and walks
+    back only over bookings that could still be running.
+    """
+
+    def __init__(self, bookings: Iterable[Dict] = ()):
+        self._times: Dict[str, int] = {}
+        self._intervals: List[Tuple[int, int, str]] = []
+        self._longest = 0
+        self._count = 0
+        for booking in bookings:
+            self.add(booking.get("time"), booking.get("duration"))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def conflict(self, time: str, duration: Optional[int] = None) -> Optional[str]:
+        """Return the time of a booking that clashes with the given one, or None"""
+        if self._times.get(time):
+            return time
+
+        start = parse_booking_time(time)
+        if start is None:
+            return None
+        length = booking_duration(duration)
+
+        # Bookings starting after the new one ends cannot clash with it
+        position = bisect.bisect_right(self._intervals, (start + length, MAX_BOOKING_MINUTES + 1))
+        while position > 0:
+            position -= 1
+            other_start, other_length, other_time = self._intervals[position]
+            if other_start + self._longest < start:
+                break
+            if intervals_overlap(start, length, other_start, other_length):
+                return other_time
+        return None
+
+    def add(self, time: str, duration: Optional[int] = None):
+        """Record a booking (the caller has checked it for conflicts)"""
+        self._times[time] = self._times.get(time, 0) + 1
+        self._count += 1
+        start = parse_booking_time(time)
+        if start is not None:
+            length = booking_duration(duration)
+            bisect.insort(self._intervals, (start, length, time))
+            self._longest = max(self._longest, length)
+
+    def remove(self, time: str, duration: Optional[int] = None):
+        """Forget a booking that was cancelled"""
+        count = self._times.get(time, 0)
+        if count == 0:
+            return
+        if count == 1:
+            del self._times[time]
+        else:
+            self._times[time] = count - 1
+        self._count -= 1
+
+        start = parse_booking_time(time)
+        if start is not None:
+            entry = (start, booking_duration(duration), time)
+            position = bisect.bisect_left(self._intervals, entry)
+            if position < len(self._intervals) and self._intervals[position] == entry:
+                del self._intervals[position]
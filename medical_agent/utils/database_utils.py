@@ -1,159 +1,161 @@
-import json
 import os
-from typing import Dict, List, Optional, Any
-import datetime
+import functools
+from contextlib import contextmanager, ExitStack
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+
+from . import serializer
+from .json_store import JsonStore, flush_all, normalize_key
+from .sharded_store import ShardedJsonStore
+from .models import Doctor, Patient, to_plain
+from .booking_calendar import BookingCalendar, booking_duration
+from .async_utils import make_async
 
 # Paths to database files
 DOCTOR_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "doctor_details.json")
 PATIENT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "patient_details.json")
+PATIENT_SHARD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "patients")
+
+# Append patient changes to a journal instead of rewriting the whole file
+PATIENT_DB_JOURNAL = os.environ.get("MEDICAL_AGENT_DB_JOURNAL", "").strip().lower() in ("1", "true", "yes")
+
+# Keep one file per patient (under PATIENT_SHARD_DIR) instead of a single patient file
+PATIENT_DB_SHARDED = os.environ.get("MEDICAL_AGENT_DB_SHARDED", "").strip().lower() in ("1", "true", "yes")
+
+# Window (in milliseconds) in which concurrent writes are merged into one flush
+DB_COMMIT_WINDOW_MS = float(os.environ.get("MEDICAL_AGENT_DB_COMMIT_WINDOW_MS", "2"))
+
+# Hold writes back for this many milliseconds and flush them together (0 = write through);
+# only for a single process owning the database files
+DB_WRITE_BEHIND_MS = float(os.environ.get("MEDICAL_AGENT_DB_WRITE_BEHIND_MS", "0"))
+
+# Store snapshots as compact JSON instead of indented (pretty-print with serializer.py)
+DB_COMPACT = os.environ.get("MEDICAL_AGENT_DB_COMPACT", "").strip().lower() in ("1", "true", "yes")
+DB_INDENT = None if DB_COMPACT else serializer.PRETTY_INDENT
+
+# Cache records as slotted Patient/Doctor objects instead of dicts (less memory for
+# large clinics); callers still get plain dicts back
+DB_RECORD_MODELS = os.environ.get("MEDICAL_AGENT_DB_RECORD_MODELS", "").strip().lower() in ("1", "true", "yes")
+
+# Shared in-memory views of the database files
+doctor_store = JsonStore(DOCTOR_DB_PATH, "doctor", key="email", indent=DB_INDENT,
+                         commit_window=DB_COMMIT_WINDOW_MS / 1000,
+                         record_type=Doctor if DB_RECORD_MODELS else None,
+                         write_behind=DB_WRITE_BEHIND_MS / 1000)
+if PATIENT_DB_SHARDED:
+    # Migrates patient_details.json into shards on first use
+    patient_store = ShardedJsonStore(PATIENT_SHARD_DIR, "patient", key="email", indent=DB_INDENT,
+                                     legacy_path=PATIENT_DB_PATH, index_fields=("name",),
+                                     record_type=Patient if DB_RECORD_MODELS else None)
+else:
+    patient_store = JsonStore(PATIENT_DB_PATH, "patient", key="email", indent=DB_INDENT, journal=PATIENT_DB_JOURNAL,
+                              commit_window=DB_COMMIT_WINDOW_MS / 1000, index_fields=("name",),
+                              record_type=Patient if DB_RECORD_MODELS else None,
+                              write_behind=DB_WRITE_BEHIND_MS / 1000)
+
+# Fields listed for doctors unless others are requested; passwords are never listed
+DOCTOR_LIST_FIELDS = ("name", "email", "specialization", "Slots_available")
+
+# Storage backend for patient/doctor records: "json" (default) or "sqlite"
+DB_BACKEND = os.environ.get("MEDICAL_AGENT_DB_BACKEND", "json").strip().lower()
+
+# Normalized doctor email -> (the Bookings list a calendar was built from, the calendar)
+_booking_calendars: Dict[str, Tuple[List[Dict], BookingCalendar]] = {}
+
+def _backend_dispatch(func):
+    """Route a database function to the SQLite backend when it is enabled"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if DB_BACKEND == "sqlite":
+            from . import sqlite_store
+            return getattr(sqlite_store, func.__name__)(*args, **kwargs)
+        if DB_RECORD_MODELS:
+            # Cached records never leave this module; callers get dict copies
+            return to_plain(func(*args, **kwargs))
+        return func(*args, **kwargs)
+    return wrapper
+
+@contextmanager
+def transaction(*stores: JsonStore, key: Any = None):
+    """
+    Hold the given JSON stores (both by default) exclusively for a read-modify-write sequence.
+
+    The stores' file locks are taken in a fixed order, so concurrent threads and
+    uvicorn workers can neither deadlock nor lose each other's updates. Writes made
+    inside the block reach the disk before the locks are released. When key is
+    given, a sharded patient store locks only that patient's record.
+    """
+    stores = stores or (doctor_store, patient_store)
+    with ExitStack() as stack:
+        for store in sorted(set(stores), key=lambda s: os.path.abspath(s.path)):
+            stack.enter_context(store.locked(key) if store is patient_store else store.locked())
+        yield
 
+def flush_pending_writes(callback_context: Any = None) -> None:
+    """
+    Write database changes held back by write-behind mode to disk.
+    
+    Registered (as aflush_pending_writes, off the event loop) as the medical
+    store agent's after_agent_callback, so the changes of one agent turn reach
+    the disk in a single flush per store. It returns None so the agent's
+    reply is left as it is; failed flushes are reported by the stores.
+    """
+    flush_all()
+
+@_backend_dispatch
 def initialize_db_if_empty():
-    """Initialize the database files if they don't exist or are empty"""
-    try:
-        # Create database directory if it doesn't exist
-        db_dir = os.path.dirname(DOCTOR_DB_PATH)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir)
-        
-        # Initialize doctor database
-        if not os.path.exists(DOCTOR_DB_PATH) or os.path.getsize(DOCTOR_DB_PATH) == 0:
-            with open(DOCTOR_DB_PATH, 'w') as f:
-                json.dump([], f, indent=3)
-            print(f"Initialized doctor database at {DOCTOR_DB_PATH}")
-        
-        # Initialize patient database
-        if not os.path.exists(PATIENT_DB_PATH) or os.path.getsize(PATIENT_DB_PATH) == 0:
-            with open(PATIENT_DB_PATH, 'w') as f:
-                json.dump([], f, indent=3)
-            print(f"Initialized patient database at {PATIENT_DB_PATH}")
-        
-        # Verify files exist and are valid JSON
-        verify_doctor_db = False
-        try:
-            with open(DOCTOR_DB_PATH, 'r') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    verify_doctor_db = True
-        except (json.JSONDecodeError, IOError):
-            verify_doctor_db = False
-        
-        verify_patient_db = False
-        try:
-            with open(PATIENT_DB_PATH, 'r') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    verify_patient_db = True
-        except (json.JSONDecodeError, IOError):
-            verify_patient_db = False
-        
-        if not verify_doctor_db:
-            print(f"Warning: Doctor database could not be verified, reinitializing")
-            with open(DOCTOR_DB_PATH, 'w') as f:
-                json.dump([], f, indent=3)
-        
-        if not verify_patient_db:
-            print(f"Warning: Patient database could not be verified, reinitializing")
-            with open(PATIENT_DB_PATH, 'w') as f:
-                json.dump([], f, indent=3)
-                
-        return True
-    except Exception as e:
-        print(f"Error initializing database: {str(e)}")
-        return False
+    """Initialize the database files if they don't exist, are empty or are invalid"""
+    # Each store validates its file once and again only after an external modification
+    return doctor_store.ensure_initialized() and patient_store.ensure_initialized()
 
 # Doctor database functions
+@_backend_dispatch
 def read_doctor_db() -> List[Dict]:
     """Read the doctor database"""
-    # Ensure database is initialized
-    if not initialize_db_if_empty():
+    # Ensure database is initialized (a single stat once it has been verified)
+    if not doctor_store.ensure_initialized():
         print("Warning: Failed to initialize database before reading doctor data")
         return []
         
-    try:
-        with open(DOCTOR_DB_PATH, 'r') as f:
-            try:
-                data = json.load(f)
-                return data
-            except json.JSONDecodeError as e:
-                print(f"Error parsing doctor database JSON: {str(e)}")
-                return []
-    except IOError as e:
-        print(f"Error reading doctor database file: {str(e)}")
-        return []
+    return doctor_store.read()
 
+@_backend_dispatch
 def write_doctor_db(data: List[Dict]):
     """Write to the doctor database"""
-    try:
-        with open(DOCTOR_DB_PATH, 'w') as f:
-            json.dump(data, f, indent=3)
-        
-        # Verify the file was written correctly
-        if os.path.exists(DOCTOR_DB_PATH) and os.path.getsize(DOCTOR_DB_PATH) > 0:
-            return True
-        else:
-            print(f"Error: Doctor database file is empty after write operation")
-            return False
-    except Exception as e:
-        print(f"Error writing to doctor database: {str(e)}")
-        return False
+    return doctor_store.write(data)
 
+@_backend_dispatch
 def doctor_exists(email: str) -> bool:
     """Check if a doctor exists in the database"""
     print(f"Checking if doctor exists: {email}")
     
-    # Get absolute path
-    abs_path = os.path.abspath(DOCTOR_DB_PATH)
-    
-    # Check if file exists
-    if not os.path.exists(abs_path):
-        print(f"Doctor database file does not exist: {abs_path}")
-        return False
-    
     try:
-        with open(abs_path, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                return False
-                
-            doctors = json.loads(content)
-            return any(doctor.get('email') == email for doctor in doctors)
+        return doctor_store.contains(email)
     except Exception as e:
         print(f"Error checking if doctor exists: {str(e)}")
         return False
 
+@_backend_dispatch
 def authenticate_doctor(email: str, password: str) -> Optional[Dict]:
     """Authenticate a doctor with email and password"""
     print(f"Authenticating doctor: {email}")
     
-    # Get absolute path
-    abs_path = os.path.abspath(DOCTOR_DB_PATH)
-    print(f"Doctor DB absolute path: {abs_path}")
-    
-    # Check if file exists
-    if not os.path.exists(abs_path):
-        print(f"Doctor database file does not exist: {abs_path}")
-        return None
-    
-    # Read database directly
     try:
-        with open(abs_path, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                print("Doctor database is empty")
-                return None
-                
-            doctors = json.loads(content)
-            for doctor in doctors:
-                if doctor.get('email') == email and doctor.get('password') == password:
-                    print(f"Doctor authenticated successfully: {email}")
-                    return doctor
-                    
-            print(f"Invalid credentials for doctor: {email}")
+        if not doctor_store.read():
+            print("Doctor database is empty")
             return None
+            
+        doctor = doctor_store.get(email)
+        if doctor and doctor.get('password') == password:
+            print(f"Doctor authenticated successfully: {email}")
+            return doctor
+            
+        print(f"Invalid credentials for doctor: {email}")
+        return None
     except Exception as e:
         print(f"Error authenticating doctor: {str(e)}")
         return None
 
+@_backend_dispatch
 def register_doctor(name: str, email: str, password: str, specialization: str) -> Dict:
     """Register a new doctor"""
     print(f"Registering doctor: {email}")
@@ -172,117 +174,108 @@ def register_doctor(name: str, email: str, password: str, specialization: str) -
             print(f"Error creating doctor database directory: {str(e)}")
             raise ValueError(f"Could not create database directory: {str(e)}")
     
-    # Check for existing doctor
-    existing = None
-    current_data = []
-    
-    # Read current data
-    if os.path.exists(abs_path):
+    with transaction(doctor_store):
+        # Check for existing doctor
+        existing = None
+        
         try:
-            with open(abs_path, 'r') as f:
-                content = f.read().strip()
-                if content:
-                    current_data = json.loads(content)
-                    # Check if doctor exists
-                    existing = next((d for d in current_data if d.get('email') == email), None)
+            existing = doctor_store.get(email)
         except Exception as e:
             print(f"Error reading doctor database: {str(e)}")
-            # Initialize with empty list if error
-            current_data = []
-    
-    if existing:
-        print(f"Doctor already exists: {email}")
-        raise ValueError("Doctor with this email already exists")
-    
-    new_doctor = {
-        "name": name,
-        "email": email,
-        "password": password,
-        "specialization": specialization,
-        "Slots_available": [],
-        "Bookings": []
-    }
-    
-    # Add new doctor to data
-    current_data.append(new_doctor)
-    print(f"New doctor count: {len(current_data)}")
-    
-    # Direct file write for reliability
-    try:
-        with open(abs_path, 'w') as f:
-            json.dump(current_data, f, indent=3)
-        print(f"Wrote doctor data to file: {abs_path}")
-        print(f"File size after write: {os.path.getsize(abs_path)} bytes")
-    except Exception as e:
-        print(f"Error writing doctor data to file: {str(e)}")
-        raise ValueError(f"Failed to save doctor registration: {str(e)}")
-    
-    # Verify doctor was added by reading the file again
-    try:
-        with open(abs_path, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                print(f"Error: File is empty after writing")
-                raise ValueError("Registration failed: Database file is empty after writing")
-                
-            verify_data = json.loads(content)
-            if any(d.get('email') == email for d in verify_data):
-                print(f"Successfully verified doctor registration: {email}")
-            else:
-                print(f"Doctor not found in database after registration: {email}")
-                raise ValueError("Doctor registration verification failed")
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON after write: {str(e)}")
-        raise ValueError(f"Failed to verify doctor registration: Invalid JSON")
-    except Exception as e:
-        print(f"Error verifying doctor registration: {str(e)}")
-        raise ValueError(f"Failed to verify doctor registration: {str(e)}")
         
+        if existing:
+            print(f"Doctor already exists: {email}")
+            raise ValueError("Doctor with this email already exists")
+        
+        new_doctor = {
+            "name": name,
+            "email": email,
+            "password": password,
+            "specialization": specialization,
+            "Slots_available": [],
+            "Bookings": []
+        }
+        
+        # The store writes atomically (temp file + fsync + rename), so a successful
+        # write needs no read-back verification
+        if not doctor_store.put(new_doctor, durable=True):
+            raise ValueError("Failed to save doctor registration")
+    print(f"Wrote doctor data to file: {abs_path}")
+    
     return new_doctor
 
-def add_booking(doctor_email: str, patient_name: str, time: str) -> Dict:
-    """Add a booking for a doctor"""
-    doctors = read_doctor_db()
-    
-    for doctor in doctors:
-        if doctor['email'] == doctor_email:
-            # Check if slot is already booked
-            if any(booking['time'] == time for booking in doctor['Bookings']):
-                raise ValueError(f"Slot at {time} is already booked")
-            
-            booking = {
-                "patient_name": patient_name,
-                "time": time
-            }
-            
-            doctor['Bookings'].append(booking)
-            write_doctor_db(doctors)
-            return booking
+@_backend_dispatch
+def add_booking(doctor_email: str, patient_name: str, time: str, duration: Optional[int] = None) -> Dict:
+    """Add a booking for a doctor (duration in minutes), rejecting taken or overlapping times"""
+    with transaction(doctor_store):
+        doctor = doctor_store.get(doctor_email)
+        
+        if not doctor:
+            raise ValueError("Doctor not found")
+        
+        booking = _append_booking(doctor, patient_name, time, duration)
+        if not doctor_store.put(doctor):
+            # Keep the cached record in line with the disk
+            doctor['Bookings'].pop()
+            raise ValueError("Failed to save booking")
+        return booking
+
+def _booking_calendar(doctor: Dict) -> BookingCalendar:
+    """Return the calendar of a doctor's bookings, rebuilding it if the list changed elsewhere"""
+    bookings = doctor['Bookings']
+    key = normalize_key(doctor['email'])
+    cached = _booking_calendars.get(key)
+    if cached is None or cached[0] is not bookings or len(cached[1]) != len(bookings):
+        cached = _booking_calendars[key] = (bookings, BookingCalendar(bookings))
+    return cached[1]
+
+def _append_booking(doctor: Dict, patient_name: str, time: str, duration: Optional[int] = None) -> Dict:
+    """Add a booking to a doctor record in memory, rejecting already booked slots"""
+    booking_duration(duration)
+    
+    # Check if slot is already booked (or overlaps a booking) without scanning the bookings
+    calendar = _booking_calendar(doctor)
+    clash = calendar.conflict(time, duration)
+    if clash == time:
+        raise ValueError(f"Slot at {time} is already booked")
+    if clash is not None:
+        raise ValueError(f"Slot at {time} overlaps the booking at {clash}")
+    
+    booking = {
+        "patient_name": patient_name,
+        "time": time
+    }
+    if duration is not None:
+        booking["duration"] = duration
     
-    raise ValueError("Doctor not found")
+    doctor['Bookings'].append(booking)
+    calendar.add(time, duration)
+    return booking
 
+@_backend_dispatch
 def get_doctor_bookings(doctor_email: str) -> List[Dict]:
     """Get all bookings for a doctor"""
-    doctors = read_doctor_db()
+    doctor = doctor_store.get(doctor_email)
     
-    for doctor in doctors:
-        if doctor['email'] == doctor_email:
-            return doctor['Bookings']
+    if not doctor:
+        raise ValueError("Doctor not found")
     
-    raise ValueError("Doctor not found")
+    return doctor['Bookings']
 
+@_backend_dispatch
 def update_doctor_slots(doctor_email: str, slots: List[str]) -> Dict:
     """Update available slots for a doctor"""
-    doctors = read_doctor_db()
-    
-    for doctor in doctors:
-        if doctor['email'] == doctor_email:
-            doctor['Slots_available'] = slots
-            write_doctor_db(doctors)
-            return doctor
-    
-    raise ValueError("Doctor not found")
+    with transaction(doctor_store):
+        doctor = doctor_store.get(doctor_email)
+        
+        if not doctor:
+            raise ValueError("Doctor not found")
+        
+        doctor['Slots_available'] = slots
+        doctor_store.put(doctor)
+        return doctor
 
+@_backend_dispatch
 def get_all_doctors() -> List[Dict]:
     """Get all doctors with basic information (without sensitive data)"""
     doctors = read_doctor_db()
@@ -300,109 +293,136 @@ def get_all_doctors() -> List[Dict]:
     
     return result
 
+def project_record(record: Dict, fields: Optional[List[str]] = None) -> Dict:
+    """Copy the requested fields of a record (all of them by default), never including the password"""
+    if fields is None:
+        return {k: v for k, v in record.items() if k != "password"}
+    return {field: record[field] for field in fields if field in record and field != "password"}
+
+def _parse_cursor(cursor: str) -> Tuple[int, str]:
+    """Split a page cursor into the position and the normalized key of the last record served"""
+    position, separator, key = cursor.partition(":")
+    try:
+        if not separator or not key:
+            raise ValueError
+        return int(position), key
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def _resume_position(store, cursor: Optional[str]) -> int:
+    """Return the position to continue a listing from, after the record the cursor names"""
+    if not cursor:
+        return 0
+    position, key = _parse_cursor(cursor)
+    
+    # Usually the record is still where the last page found it
+    for found, record in store.iter_records(position):
+        if found == position and normalize_key(record.get(store.key)) == key:
+            return position + 1
+        break
+    
+    # Records were deleted or reordered since: look the record up by its key
+    for found, record in store.iter_records():
+        if normalize_key(record.get(store.key)) == key:
+            return found + 1
+    # The record itself was deleted; the ones after it moved up into its place
+    return position
+
+def _page(store, cursor: Optional[str], page_size: int, fields: Optional[List[str]]) -> Dict:
+    """
+    Collect one page of projected records from a store, plus the cursor of the next page.
+    
+    The cursor names the last record served by its key (with its position as a hint),
+    so records inserted or deleted between pages are neither skipped nor repeated.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    
+    records = []
+    last = None
+    next_cursor = None
+    for position, record in store.iter_records(_resume_position(store, cursor)):
+        if len(records) == page_size:
+            next_cursor = f"{last[0]}:{normalize_key(last[1].get(store.key))}"
+            break
+        records.append(project_record(record, fields))
+        last = (position, record)
+    return {"records": records, "next_cursor": next_cursor}
+
+@_backend_dispatch
+def get_doctors_page(cursor: Optional[str] = None, page_size: int = 50, fields: Optional[List[str]] = None) -> Dict:
+    """
+    Get one page of doctors (basic information by default) and the cursor of the next page.
+    
+    Pass the returned next_cursor back to get the following page; it is None on the last one.
+    """
+    page = _page(doctor_store, cursor, page_size, list(fields or DOCTOR_LIST_FIELDS))
+    return {"doctors": page["records"], "next_cursor": page["next_cursor"]}
+
+def iter_doctors(fields: Optional[List[str]] = None, page_size: int = 100) -> Iterator[Dict]:
+    """Yield doctors one at a time, fetching them page by page"""
+    cursor = None
+    while True:
+        page = get_doctors_page(cursor, page_size, fields)
+        yield from page["doctors"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+@_backend_dispatch
 def get_doctor_by_email(email: str) -> Optional[Dict]:
     """Get a doctor by email"""
-    doctors = read_doctor_db()
-    
-    for doctor in doctors:
-        if doctor['email'] == email:
-            return doctor
-    
-    return None
+    return doctor_store.get(email)
 
 # Patient database functions
+@_backend_dispatch
 def read_patient_db() -> List[Dict]:
     """Read the patient database"""
-    # Ensure database is initialized
-    if not initialize_db_if_empty():
+    # Ensure database is initialized (a single stat once it has been verified)
+    if not patient_store.ensure_initialized():
         print("Warning: Failed to initialize database before reading patient data")
         return []
         
-    try:
-        with open(PATIENT_DB_PATH, 'r') as f:
-            try:
-                data = json.load(f)
-                return data
-            except json.JSONDecodeError as e:
-                print(f"Error parsing patient database JSON: {str(e)}")
-                return []
-    except IOError as e:
-        print(f"Error reading patient database file: {str(e)}")
-        return []
+    return patient_store.read()
 
+@_backend_dispatch
 def write_patient_db(data: List[Dict]):
     """Write to the patient database"""
-    try:
-        with open(PATIENT_DB_PATH, 'w') as f:
-            json.dump(data, f, indent=3)
-        
-        # Verify the file was written correctly
-        if os.path.exists(PATIENT_DB_PATH) and os.path.getsize(PATIENT_DB_PATH) > 0:
-            return True
-        else:
-            print(f"Error: Patient database file is empty after write operation")
-            return False
-    except Exception as e:
-        print(f"Error writing to patient database: {str(e)}")
-        return False
+    return patient_store.write(data)
 
+@_backend_dispatch
 def patient_exists(email: str) -> bool:
     """Check if a patient exists in the database"""
     print(f"Checking if patient exists: {email}")
     
-    # Get absolute path
-    abs_path = os.path.abspath(PATIENT_DB_PATH)
-    
-    # Check if file exists
-    if not os.path.exists(abs_path):
-        print(f"Patient database file does not exist: {abs_path}")
-        return False
-    
     try:
-        with open(abs_path, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                return False
-                
-            patients = json.loads(content)
-            return any(patient.get('email') == email for patient in patients)
+        return patient_store.contains(email)
     except Exception as e:
         print(f"Error checking if patient exists: {str(e)}")
         return False
 
+@_backend_dispatch
 def authenticate_patient(email: str, password: str) -> Optional[Dict]:
     """Authenticate a patient with email and password"""
     print(f"Authenticating patient: {email}")
     
-    # Get absolute path
-    abs_path = os.path.abspath(PATIENT_DB_PATH)
-    print(f"Patient DB absolute path: {abs_path}")
-    
-    # Check if file exists
-    if not os.path.exists(abs_path):
-        print(f"Patient database file does not exist: {abs_path}")
-        return None
-    
-    # Read database directly
     try:
-        with open(abs_path, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                print("Patient database is empty")
-                return None
-                
-            patients = json.loads(content)
-            for patient in patients:
-                if patient.get('email') == email and patient.get('password') == password:
-                    print(f"Patient authenticated successfully: {email}")
-                    return patient
-                    
-            print(f"Invalid credentials for patient: {email}")
+        if not patient_store.read():
+            print("Patient database is empty")
             return None
+            
+        patient = patient_store.get(email)
+        if patient and patient.get('password') == password:
+            print(f"Patient authenticated successfully: {email}")
+            return patient
+            
+        print(f"Invalid credentials for patient: {email}")
+        return None
     except Exception as e:
         print(f"Error authenticating patient: {str(e)}")
         return None
 
+@_backend_dispatch
 def register_patient(name: str, email: str, password: str, age: int = None, medical_history: List[str] = None) -> Dict:
     """Register a new patient"""
     print(f"Registering patient: {email}")
@@ -421,135 +441,208 @@ def register_patient(name: str, email: str, password: str, age: int = None, medi
             print(f"Error creating patient database directory: {str(e)}")
             raise ValueError(f"Could not create database directory: {str(e)}")
     
-    # Check for existing patient
-    existing = None
-    current_data = []
-    
-    # Read current data
-    if os.path.exists(abs_path):
+    with transaction(patient_store, key=email):
+        # Check for existing patient
+        existing = None
+        
         try:
-            with open(abs_path, 'r') as f:
-                content = f.read().strip()
-                if content:
-                    current_data = json.loads(content)
-                    # Check if patient exists
-                    existing = next((p for p in current_data if p.get('email') == email), None)
+            existing = patient_store.get(email)
         except Exception as e:
             print(f"Error reading patient database: {str(e)}")
-            # Initialize with empty list if error
-            current_data = []
-    
-    if existing:
-        print(f"Patient already exists: {email}")
-        raise ValueError("Patient with this email already exists")
+        
+        if existing:
+            print(f"Patient already exists: {email}")
+            raise ValueError("Patient with this email already exists")
+        
+        new_patient = {
+            "name": name,
+            "email": email,
+            "password": password,
+            "age": age,
+            "medical_history": medical_history or [],
+            "appointments": []
+        }
+        
+        # Insert just this record; the store writes atomically (temp file + fsync +
+        # rename), so a successful write needs no read-back verification
+        if not patient_store.put(new_patient, durable=True):
+            raise ValueError("Failed to save patient registration")
+    print(f"Wrote patient data to file: {abs_path}")
     
-    new_patient = {
-        "name": name,
-        "email": email,
-        "password": password,
+    return new_patient
+
+def _check_required(row: Dict, fields: Tuple[str, ...]):
+    """Check that an import row is an object with non-empty text in each required field (raises ValueError)"""
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    
+    missing = [field for field in fields if row.get(field) is None or not str(row[field]).strip()]
+    if missing:
+        raise ValueError(f"Missing required field(s): {', '.join(missing)}")
+    
+    not_text = [field for field in fields if not isinstance(row[field], str)]
+    if not_text:
+        raise ValueError(f"Field(s) must be text: {', '.join(not_text)}")
+
+def _string_list(row: Dict, field: str) -> List[str]:
+    """Read an optional list-of-text field of an import row; a single string counts as a one-item list"""
+    value = row.get(field)
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+        return list(value)
+    raise ValueError(f"Invalid {field}: must be a list of text")
+
+def build_doctor_record(row: Dict) -> Dict:
+    """Validate an import row and turn it into a new doctor record (raises ValueError)"""
+    _check_required(row, ("name", "email", "password", "specialization"))
+    
+    return {
+        "name": row["name"],
+        "email": row["email"].strip(),
+        "password": row["password"],
+        "specialization": row["specialization"],
+        "Slots_available": _string_list(row, "Slots_available"),
+        "Bookings": []
+    }
+
+def build_patient_record(row: Dict) -> Dict:
+    """Validate an import row and turn it into a new patient record (raises ValueError)"""
+    _check_required(row, ("name", "email", "password"))
+    
+    age = row.get("age")
+    if age in (None, ""):
+        age = None
+    else:
+        try:
+            age = int(age)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid age: {age}")
+    
+    return {
+        "name": row["name"],
+        "email": row["email"].strip(),
+        "password": row["password"],
         "age": age,
-        "medical_history": medical_history or [],
+        "medical_history": _string_list(row, "medical_history"),
         "appointments": []
     }
-    
-    # Add new patient to data
-    current_data.append(new_patient)
-    print(f"New patient count: {len(current_data)}")
-    
-    # Direct file write for reliability
-    try:
-        with open(abs_path, 'w') as f:
-            json.dump(current_data, f, indent=3)
-        print(f"Wrote patient data to file: {abs_path}")
-        print(f"File size after write: {os.path.getsize(abs_path)} bytes")
-    except Exception as e:
-        print(f"Error writing patient data to file: {str(e)}")
-        raise ValueError(f"Failed to save patient registration: {str(e)}")
-    
-    # Verify patient was added by reading the file again
-    try:
-        with open(abs_path, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                print(f"Error: File is empty after writing")
-                raise ValueError("Registration failed: Database file is empty after writing")
-                
-            verify_data = json.loads(content)
-            if any(p.get('email') == email for p in verify_data):
-                print(f"Successfully verified patient registration: {email}")
-            else:
-                print(f"Patient not found in database after registration: {email}")
-                raise ValueError("Patient registration verification failed")
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON after write: {str(e)}")
-        raise ValueError(f"Failed to verify patient registration: Invalid JSON")
-    except Exception as e:
-        print(f"Error verifying patient registration: {str(e)}")
-        raise ValueError(f"Failed to verify patient registration: {str(e)}")
-        
-    return new_patient
 
-def add_patient_appointment(patient_email: str, doctor_email: str, time: str) -> Dict:
-    """Add an appointment to a patient's record"""
-    patients = read_patient_db()
-    doctors = read_doctor_db()
-    
-    # Verify doctor exists
-    doctor = next((d for d in doctors if d['email'] == doctor_email), None)
-    if not doctor:
-        raise ValueError("Doctor not found")
-    
-    appointment = {
-        "doctor_name": doctor["name"],
-        "doctor_email": doctor_email,
-        "time": time,
-        "status": "scheduled"
-    }
-    
-    for patient in patients:
-        if patient['email'] == patient_email:
-            patient['appointments'].append(appointment)
-            write_patient_db(patients)
-            
-            # Also add the booking to the doctor's record
-            add_booking(doctor_email, patient['name'], time)
+def _register_bulk(store, kind: str, rows: List[Dict], build) -> Dict:
+    """Validate rows against the key index and the batch itself, then insert the valid ones in one write"""
+    registered = []
+    errors = []
+    seen = set()
+    
+    with transaction(store):
+        for index, row in enumerate(rows):
+            try:
+                record = build(row)
+                key = normalize_key(record["email"])
+                if key in seen or store.contains(key):
+                    raise ValueError(f"{kind.capitalize()} with this email already exists")
+            except ValueError as e:
+                errors.append({"index": index, "email": row.get("email") if isinstance(row, dict) else None, "error": str(e)})
+                continue
             
-            return appointment
+            seen.add(key)
+            registered.append(record)
+        
+        if registered and not store.put_many(registered, durable=True):
+            raise ValueError(f"Failed to save {kind} registrations")
     
-    raise ValueError("Patient not found")
+    print(f"Registered {len(registered)} {kind}s ({len(errors)} rejected)")
+    return {"registered": registered, "errors": errors}
+
+@_backend_dispatch
+def register_doctors_bulk(doctors: List[Dict]) -> Dict:
+    """
+    Register many doctors with a single database write.
+    
+    Invalid or duplicate rows are skipped and reported in "errors" as
+    {index, email, error}; the others are returned in "registered".
+    """
+    return _register_bulk(doctor_store, "doctor", doctors, build_doctor_record)
+
+@_backend_dispatch
+def register_patients_bulk(patients: List[Dict]) -> Dict:
+    """
+    Register many patients with a single database write.
+    
+    Invalid or duplicate rows are skipped and reported in "errors" as
+    {index, email, error}; the others are returned in "registered".
+    """
+    return _register_bulk(patient_store, "patient", patients, build_patient_record)
+
+@_backend_dispatch
+def add_patient_appointment(patient_email: str, doctor_email: str, time: str, duration: Optional[int] = None) -> Dict:
+    """Add an appointment to a patient's record (duration in minutes, kept on the doctor's booking)"""
+    with transaction(key=patient_email):
+        # Verify doctor exists
+        doctor = doctor_store.get(doctor_email)
+        if not doctor:
+            raise ValueError("Doctor not found")
+        
+        patient = patient_store.get(patient_email)
+        if not patient:
+            raise ValueError("Patient not found")
+        
+        # Also add the booking to the doctor's record (raises if the slot is taken)
+        _append_booking(doctor, patient['name'], time, duration)
+        
+        appointment = {
+            "doctor_name": doctor["name"],
+            "doctor_email": doctor_email,
+            "time": time,
+            "status": "scheduled"
+        }
+        patient['appointments'].append(appointment)
+        
+        # One write per store, both under the same locks; a failed write takes the
+        # appointment back out of both records
+        if not doctor_store.put(doctor):
+            doctor['Bookings'].pop()
+            patient['appointments'].pop()
+            raise ValueError("Failed to save appointment")
+        if not patient_store.put(patient):
+            patient['appointments'].pop()
+            doctor['Bookings'].pop()
+            doctor_store.put(doctor)
+            raise ValueError("Failed to save appointment")
+        
+        return appointment
 
+@_backend_dispatch
 def get_patient_appointments(patient_email: str) -> List[Dict]:
     """Get all appointments for a patient"""
-    patients = read_patient_db()
+    patient = patient_store.get(patient_email)
     
-    for patient in patients:
-        if patient['email'] == patient_email:
-            return patient['appointments']
+    if not patient:
+        raise ValueError("Patient not found")
     
-    raise ValueError("Patient not found")
+    return patient['appointments']
 
+@_backend_dispatch
 def update_patient_medical_history(patient_email: str, medical_history: List[str]) -> Dict:
     """Update medical history for a patient"""
-    patients = read_patient_db()
-    
-    for patient in patients:
-        if patient['email'] == patient_email:
-            patient['medical_history'] = medical_history
-            write_patient_db(patients)
-            return patient
-    
-    raise ValueError("Patient not found")
+    with transaction(patient_store, key=patient_email):
+        patient = patient_store.get(patient_email)
+        
+        if not patient:
+            raise ValueError("Patient not found")
+        
+        patient['medical_history'] = medical_history
+        patient_store.put(patient)
+        return patient
 
+@_backend_dispatch
 def get_patient_by_email(email: str) -> Optional[Dict]:
     """Get a patient by email"""
-    patients = read_patient_db()
-    
-    for patient in patients:
-        if patient['email'] == email:
-            return patient
-    
-    return None
+    return patient_store.get(email)
 
+@_backend_dispatch
 def get_all_patients() -> List[Dict]:
     """Get all patients with basic information (without sensitive data)"""
     patients = read_patient_db()
@@ -562,45 +655,158 @@ def get_all_patients() -> List[Dict]:
     
     return result
 
+@_backend_dispatch
+def get_patients_page(cursor: Optional[str] = None, page_size: int = 50, fields: Optional[List[str]] = None) -> Dict:
+    """
+    Get one page of patients (without sensitive data) and the cursor of the next page.
+    
+    Only the requested fields are copied. Pass the returned next_cursor back to get
+    the following page; it is None on the last one.
+    """
+    page = _page(patient_store, cursor, page_size, fields)
+    return {"patients": page["records"], "next_cursor": page["next_cursor"]}
+
+def iter_patients(fields: Optional[List[str]] = None, page_size: int = 100) -> Iterator[Dict]:
+    """Yield patients one at a time (without sensitive data), fetching them page by page"""
+    cursor = None
+    while True:
+        page = get_patients_page(cursor, page_size, fields)
+        yield from page["patients"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+@_backend_dispatch
 def delete_appointment(doctor_email: str, patient_name: str, time: str) -> bool:
     """Delete an appointment from both doctor's bookings and patient's appointments"""
-    # First remove from doctor's bookings
-    doctors = read_doctor_db()
-    doctor_updated = False
-    
-    for doctor in doctors:
-        if doctor['email'] == doctor_email:
-            # Find and remove the booking
-            doctor['Bookings'] = [
-                b for b in doctor['Bookings'] 
-                if not (b['patient_name'] == patient_name and b['time'] == time)
-            ]
-            doctor_updated = True
-            break
-    
-    if not doctor_updated:
-        return False
+    return delete_appointments(doctor_email, [{"patient_name": patient_name, "time": time}])
+
+@_backend_dispatch
+def delete_appointments(doctor_email: str, appointments: List[Dict]) -> bool:
+    """Delete several of a doctor's appointments ({patient_name, time} each), writing each store once"""
+    with transaction():
+        doctor = doctor_store.get(doctor_email)
+        if not doctor:
+            return False
         
-    # Save doctor's data
-    write_doctor_db(doctors)
-    
-    # Then remove from patient's appointments
-    patients = read_patient_db()
-    patient_updated = False
-    
-    for patient in patients:
-        # Find patient by name since we might not have email for booking-only patients
-        if patient['name'] == patient_name:
-            # Remove the appointment
-            patient['appointments'] = [
-                a for a in patient['appointments']
-                if not (a['doctor_email'] == doctor_email and a['time'] == time)
-            ]
-            patient_updated = True
-            break
-    
-    if patient_updated:
-        write_patient_db(patients)
-    
-    # Return true even if patient record wasn't found (they might be booking-only)
-    return True 
\ No newline at end of file
+        # Remove the bookings from the doctor's record in one pass
+        cancelled = {(a['patient_name'], a['time']) for a in appointments}
+        calendar = _booking_calendar(doctor)
+        kept_bookings = []
+        for booking in doctor['Bookings']:
+            if (booking['patient_name'], booking['time']) in cancelled:
+                calendar.remove(booking['time'], booking.get('duration'))
+            else:
+                kept_bookings.append(booking)
+        doctor['Bookings'] = kept_bookings
+        _booking_calendars[normalize_key(doctor['email'])] = (kept_bookings, calendar)
+        
+        # Find patients by name since we might not have email for booking-only patients
+        candidates = {}
+        for patient_name, _ in cancelled:
+            for patient in patient_store.find("name", patient_name):
+                candidates[normalize_key(patient['email'])] = patient['email']
+        
+        with ExitStack() as stack:
+            # A sharded store only locks whole-store writes above; hold each affected patient too
+            for email in sorted(candidates.values()):
+                stack.enter_context(patient_store.locked(email))
+            
+            changed = {}
+            for patient_name, time in cancelled:
+                # Several patients may share a name: update the one holding this appointment
+                for patient in patient_store.find("name", patient_name):
+                    kept = [
+                        a for a in patient['appointments']
+                        if not (normalize_key(a['doctor_email']) == normalize_key(doctor_email) and a['time'] == time)
+                    ]
+                    if len(kept) != len(patient['appointments']):
+                        patient['appointments'] = kept
+                        changed[normalize_key(patient['email'])] = patient
+                        break
+            
+            # One write per store
+            doctor_store.put(doctor)
+            if changed:
+                patient_store.put_many(list(changed.values()))
+        
+        # Return true even if patient record wasn't found (they might be booking-only)
+        return True
+
+@_backend_dispatch
+def add_patient_record(patient_email: str, field: str, record: Dict) -> bool:
+    """Append a record (medication, purchase, inquiry, ...) to one of a patient's lists"""
+    with transaction(patient_store, key=patient_email):
+        patient = patient_store.get(patient_email)
+        
+        if not patient:
+            print(f"Error: Patient with email {patient_email} not found.")
+            return False
+        
+        patient.setdefault(field, []).append(record)
+        return patient_store.put(patient)
+
+@_backend_dispatch
+def add_patient_records(patient_email: str, field: str, records: List[Dict]) -> bool:
+    """Append several records to one of a patient's lists in a single write"""
+    with transaction(patient_store, key=patient_email):
+        patient = patient_store.get(patient_email)
+        
+        if not patient:
+            print(f"Error: Patient with email {patient_email} not found.")
+            return False
+        
+        patient.setdefault(field, []).extend(records)
+        return patient_store.put(patient)
+
+@_backend_dispatch
+def update_patient_record(patient_email: str, field: str, name: str, changes: Dict) -> bool:
+    """Update the first record with the given name in one of a patient's lists"""
+    with transaction(patient_store, key=patient_email):
+        patient = patient_store.get(patient_email)
+        
+        if not patient:
+            print(f"Error: Patient with email {patient_email} not found.")
+            return False
+        
+        for record in patient.get(field, []):
+            if record.get('name') == name:
+                record.update(changes)
+                return patient_store.put(patient)
+        
+        print(f"Error: Record {name} not found in {field} for patient {patient_email}.")
+        return False
+
+# Async variants for callers on the event loop (FastAPI handlers, ADK tools); the
+# blocking file I/O runs on the bounded I/O thread pool instead
+aflush_pending_writes = make_async(flush_pending_writes)
+ainitialize_db_if_empty = make_async(initialize_db_if_empty)
+aread_doctor_db = make_async(read_doctor_db)
+awrite_doctor_db = make_async(write_doctor_db)
+adoctor_exists = make_async(doctor_exists)
+aauthenticate_doctor = make_async(authenticate_doctor)
+aregister_doctor = make_async(register_doctor)
+aadd_booking = make_async(add_booking)
+aget_doctor_bookings = make_async(get_doctor_bookings)
+aupdate_doctor_slots = make_async(update_doctor_slots)
+aget_all_doctors = make_async(get_all_doctors)
+aget_doctors_page = make_async(get_doctors_page)
+aget_doctor_by_email = make_async(get_doctor_by_email)
+aread_patient_db = make_async(read_patient_db)
+awrite_patient_db = make_async(write_patient_db)
+apatient_exists = make_async(patient_exists)
+aauthenticate_patient = make_async(authenticate_patient)
+aregister_patient = make_async(register_patient)
+aregister_doctors_bulk = make_async(register_doctors_bulk)
+aregister_patients_bulk = make_async(register_patients_bulk)
+aadd_patient_appointment = make_async(add_patient_appointment)
+aget_patient_appointments = make_async(get_patient_appointments)
+aupdate_patient_medical_history = make_async(update_patient_medical_history)
+aget_patient_by_email = make_async(get_patient_by_email)
+aget_all_patients = make_async(get_all_patients)
+aget_patients_page = make_async(get_patients_page)
+adelete_appointment = make_async(delete_appointment)
+adelete_appointments = make_async(delete_appointments)
+aadd_patient_record = make_async(add_patient_record)
+aadd_patient_records = make_async(add_patient_records)
+aupdate_patient_record = make_async(update_patient_record)
@@ -0,0 +1,221 @@
+import contextlib
+import gc
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# Add the project root to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from medical_agent.utils import database_utils, serializer
+from medical_agent.utils import medicine_tool
+from medical_agent.utils.medicine_tool import MEDICINE_DB_PATH
+from medical_agent.utils.models import Medicine, Patient
+
+def make_patients(count: int) -> List[Dict]:
+    """Create synthetic patient records shaped like the real ones"""
+    return [
+        {
+            "name": f"Patient {i}",
+            "email": f"patient{i}@example.com",
+            "password": "secret",
+            "age": 20 + i % 60,
+            "medical_history": ["hypertension", "asthma"][: i % 3],
+            "appointments": [
+                {"doctor_name": "Dr. Priya Sharma", "doctor_email": "priyasharma@example.com",
+                 "time": "2025-01-01-09:30", "status": "scheduled"}
+            ],
+            "medications": [
+                {"name": "Aspirin", "prescription_details": "325 mg daily", "prescribed_by": "Dr. Priya Sharma",
+                 "date_prescribed": "2025-01-01", "category": "Pain Relief", "active": True}
+            ],
+            "purchased_medicines": [
+                {"name": "Aspirin", "quantity": 2, "price_per_unit": 5.99, "total_cost": 11.98,
+                 "purchase_date": "2025-01-01", "category": "Pain Relief"}
+            ]
+        }
+        for i in range(count)
+    ]
+
+def legacy_read_patient_db(doctor_path: str, patient_path: str) -> List[Dict]:
+    """The read path before the store: validate both files, then parse the patient file again"""
+    for path in (doctor_path, patient_path):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            raise RuntimeError(f"{path} is missing")
+    for path in (doctor_path, patient_path):
+        with open(path, 'r') as f:
+            json.load(f)
+    with open(patient_path, 'r') as f:
+        return json.load(f)
+
+@contextlib.contextmanager
+def use_database_dir(db_dir: str):
+    """Point database_utils at a scratch directory, and back at the real files afterwards"""
+    saved = (database_utils.DOCTOR_DB_PATH, database_utils.PATIENT_DB_PATH,
+             database_utils.doctor_store.path, database_utils.patient_store.path)
+    database_utils.DOCTOR_DB_PATH = os.path.join(db_dir, "doctor_details.json")
+    database_utils.PATIENT_DB_PATH = os.path.join(db_dir, "patient_details.json")
+    database_utils.doctor_store.path = database_utils.DOCTOR_DB_PATH
+    database_utils.patient_store.path = database_utils.PATIENT_DB_PATH
+    database_utils.doctor_store.invalidate()
+    database_utils.patient_store.invalidate()
+    try:
+        yield
+    finally:
+        # Pending write-behind changes belong to the scratch files
+        database_utils.flush_pending_writes()
+        (database_utils.DOCTOR_DB_PATH, database_utils.PATIENT_DB_PATH,
+         database_utils.doctor_store.path, database_utils.patient_store.path) = saved
+        database_utils.doctor_store.invalidate()
+        database_utils.patient_store.invalidate()
+
+def bench_reads(patient_count: int = 5000, repeat: int = 50):
+    """Compare the per-read cost of the legacy read path with the cached store"""
+    db_dir = tempfile.mkdtemp(prefix="medical_agent_bench_")
+    try:
+        with use_database_dir(db_dir):
+            with open(database_utils.DOCTOR_DB_PATH, 'w') as f:
+                json.dump([], f, indent=3)
+            with open(database_utils.PATIENT_DB_PATH, 'w') as f:
+                json.dump(make_patients(patient_count), f, indent=3)
+
+            size_kb = os.path.getsize(database_utils.PATIENT_DB_PATH) / 1024
+            print(f"Patient database: {patient_count} patients, {size_kb:.0f} KB")
+
+            legacy = timeit.timeit(
+                lambda: legacy_read_patient_db(database_utils.DOCTOR_DB_PATH, database_utils.PATIENT_DB_PATH),
+                number=repeat
+            ) / repeat
+
+            # The first read parses and verifies the file; later reads hit the cache
+            database_utils.read_patient_db()
+            cached = timeit.timeit(database_utils.read_patient_db, number=repeat) / repeat
+            lookup = timeit.timeit(
+                lambda: database_utils.get_patient_by_email(f"patient{patient_count // 2}@example.com"),
+                number=repeat
+            ) / repeat
+
+            print(f"{'legacy read_patient_db':<32}{legacy * 1e6:>12.1f} us/read")
+            print(f"{'read_patient_db':<32}{cached * 1e6:>12.1f} us/read")
+            print(f"{'get_patient_by_email':<32}{lookup * 1e6:>12.1f} us/read")
+            print(f"Speedup: {legacy / cached:.0f}x")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+def legacy_find_medicine_by_name(path: str, name: str) -> Optional[Dict]:
+    """The catalog lookup before the in-memory catalog: parse the file, then scan it"""
+    with open(path, 'r') as f:
+        medicines = json.load(f)
+    for medicine in medicines:
+        if medicine.get('name').lower() == name.lower():
+            return medicine
+    return None
+
+def bench_catalog(repeat: int = 200):
+    """Compare a medicine lookup that parses the catalog file with the in-memory catalog"""
+    name = serializer.load_file(MEDICINE_DB_PATH)[-1]["name"]
+    legacy = timeit.timeit(lambda: legacy_find_medicine_by_name(MEDICINE_DB_PATH, name), number=repeat) / repeat
+    medicine_tool.find_medicine_by_name(name)
+    cached = timeit.timeit(lambda: medicine_tool.find_medicine_by_name(name), number=repeat) / repeat
+
+    print(f"{'legacy find_medicine_by_name':<32}{legacy * 1e6:>12.1f} us/lookup")
+    print(f"{'find_medicine_by_name':<32}{cached * 1e6:>12.1f} us/lookup")
+
+def measure_memory(build: Callable[[], Any]) -> int:
+    """Return the bytes held by the object that build() returns (temporaries excluded)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return held
+
+def bench_memory(patient_count: int = 5000):
+    """Compare the memory held by cached records as dicts and as slotted record objects"""
+    patients = serializer.dumps(make_patients(patient_count))
+    medicines = serializer.dumps(serializer.load_file(MEDICINE_DB_PATH))
+    datasets = [
+        (f"{patient_count} patients", patients, Patient),
+        (f"{len(serializer.loads(medicines))} medicines", medicines, Medicine),
+    ]
+
+    for label, raw, record_type in datasets:
+        as_dicts = measure_memory(lambda: serializer.loads(raw))
+        as_records = measure_memory(lambda: [record_type.from_dict(r) for r in serializer.loads(raw)])
+        print(f"{label:<32}{as_dicts / 1024:>10.0f} KB as dicts {as_records / 1024:>10.0f} KB as records "
+              f"({1 - as_records / as_dicts:.0%} less)")
+
+def bench_purchases(thread_count: int = 16, purchases: int = 60):
+    """Buy the same few medicines from many threads until they sell out, and check nothing is oversold"""
+    db_dir = tempfile.mkdtemp(prefix="medical_agent_bench_")
+    store = medicine_tool.medicine_store
+    try:
+        with use_database_dir(db_dir):
+            store.path = os.path.join(db_dir, "medicines.json")
+            shutil.copy(MEDICINE_DB_PATH, store.path)
+            store.invalidate()
+        
+            names = [medicine["name"] for medicine in medicine_tool.load_medicines()[:3]]
+            stock = {name: medicine_tool.get_medicine_quantity(name) for name in names}
+            sold = {name: 0 for name in names}
+            sold_lock = threading.Lock()
+        
+            def buyer(worker: int):
+                for i in range(purchases):
+                    name = names[(worker + i) % len(names)]
+                    quantity = 1 + i % 3
+                    if medicine_tool.purchase_medicine(f"buyer{worker % 8}@example.com", name, quantity):
+                        with sold_lock:
+                            sold[name] += quantity
+        
+            # Out-of-stock purchases print errors; keep them out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(8):
+                    database_utils.register_patient(f"Buyer {i}", f"buyer{i}@example.com", "secret")
+                threads = [threading.Thread(target=buyer, args=(worker,)) for worker in range(thread_count)]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+                database_utils.flush_pending_writes()
+                store.flush()
+        
+            # Check against what was written to disk
+            store.invalidate()
+            database_utils.patient_store.invalidate()
+            recorded = {name: 0 for name in names}
+            for i in range(8):
+                for purchase in database_utils.get_patient_by_email(f"buyer{i}@example.com").get("purchased_medicines", []):
+                    recorded[purchase["name"]] += purchase["quantity"]
+        
+            print(f"{thread_count} threads x {purchases} purchases in {elapsed:.2f} s")
+            for name in names:
+                left = medicine_tool.get_medicine_quantity(name)
+                status = "OK" if left >= 0 and stock[name] - left == sold[name] == recorded[name] else "MISMATCH"
+                print(f"{name:<32}stock {stock[name]:>5}  sold {sold[name]:>5}  recorded {recorded[name]:>5}  left {left:>5}  {status}")
+    finally:
+        store.path = MEDICINE_DB_PATH
+        store.invalidate()
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    bench_reads(count)
+    bench_catalog()
+    bench_memory(count)
+    bench_purchases()
@@ -0,0 +1,85 @@
+import csv
+import os
+import sys
+from typing import Dict, List, Tuple
+
+# Add the project root to Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from medical_agent.utils import serializer
+from medical_agent.utils.database_utils import register_doctors_bulk, register_patients_bulk
+
+# CSV columns that hold lists, written as values separated by semicolons
+LIST_COLUMNS = ("medical_history", "Slots_available")
+
+def read_csv_rows(path: str) -> Tuple[List[Tuple[int, Dict]], List[Dict]]:
+    """Read a CSV file with a header row into (line number, row) pairs"""
+    rows = []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            for column in LIST_COLUMNS:
+                if isinstance(row.get(column), str):
+                    row[column] = [item.strip() for item in row[column].split(";") if item.strip()]
+            rows.append((reader.line_num, row))
+    return rows, []
+
+def read_ndjson_rows(path: str) -> Tuple[List[Tuple[int, Dict]], List[Dict]]:
+    """Read a newline-delimited JSON file into (line number, row) pairs and per-line parse errors"""
+    rows = []
+    errors = []
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = serializer.loads(line)
+            except serializer.DecodeError as e:
+                errors.append({"line": line_number, "email": None, "error": f"Invalid JSON: {str(e)}"})
+                continue
+            if not isinstance(row, dict):
+                errors.append({"line": line_number, "email": None, "error": "Expected a JSON object"})
+                continue
+            rows.append((line_number, row))
+    return rows, errors
+
+def import_records(kind: str, path: str) -> Dict:
+    """
+    Import patients or doctors from a CSV or NDJSON file in one batch.
+
+    Args:
+        kind (str): "patients" or "doctors".
+        path (str): A .csv file with a header row, or a .ndjson/.jsonl file with one object per line.
+
+    Returns:
+        Dict: The number of registered records and a list of {line, email, error} for rejected rows.
+    """
+    if kind not in ("patients", "doctors"):
+        raise ValueError(f"Unknown record type: {kind}")
+
+    if path.lower().endswith(".csv"):
+        rows, errors = read_csv_rows(path)
+    else:
+        rows, errors = read_ndjson_rows(path)
+
+    register = register_patients_bulk if kind == "patients" else register_doctors_bulk
+    result = register([row for _, row in rows])
+
+    # Map batch positions back to line numbers in the file
+    for error in result["errors"]:
+        errors.append({"line": rows[error["index"]][0], "email": error["email"], "error": error["error"]})
+    errors.sort(key=lambda error: error["line"])
+
+    return {"registered": len(result["registered"]), "errors": errors}
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m medical_agent.utils.import_records patients|doctors <file.csv|file.ndjson>")
+        sys.exit(1)
+
+    summary = import_records(sys.argv[1], sys.argv[2])
+    for error in summary["errors"]:
+        print(f"Line {error['line']} ({error['email'] or 'no email'}): {error['error']}")
+    print(f"Imported {summary['registered']} {sys.argv[1]}, {len(summary['errors'])} rows rejected.")
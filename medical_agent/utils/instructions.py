@@ -92,6 +92,8 @@ class Instructions:
       - Recommend appropriate OTC medications for symptoms
       - Explain proper usage, dosage, and side effects
       - Always check if a medicine is prescription-required or OTC
+      - Misspelled or brand names are resolved automatically; if a tool answers "Did you mean", confirm the suggested medicine with the patient before retrying
+      - Medicine tools return a short "summary" view by default; ask for view="clinical" for dosage, side effects and contraindications, or view="full" for the whole record
 
    2. Prescription vs OTC Medicine Handling:
       For OTC (Over-The-Counter) Medicines:
@@ -108,7 +110,8 @@ class Instructions:
       - If patient has prescription, verify before processing
 
    3. Symptom-Based Medicine Queries:
-      - Use get_medicines_by_symptom_tool for appropriate matches
+      - Use get_medicines_by_symptoms_tool with all reported symptoms in one call (get_medicines_by_symptom_tool for a single symptom)
+      - Prefer medicines that match the most symptoms
       - Only recommend OTC medicines for symptoms
       - For serious symptoms, recommend doctor consultation
       - Always warn about potential allergies and side effects
@@ -116,7 +119,7 @@ class Instructions:
    4. Medicine Purchase Processing:
       - Verify prescription status before processing
       - Check medicine availability using get_medicine_quantity_tool
-      - Record all purchases using purchase_medicine_tool
+      - Record all purchases using purchase_medicine_tool; when the patient buys several medicines, use purchase_medicines_tool once with all of them (their names and, in the same order, their quantities) and share its single receipt
       - Update inventory after successful purchase
       - Provide clear payment and collection information
 
@@ -0,0 +1,195 @@
+import itertools
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .json_store import JsonStore, normalize_key
+
+# How long (in seconds) stock stays reserved for a purchase that is neither committed nor released
+DEFAULT_RESERVATION_TTL = 300.0
+
+
+def whole_quantity(quantity: Any) -> Optional[int]:
+    """Return a purchase quantity as a positive int (2.0 counts as 2), or None if it is not one"""
+    # Model-generated arguments may carry whole numbers as floats
+    if isinstance(quantity, float) and quantity.is_integer():
+        quantity = int(quantity)
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+        return None
+    return quantity
+
+
+@dataclass
+class Reservation:
+    """Stock of one medicine held for a purchase until it is committed, released or expires"""
+    id: int
+    name: str
+    quantity: int
+    expires_at: float
+
+
+@dataclass
+class _Sku:
+    """The lock and the open reservations of one medicine"""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    reservations: Dict[int, Reservation] = field(default_factory=dict)
+
+    def expire(self, now: float):
+        for reservation_id in [r.id for r in self.reservations.values() if r.expires_at <= now]:
+            del self.reservations[reservation_id]
+
+    def reserved(self) -> int:
+        return sum(r.quantity for r in self.reservations.values())
+
+
+class Inventory:
+    """
+    Stock levels of the medicine catalog, with atomic reservations.
+
+    reserve() checks and holds stock of one medicine under that medicine's
+    own lock, against the quantity on hand minus what is already reserved,
+    so concurrent purchases never hold more than there is and purchases of
+    different medicines do not wait for each other. Reservations live in
+    memory and lapse after their TTL unless committed or released.
+
+    commit() takes reserved stock for good: under the catalog store lock it
+    writes the decrements of all its reservations in one store write, then
+    runs the caller's record of the purchase. If that fails the stock is put
+    back before the lock is released, so no other purchase ever sees (or
+    sells against) a half-done one. Stock changed by other processes is
+    re-checked at commit, since reservations are per process.
+    """
+
+    def __init__(self, store: JsonStore, ttl: float = DEFAULT_RESERVATION_TTL):
+        self.store = store
+        self.ttl = ttl
+        self._ids = itertools.count(1)
+        self._skus: Dict[str, _Sku] = {}
+        self._skus_lock = threading.Lock()
+
+    def _sku(self, name: str) -> _Sku:
+        sku_key = normalize_key(name)
+        with self._skus_lock:
+            sku = self._skus.get(sku_key)
+            if sku is None:
+                sku = self._skus[sku_key] = _Sku()
+            return sku
+
+    def reserved(self, name: str) -> int:
+        """Return the quantity of a medicine held by open reservations"""
+        sku = self._sku(name)
+        with sku.lock:
+            sku.expire(time.monotonic())
+            return sku.reserved()
+
+    def available(self, name: str) -> int:
+        """Return the quantity of a medicine that can still be reserved"""
+        record = self.store.get(name)
+        if record is None:
+            return 0
+        return record.get('quantity', 0) - self.reserved(record['name'])
+
+    def reserve(self, name: str, quantity: int, ttl: Optional[float] = None) -> Reservation:
+        """
+        Hold stock of a medicine (by catalog name) for a purchase.
+
+        Raises ValueError if the medicine is unknown, the quantity is not a
+        positive whole number (see whole_quantity) or not enough stock is left.
+        """
+        count = whole_quantity(quantity)
+        if count is None:
+            raise ValueError(f"Invalid quantity: {quantity}")
+        quantity = count
+        record = self.store.get(name)
+        if record is None:
+            raise ValueError(f"Medicine with name {name} not found.")
+
+        sku = self._sku(record['name'])
+        with sku.lock:
+            now = time.monotonic()
+            sku.expire(now)
+            if record.get('quantity', 0) - sku.reserved() < quantity:
+                raise ValueError(f"Not enough quantity available for medicine {record['name']}.")
+            reservation = Reservation(next(self._ids), record['name'], quantity, now + (ttl if ttl is not None else self.ttl))
+            sku.reservations[reservation.id] = reservation
+        return reservation
+
+    def release(self, reservation: Reservation) -> bool:
+        """Give reserved stock back; returns False if the reservation was no longer held"""
+        sku = self._sku(reservation.name)
+        with sku.lock:
+            return sku.reservations.pop(reservation.id, None) is not None
+
+    def commit(self, reservations: List[Reservation], record_purchase: Optional[Callable[[], bool]] = None,
+               durable: bool = False) -> bool:
+        """
+        Take the reserved stock: decrement the medicines in one write, then record the purchase.
+
+        Returns False, with the stock unchanged, if a reservation lapsed, the
+        stock on disk fell short, the write failed or record_purchase
+        returned False (or raised). The reservations are used up either way.
+        """
+        names = sorted({normalize_key(r.name): r.name for r in reservations}.items())
+        with self.store.locked():
+            changes = self._take(reservations, names)
+            if changes is None:
+                return False
+
+            try:
+                if not self.store.put_many([record for record, _ in changes], durable=durable):
+                    print("Error writing to medicine database.")
+                    self._restore(changes, names, write=False)
+                    return False
+                if record_purchase is not None and not record_purchase():
+                    self._restore(changes, names, write=True)
+                    return False
+            except Exception:
+                self._restore(changes, names, write=True)
+                raise
+            return True
+
+    def _take(self, reservations: List[Reservation], names: List[tuple]) -> Optional[List[tuple]]:
+        """Check and consume the reservations, decrementing the catalog records; returns (record, quantity taken) pairs"""
+        with ExitStack() as stack:
+            # Always locked in name order, so two commits cannot deadlock
+            skus = {key: self._sku(name) for key, name in names}
+            for key, _ in names:
+                stack.enter_context(skus[key].lock)
+
+            now = time.monotonic()
+            totals: Dict[str, int] = {}
+            for reservation in reservations:
+                key = normalize_key(reservation.name)
+                if skus[key].reservations.pop(reservation.id, None) is None or reservation.expires_at <= now:
+                    print(f"Error: Reservation for {reservation.name} expired or was released.")
+                    self._drop(reservations, skus)
+                    return None
+                totals[key] = totals.get(key, 0) + reservation.quantity
+
+            changes = []
+            for key, name in names:
+                record = self.store.get(name)
+                if record is None or record.get('quantity', 0) < totals[key]:
+                    print(f"Error: Not enough quantity available for medicine {name}.")
+                    return None
+                changes.append((record, totals[key]))
+            for record, taken in changes:
+                record['quantity'] = record.get('quantity', 0) - taken
+            return changes
+
+    @staticmethod
+    def _drop(reservations: List[Reservation], skus: Dict[str, _Sku]):
+        for reservation in reservations:
+            skus[normalize_key(reservation.name)].reservations.pop(reservation.id, None)
+
+    def _restore(self, changes: List[tuple], names: List[tuple], write: bool):
+        """Put taken stock back (and write it back if the decrement was already written)"""
+        with ExitStack() as stack:
+            for _, name in names:
+                stack.enter_context(self._sku(name).lock)
+            for record, taken in changes:
+                record['quantity'] = record.get('quantity', 0) + taken
+        if write and not self.store.put_many([record for record, _ in changes]):
+            print("Error writing to medicine database.")
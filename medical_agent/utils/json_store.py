@@ -0,0 +1,822 @@
+import atexit
+import hashlib
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import serializer
+from .models import Record
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Journal size (in bytes) after which it is folded back into the snapshot
+DEFAULT_COMPACT_THRESHOLD = 1024 * 1024
+
+# How long (in seconds) the first writer waits for others to join its flush
+DEFAULT_COMMIT_WINDOW = 0.002
+
+# Stores in write-behind mode, flushed at interpreter exit
+_write_behind_stores = weakref.WeakSet()
+
+
+def normalize_key(value: Any) -> str:
+    """Normalize a lookup key (e.g. an email) for case-insensitive matching"""
+    return str(value).strip().lower() if value is not None else ""
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Return the (mtime_ns, size) pair of a file, or None if it is missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _fsync_directory(path: str):
+    """Make a rename inside the directory durable (no-op where unsupported)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def replace_file(path: str, payload: bytes):
+    """Atomically replace a file: write a temp file, fsync it and rename it over the target"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ConcurrentModificationError(Exception):
+    """Raised when a compare-and-swap write finds the store changed since it was read"""
+
+
+class SecondaryIndex:
+    """
+    Maps the value of a non-unique field (e.g. a name) to the records holding it.
+
+    Entries are kept per primary key, so a record can be re-indexed in O(1)
+    when it changes and several records may share the same value.
+
+    By default a record is indexed under the exact value of its field. A
+    values function can instead return several (already normalized) values
+    per record, e.g. casefolded names and aliases; normalize is then applied
+    to looked-up values so they match.
+    """
+
+    def __init__(self, field: str, values: Optional[Callable[[Dict], Iterable[Any]]] = None,
+                 normalize: Optional[Callable[[Any], Any]] = None):
+        self.field = field
+        self._extract = values
+        self._normalize = normalize
+        self._by_value: Dict[Any, Dict[str, Dict]] = {}
+        self._values: Dict[str, Tuple] = {}
+
+    def clear(self):
+        self._by_value = {}
+        self._values = {}
+
+    def _values_of(self, record: Dict) -> Tuple:
+        if self._extract is None:
+            return (record.get(self.field),)
+        return tuple(dict.fromkeys(self._extract(record)))
+
+    def _entries(self, value: Any) -> Dict[str, Dict]:
+        if self._normalize is not None:
+            value = self._normalize(value)
+        return self._by_value.get(value, {})
+
+    def add(self, key: str, record: Dict):
+        """Index a record under its primary key, replacing its previous entry"""
+        self.remove(key)
+        values = self._values_of(record)
+        for value in values:
+            self._by_value.setdefault(value, {})[key] = record
+        self._values[key] = values
+
+    def remove(self, key: str):
+        """Drop the entry of a primary key, if any"""
+        for value in self._values.pop(key, ()):
+            records = self._by_value.get(value)
+            if records is not None:
+                records.pop(key, None)
+                if not records:
+                    del self._by_value[value]
+
+    def keys(self, value: Any) -> List[str]:
+        """Return the primary keys of the records whose field equals value, in insertion order"""
+        return list(self._entries(value))
+
+    def find(self, value: Any) -> List[Dict]:
+        """Return the records whose field equals value, in insertion order"""
+        return list(self._entries(value).values())
+
+
+class FileLock:
+    """
+    Advisory lock on a ``.lock`` file, exclusive across processes.
+
+    Inside one process the lock is shared: the first thread that acquires it
+    takes the OS lock and the last one to release it gives it back. Threads
+    of the same process are kept apart by the store's own lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mutex = threading.Lock()
+        self._holders = 0
+        self._fd: Optional[int] = None
+
+    def acquire(self):
+        with self._mutex:
+            if self._holders == 0:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    else:
+                        while True:
+                            try:
+                                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                                break
+                            except OSError:
+                                # LK_LOCK gives up after ~10 seconds; keep waiting
+                                continue
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+            self._holders += 1
+
+    def release(self):
+        with self._mutex:
+            self._holders -= 1
+            if self._holders == 0:
+                fd, self._fd = self._fd, None
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    else:
+                        os.lseek(fd, 0, os.SEEK_SET)
+                        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+                finally:
+                    os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _GroupCommit:
+    """
+    Merges snapshot writes that arrive close together into a single flush.
+
+    Each writer submits its serialized snapshot and waits. The first waiter
+    becomes the leader: it sleeps for the commit window, then flushes the
+    latest submitted snapshot, which covers every write submitted so far.
+    """
+
+    def __init__(self, flush, window: float):
+        self._flush = flush
+        self.window = window
+        self._cond = threading.Condition()
+        self._payload: Optional[bytes] = None
+        self._submitted = 0
+        self._flushed = 0
+        self._flushing = False
+        self._last_result = True
+
+    def in_flight(self) -> bool:
+        """Check whether submitted snapshots are still waiting to reach the disk"""
+        with self._cond:
+            return self._flushed < self._submitted
+
+    def submit(self, payload: bytes) -> int:
+        """Queue a snapshot for the next flush and return its ticket"""
+        with self._cond:
+            self._submitted += 1
+            self._payload = payload
+            return self._submitted
+
+    def wait(self, ticket: int) -> bool:
+        """Block until the snapshot with the given ticket is on disk"""
+        with self._cond:
+            while self._flushed < ticket:
+                if not self._flushing:
+                    self._flushing = True
+                    break
+                self._cond.wait()
+            else:
+                return self._last_result
+
+        # This thread is the leader for the next flush
+        covered = 0
+        result = False
+        try:
+            if self.window > 0:
+                time.sleep(self.window)
+            with self._cond:
+                payload, covered = self._payload, self._submitted
+                self._payload = None
+            result = self._flush(payload) if payload is not None else True
+        finally:
+            with self._cond:
+                self._flushed = max(self._flushed, covered)
+                self._last_result = result
+                self._flushing = False
+                self._cond.notify_all()
+        return result
+
+
+class JsonStore:
+    """
+    A process-wide, in-memory view of a JSON file holding a list of records.
+
+    The file is parsed once and served from memory afterwards. It is reloaded
+    only when its mtime/size on disk changes (another process wrote it) or
+    after this process writes it through the store.
+
+    Records returned by read() are shared with the cache, so callers that
+    modify them must persist the change with write() or put().
+
+    When a key field is given, the store also keeps a dictionary index from
+    the normalized key to its record. The index is rebuilt whenever the
+    records are loaded or written, so get() is a constant-time lookup.
+    Fields listed in index_fields get a SecondaryIndex for find(), which
+    returns every record with a given (exact) value; custom SecondaryIndex
+    objects passed in indexes are maintained the same way.
+
+    In journaled mode, put() appends the changed record to a ``.journal``
+    file next to the snapshot instead of rewriting the whole file. The
+    journal is replayed over the snapshot at load time and compacted into a
+    new snapshot by a background thread once it grows past a threshold.
+
+    With a record_type (see models.py), records are held in memory as
+    slotted record objects instead of dicts and converted back to dicts
+    when they are written.
+
+    Records are encoded with the serializer module (orjson or msgspec when
+    installed). With indent=None snapshots are stored compact; use
+    ``python -m medical_agent.utils.serializer`` to pretty-print one.
+
+    Snapshots are written to a temporary file, fsynced and renamed over the
+    old one, so a crash never leaves a truncated database behind. A SHA-256
+    checksum is stored next to the snapshot and checked at load time.
+    Snapshot writes from concurrent callers within the commit window are
+    merged into one flush (group commit).
+
+    Writes hold a ``.lock`` file until they reach the disk, so processes
+    sharing the files never interleave a read-modify-write; wrap such a
+    sequence in locked(). Every change to the cached records bumps
+    ``generation``, which write() can check for compare-and-swap semantics.
+
+    With write_behind (seconds) set, write() and put() only mark the store
+    dirty; every change made within that window goes to disk in one flush,
+    also triggered by flush() (e.g. at the end of an agent turn) and at exit.
+    Pass durable=True to have a change (and all pending ones) on disk before
+    the call returns. Pending changes are visible to this process only, so
+    write-behind is meant for a single process owning the files.
+    """
+
+    def __init__(self, path: str, name: str, key: Optional[str] = None,
+                 indent: Optional[int] = serializer.PRETTY_INDENT, journal: bool = False,
+                 compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+                 commit_window: float = DEFAULT_COMMIT_WINDOW, index_fields: Tuple[str, ...] = (),
+                 record_type: Optional[type] = None, write_behind: float = 0,
+                 indexes: Tuple[SecondaryIndex, ...] = ()):
+        self.path = path
+        self.name = name
+        self.key = key
+        self.indent = indent
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.record_type = record_type
+        self.write_behind = write_behind
+        self._lock = threading.RLock()
+        self._data: Optional[List[Dict]] = None
+        self._signature = None
+        self._index: Dict[str, Dict] = {}
+        self._secondary = {field: SecondaryIndex(field) for field in index_fields}
+        self._secondary.update((index.field, index) for index in indexes)
+        self._compacting = False
+        self._commit = _GroupCommit(self._flush, commit_window)
+        self._file_lock: Optional[FileLock] = None
+        self.generation = 0
+        self._load_failed = False
+        self._verified = False
+        # Write-behind state: changes not on disk yet (a full snapshot, or journal records)
+        self._dirty = False
+        self._pending_snapshot = False
+        self._pending_records: List[Dict] = []
+        self._flush_timer: Optional[threading.Timer] = None
+        if write_behind:
+            _write_behind_stores.add(self)
+
+    @property
+    def journal_path(self) -> str:
+        return self.path + ".journal"
+
+    @property
+    def checksum_path(self) -> str:
+        return self.path + ".sha256"
+
+    @property
+    def file_lock(self) -> FileLock:
+        lock_path = self.path + ".lock"
+        if self._file_lock is None or self._file_lock.path != lock_path:
+            self._file_lock = FileLock(lock_path)
+        return self._file_lock
+
+    @contextmanager
+    def locked(self, key: Any = None):
+        """
+        Hold the store exclusively (across threads and processes) for a read-modify-write.
+
+        The key is accepted for compatibility with ShardedJsonStore; a single
+        file is always locked as a whole.
+        """
+        with self.file_lock:
+            with self._lock:
+                # Pick up whatever other processes wrote before we got the lock
+                self.read()
+                yield self
+
+    def _stat_signature(self):
+        """Return the signatures of the snapshot and (in journaled mode) the journal"""
+        snapshot = _file_signature(self.path)
+        if not self.journal:
+            return snapshot
+        return (snapshot, _file_signature(self.journal_path))
+
+    def _load(self) -> List[Dict]:
+        """Parse the file from disk"""
+        self._load_failed = False
+        if not os.path.exists(self.path):
+            return []
+
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except IOError as e:
+            print(f"Error reading {self.name} database file: {str(e)}")
+            self._load_failed = True
+            return []
+
+        expected = self._read_checksum()
+        if expected and hashlib.sha256(raw).hexdigest() != expected:
+            print(f"Warning: {self.name.capitalize()} database checksum mismatch (file modified outside the store?)")
+
+        try:
+            data = serializer.loads(raw) if raw.strip() else []
+        except serializer.DecodeError as e:
+            print(f"Error parsing {self.name} database JSON: {str(e)}")
+            self._load_failed = True
+            return []
+
+        if not isinstance(data, list):
+            print(f"Error: {self.name} database does not contain a list")
+            self._load_failed = True
+            return []
+        return data
+
+    def _replay_journal(self, data: List[Dict]):
+        """Apply the journaled record changes on top of the loaded snapshot"""
+        if not os.path.exists(self.journal_path):
+            return
+
+        positions = {normalize_key(record.get(self.key)): i for i, record in enumerate(data)}
+        try:
+            with open(self.journal_path, 'r') as f:
+                lines = f.readlines()
+        except IOError as e:
+            print(f"Error reading {self.name} journal: {str(e)}")
+            return
+
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = serializer.loads(line)
+            except serializer.DecodeError:
+                # A torn last line means the process died mid-append; the change never committed
+                if line_number != len(lines):
+                    print(f"Warning: Skipping corrupt {self.name} journal entry at line {line_number}")
+                continue
+
+            if entry.get("op") == "put":
+                key = normalize_key(entry.get("key"))
+                if key in positions:
+                    data[positions[key]] = entry["record"]
+                else:
+                    positions[key] = len(data)
+                    data.append(entry["record"])
+
+    def _from_disk(self, record: Dict) -> Dict:
+        """Turn a stored dict into the store's record type (if it has one)"""
+        if self.record_type is not None and isinstance(record, dict):
+            return self.record_type.from_dict(record)
+        return record
+
+    def _to_disk(self, record: Dict) -> Dict:
+        """Return the plain dict that is stored for a record"""
+        return record.to_dict() if isinstance(record, Record) else record
+
+    def _rebuild_index(self):
+        """Rebuild the key index (and any secondary indexes) from the cached records"""
+        index = {}
+        for secondary in self._secondary.values():
+            secondary.clear()
+        if self.key:
+            for record in self._data or []:
+                value = record.get(self.key)
+                if value is not None:
+                    # Keep the first record for a key, like a linear scan would
+                    key = normalize_key(value)
+                    if key not in index:
+                        index[key] = record
+                        for secondary in self._secondary.values():
+                            secondary.add(key, record)
+        self._index = index
+
+    def is_stale(self) -> bool:
+        """Check whether the file changed on disk since it was last loaded"""
+        return self._data is None or self._stat_signature() != self._signature
+
+    def read(self) -> List[Dict]:
+        """Return the cached records, reloading them if the file changed on disk"""
+        with self._lock:
+            if self._data is not None and (self._dirty or self._commit.in_flight()):
+                # Our own pending writes are newer than anything on disk
+                return self._data
+            signature = self._stat_signature()
+            if self._data is None or signature != self._signature:
+                data = self._load()
+                if self.journal:
+                    self._replay_journal(data)
+                if self.record_type is not None:
+                    data = [self._from_disk(record) for record in data]
+                self._data = data
+                self._signature = signature
+                self._rebuild_index()
+                self.generation += 1
+                # Someone else changed the file, so it has to be validated again
+                self._verified = False
+            return self._data
+
+    def ensure_initialized(self) -> bool:
+        """
+        Make sure the file exists and holds a JSON list, creating or resetting it if not.
+
+        The check runs on first use and again only after the file was modified
+        outside this store; otherwise it costs a single stat.
+        """
+        with self._lock:
+            if self._verified and not self.is_stale():
+                return True
+
+            try:
+                db_dir = os.path.dirname(os.path.abspath(self.path))
+                if not os.path.exists(db_dir):
+                    os.makedirs(db_dir, exist_ok=True)
+
+                if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                    if not self.write(self.read(), durable=True):
+                        return False
+                    print(f"Initialized {self.name} database at {self.path}")
+                else:
+                    self.read()
+                    if self._load_failed:
+                        print(f"Warning: {self.name.capitalize()} database could not be verified, reinitializing")
+                        if not self.write([], durable=True):
+                            return False
+            except Exception as e:
+                print(f"Error initializing {self.name} database: {str(e)}")
+                return False
+
+            self._verified = True
+            return True
+
+    def iter_records(self, start: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """Yield (position, record) pairs from the cached records, starting at a position"""
+        data = self.read()
+        for position in range(start, len(data)):
+            yield position, data[position]
+
+    def read_versioned(self) -> Tuple[List[Dict], int]:
+        """Return the cached records together with their generation, for compare-and-swap"""
+        with self._lock:
+            data = self.read()
+            return data, self.generation
+
+    def get(self, key_value: Any) -> Optional[Dict]:
+        """Look up a record by its key field (case-insensitive)"""
+        with self._lock:
+            self.read()
+            return self._index.get(normalize_key(key_value))
+
+    def contains(self, key_value: Any) -> bool:
+        """Check whether a record with the given key exists"""
+        return self.get(key_value) is not None
+
+    def find(self, field: str, value: Any) -> List[Dict]:
+        """Return every record whose indexed field equals value (see index_fields and indexes)"""
+        with self._lock:
+            self.read()
+            return self._secondary[field].find(value)
+
+    def _read_checksum(self) -> Optional[str]:
+        """Return the checksum recorded for the snapshot, if any"""
+        try:
+            with open(self.checksum_path, 'r') as f:
+                return f.read().strip() or None
+        except IOError:
+            return None
+
+    def _serialize(self, data: List[Dict]) -> bytes:
+        """Encode the records as the on-disk snapshot (compact when indent is None)"""
+        if self.record_type is not None:
+            data = [self._to_disk(record) for record in data]
+        return serializer.dumps(data, indent=self.indent)
+
+    def _replace_file(self, path: str, payload: bytes):
+        """Atomically replace a file: write a temp file, fsync it and rename it over the target"""
+        replace_file(path, payload)
+
+    def _write_snapshot(self, payload: bytes):
+        """Replace the snapshot file and its checksum"""
+        self._replace_file(self.path, payload)
+        self._replace_file(self.checksum_path, hashlib.sha256(payload).hexdigest().encode('ascii'))
+        _fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+
+    def _flush(self, payload: bytes) -> bool:
+        """Write a serialized snapshot to disk (called by the group commit leader)"""
+        try:
+            self._write_snapshot(payload)
+        except Exception as e:
+            print(f"Error writing to {self.name} database: {str(e)}")
+            # The cached copy holds changes that never reached the disk
+            self._data = None
+            self._signature = None
+            return False
+
+        self._signature = self._stat_signature()
+        return True
+
+    def _submit(self, data: List[Dict]) -> Optional[int]:
+        """Make the records the cached copy and queue them for the next flush"""
+        try:
+            payload = self._serialize(data)
+        except (TypeError, ValueError) as e:
+            print(f"Error serializing {self.name} database: {str(e)}")
+            self.invalidate()
+            return None
+
+        self._data = data
+        self._rebuild_index()
+        self.generation += 1
+        return self._commit.submit(payload)
+
+    def _check_generation(self, expected_generation: Optional[int]):
+        """Raise if the store changed since the caller read the given generation"""
+        if expected_generation is None:
+            return
+        self.read()
+        if self.generation != expected_generation:
+            raise ConcurrentModificationError(
+                f"{self.name.capitalize()} database changed since it was read "
+                f"(generation {expected_generation} -> {self.generation})"
+            )
+
+    def write(self, data: List[Dict], expected_generation: Optional[int] = None, durable: bool = False) -> bool:
+        """
+        Write the records to disk and keep them as the cached copy.
+
+        When expected_generation is given, the write only happens if nothing
+        (in this or another process) changed the store since that generation
+        was read; otherwise ConcurrentModificationError is raised. In
+        write-behind mode the write is deferred unless durable is set.
+        """
+        if self.record_type is not None:
+            data = [self._from_disk(record) for record in data]
+        with self.file_lock:
+            with self._lock:
+                self._check_generation(expected_generation)
+                if self.write_behind:
+                    self._data = data
+                    self._rebuild_index()
+                    self.generation += 1
+                    return self._defer(None, durable)
+                if self.journal:
+                    return self._write_journaled_snapshot(data)
+                ticket = self._submit(data)
+            # Wait outside the store lock so other writers can join this flush
+            return ticket is not None and self._commit.wait(ticket)
+
+    def _write_journaled_snapshot(self, data: List[Dict]) -> bool:
+        """Write a full snapshot and empty the journal it now contains"""
+        with self._lock:
+            try:
+                payload = self._serialize(data)
+                self._write_snapshot(payload)
+                open(self.journal_path, 'w').close()
+            except Exception as e:
+                print(f"Error writing to {self.name} database: {str(e)}")
+                # The cached copy may hold changes that never reached the disk
+                self.invalidate()
+                return False
+
+            self._signature = self._stat_signature()
+            self._data = data
+            self._rebuild_index()
+            self.generation += 1
+            return True
+
+    def put(self, record: Dict, expected_generation: Optional[int] = None, durable: bool = False) -> bool:
+        """
+        Insert or replace a single record, matched by the key field.
+
+        In journaled mode only this record is written to disk; otherwise the
+        whole list is rewritten. expected_generation and durable work as in
+        write().
+        """
+        return self.put_many([record], expected_generation, durable)
+
+    def put_many(self, records: List[Dict], expected_generation: Optional[int] = None,
+                 durable: bool = False) -> bool:
+        """Insert or replace several records with a single write (or journal append)"""
+        if self.record_type is not None:
+            records = [self._from_disk(record) for record in records]
+        with self.file_lock:
+            with self._lock:
+                self._check_generation(expected_generation)
+                data = self.read()
+                for record in records:
+                    self._upsert(data, record)
+
+                if self.write_behind:
+                    self.generation += 1
+                    return self._defer(records, durable)
+                if self.journal:
+                    return self._append_journal(records)
+                ticket = self._submit(data)
+            return ticket is not None and self._commit.wait(ticket)
+
+    def _upsert(self, data: List[Dict], record: Dict):
+        """Insert or replace a record in the cached list and its indexes"""
+        key = normalize_key(record.get(self.key))
+        existing = self._index.get(key)
+        if existing is None:
+            data.append(record)
+            self._index[key] = record
+        elif existing is not record:
+            data[next(i for i, r in enumerate(data) if r is existing)] = record
+            self._index[key] = record
+        for secondary in self._secondary.values():
+            secondary.add(key, record)
+
+    def _append_journal(self, records: List[Dict]) -> bool:
+        """Append record changes to the journal with a single fsync"""
+        with self._lock:
+            try:
+                self._write_journal(records)
+            except Exception as e:
+                print(f"Error appending to {self.name} journal: {str(e)}")
+                self.invalidate()
+                return False
+
+            self.generation += 1
+            return True
+
+    def _write_journal(self, records: List[Dict]):
+        """Append journal entries for the records, fsync them and compact the journal once it is large"""
+        payload = b"".join(
+            serializer.dumps({"op": "put", "key": record.get(self.key), "record": self._to_disk(record)}) + b"\n"
+            for record in records
+        )
+        with open(self.journal_path, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._signature = self._stat_signature()
+        journal_signature = self._signature[1]
+        if journal_signature and journal_signature[1] >= self.compact_threshold:
+            self.compact_in_background()
+
+    def _defer(self, records: Optional[List[Dict]], durable: bool) -> bool:
+        """Mark changes (records for the journal, or None for a full snapshot) for the next flush"""
+        if records is None or not self.journal:
+            self._pending_snapshot = True
+            self._pending_records = []
+        elif not self._pending_snapshot:
+            self._pending_records.extend(records)
+        self._dirty = True
+
+        if durable:
+            return self.flush()
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.write_behind, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+        return True
+
+    def flush(self) -> bool:
+        """
+        Write the changes held back by write-behind mode to disk (all of them in one write).
+
+        A clean store returns at once without touching the lock file. If the
+        write fails the changes stay pending, so the next flush retries them.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return True
+
+        try:
+            with self.file_lock:
+                with self._lock:
+                    if not self._dirty:
+                        return True
+
+                    snapshot, records = self._pending_snapshot, self._pending_records
+                    self._dirty, self._pending_snapshot, self._pending_records = False, False, []
+                    try:
+                        if snapshot:
+                            self._write_snapshot(self._serialize(self._data))
+                            if self.journal:
+                                open(self.journal_path, 'w').close()
+                            self._signature = self._stat_signature()
+                        else:
+                            self._write_journal(records)
+                    except Exception as e:
+                        print(f"Error writing to {self.name} database: {str(e)}")
+                        # Keep the changes (already reported as saved) for the next flush
+                        self._dirty, self._pending_snapshot, self._pending_records = True, snapshot, records
+                        return False
+                    return True
+        except OSError as e:
+            print(f"Error locking {self.name} database: {str(e)}")
+            return False
+
+    def compact(self) -> bool:
+        """Fold the journal into a fresh snapshot and truncate it"""
+        try:
+            with self.locked():
+                return self.write(self.read(), durable=True)
+        finally:
+            self._compacting = False
+
+    def compact_in_background(self):
+        """Start a compaction on a background thread unless one is already running"""
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, name=f"{self.name}-journal-compaction", daemon=True).start()
+
+    def invalidate(self):
+        """Drop the cached copy (and any changes not flushed yet) so the next read goes back to the disk"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._dirty, self._pending_snapshot, self._pending_records = False, False, []
+            self._data = None
+            self._signature = None
+            self._index = {}
+            for secondary in self._secondary.values():
+                secondary.clear()
+
+
+def flush_all() -> bool:
+    """Flush every store in write-behind mode; returns False if any flush failed"""
+    return all([store.flush() for store in list(_write_behind_stores)])
+
+
+atexit.register(flush_all)
@@ -1,33 +1,217 @@
-import json
+import functools
 import os
-from typing import List, Dict, Optional, Any, Union
+import threading
+from typing import Callable, Iterator, List, Dict, Optional, Any, Set, Tuple, Union
 import datetime
 
+from .async_utils import make_async
+from .inventory import Inventory, whole_quantity
+from .json_store import JsonStore, SecondaryIndex
+from .models import Medicine, to_plain
+from .text_index import BKTree, BM25Index, PhraseIndex, TrigramIndex, normalize_phrase, texts_digest
+
 # Path to database files
 MEDICINE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "medicines.json")
 
+# Write the medicine catalog as compact JSON instead of indented
+MEDICINE_DB_INDENT = None if os.environ.get("MEDICAL_AGENT_DB_COMPACT", "").strip().lower() in ("1", "true", "yes") else 2
+
+# Hold stock updates back and flush them together, like the patient/doctor stores (0 = write through)
+MEDICINE_DB_WRITE_BEHIND_MS = float(os.environ.get("MEDICAL_AGENT_DB_WRITE_BEHIND_MS", "0"))
+
+# Cache the catalog as slotted Medicine records instead of dicts, like the patient/doctor
+# stores; the tools still return plain dicts
+MEDICINE_RECORD_MODELS = os.environ.get("MEDICAL_AGENT_DB_RECORD_MODELS", "").strip().lower() in ("1", "true", "yes")
+
+# Other names medicines are known by (brand names, international names), keyed by catalog name.
+# A medicine record may list more in an "aliases" field.
+MEDICINE_ALIASES = {
+    "Aspirin": ["ASA"],
+    "Acetaminophen": ["paracetamol", "Tylenol"],
+    "Albuterol": ["salbutamol", "Ventolin", "ProAir"],
+    "Ibuprofen": ["Advil", "Motrin"],
+    "Naproxen": ["Aleve"],
+    "Diphenhydramine": ["Benadryl"],
+    "Cetirizine": ["Zyrtec"],
+    "Loratadine": ["Claritin"],
+    "Omeprazole": ["Prilosec"],
+    "Atorvastatin": ["Lipitor"],
+    "Levothyroxine": ["Synthroid"],
+    "Sertraline": ["Zoloft"],
+    "Metformin": ["Glucophage"],
+    "Lisinopril": ["Zestril", "Prinivil"],
+    "Amoxicillin": ["Amoxil"],
+    "Loperamide": ["Imodium"],
+    "Guaifenesin": ["Mucinex"],
+    "Dextromethorphan": ["Delsym"],
+    "Simethicone": ["Gas-X"],
+    "Meclizine": ["Antivert"],
+    "Amlodipine": ["Norvasc"],
+    "Losartan": ["Cozaar"],
+    "Glipizide": ["Glucotrol"],
+    "Valsartan": ["Diovan"],
+    "Metoprolol": ["Lopressor"],
+    "Montelukast": ["Singulair"],
+    "Ranitidine": ["Zantac"],
+    "Latanoprost": ["Xalatan"],
+    "Fluticasone Nasal Spray": ["Flonase"],
+    "Phenylephrine Nasal Drops": ["Neo-Synephrine"],
+    "Tobramycin Eye Drops": ["Tobrex"],
+    "Timolol Eye Drops": ["Timoptic"],
+    "Olopatadine Eye Drops": ["Pataday", "Patanol"],
+    "Ketotifen Eye Drops": ["Zaditor"],
+    "Prednisolone Eye Drops": ["Pred Forte"],
+    "Azithromycin": ["Zithromax", "Z-Pak"],
+    "Clindamycin": ["Cleocin"],
+    "Penicillin V": ["penicillin VK", "penicillin"],
+}
+
+# Salt forms dropped from generic names, so "metformin" finds "metformin hydrochloride"
+SALT_SUFFIXES = {
+    "hydrochloride", "hydrobromide", "sodium", "potassium", "calcium", "sulfate",
+    "besylate", "tartrate", "fumarate", "acetate", "maleate", "propionate",
+}
+
+def fold_name(name: Any) -> str:
+    """Casefold a medicine name and collapse its whitespace, for case-insensitive lookups"""
+    return " ".join(str(name).split()).casefold() if name is not None else ""
+
+def medicine_lookup_names(medicine: Dict) -> Iterator[str]:
+    """Yield every folded name a medicine can be found by: name, generic name (with and without salt) and aliases"""
+    name = medicine.get('name')
+    yield fold_name(name)
+    
+    generic_name = medicine.get('generic_name')
+    if generic_name:
+        generic_name = fold_name(generic_name)
+        yield generic_name
+        words = generic_name.split()
+        if len(words) > 1 and words[-1] in SALT_SUFFIXES:
+            yield " ".join(words[:-1])
+    
+    for alias in MEDICINE_ALIASES.get(name, []) + list(medicine.get('aliases') or []):
+        yield fold_name(alias)
+
+# Fields ranked by rank_medicines, and how much a word in each counts
+RANK_FIELDS = ('name', 'generic_name', 'symptoms', 'description')
+RANK_FIELD_WEIGHTS = (3.0, 2.0, 1.5, 1.0)
+
+# Most medicines get_medicines_tool returns unless asked for more
+MEDICINE_RESULTS_LIMIT = 10
+
+# Fields of a medicine in each view the tools can return ("full" is the whole record)
+MEDICINE_VIEWS = {
+    "summary": ('name', 'generic_name', 'category', 'prescription_required', 'price', 'quantity'),
+    "stock": ('name', 'quantity', 'price'),
+    "clinical": ('name', 'generic_name', 'category', 'is_antibiotic', 'prescription_required',
+                 'dosage', 'side_effects', 'contraindications', 'symptoms'),
+    "full": None,
+}
+
+# Fields changed without a catalog reload (stock updates), read from the record instead of the precomputed view
+LIVE_FIELDS = ('quantity',)
+
+# Fields tools add to the medicines they return, kept in every view
+RESULT_FIELDS = ('matched_symptoms',)
+
+# Fields of the patient history records in each view; a view a kind does not define falls back to its summary
+HISTORY_VIEWS = {
+    'medications': {
+        "summary": ('name', 'date_prescribed', 'active'),
+        "clinical": ('name', 'prescription_details', 'prescribed_by', 'date_prescribed', 'active'),
+    },
+    'purchased_medicines': {
+        "summary": ('name', 'quantity', 'purchase_date'),
+        "stock": ('name', 'quantity', 'total_cost', 'purchase_date'),
+    },
+    'medicine_inquiries': {
+        "summary": ('name', 'quantity_needed', 'inquiry_date'),
+    },
+}
+
+# Lowest similarity (1 - edit distance / name length) at which a misspelled name is taken as the medicine meant
+FUZZY_MATCH_MIN_SCORE = 0.75
+
+# Groups of symptoms that mean the same thing; asking for any of them finds medicines listing the others
+SYMPTOM_SYNONYMS = [
+    ["fever", "pyrexia", "high temperature", "febrile"],
+    ["high blood pressure", "hypertension"],
+    ["high blood sugar", "hyperglycemia"],
+    ["high cholesterol", "hypercholesterolemia", "elevated LDL"],
+    ["runny nose", "rhinorrhea"],
+    ["stuffy nose", "nasal congestion", "blocked nose"],
+    ["sore throat", "throat pain", "pharyngitis"],
+    ["headache", "head pain", "cephalalgia"],
+    ["heartburn", "acid reflux", "GERD"],
+    ["indigestion", "dyspepsia", "stomach upset", "upset stomach"],
+    ["diarrhea", "diarrhoea", "loose stools"],
+    ["vomiting", "emesis", "throwing up"],
+    ["nausea", "queasiness", "feeling sick"],
+    ["dizziness", "vertigo", "lightheadedness"],
+    ["shortness of breath", "dyspnea", "breathlessness", "breathing difficulty"],
+    ["insomnia", "difficulty sleeping", "sleeplessness"],
+    ["fatigue", "tiredness", "exhaustion"],
+    ["muscle pain", "muscle aches", "myalgia"],
+    ["joint pain", "arthralgia"],
+    ["itchy eyes", "eye itching"],
+    ["pink eye", "conjunctivitis"],
+    ["hypothyroidism", "underactive thyroid"],
+    ["allergies", "allergic reactions"],
+    ["hay fever", "allergic rhinitis", "seasonal allergies"],
+    ["ear infection", "otitis media"],
+    ["swimmer's ear", "otitis externa"],
+    ["glaucoma", "high eye pressure", "ocular hypertension"],
+]
+
+# Normalized symptom -> every symptom of its synonym group
+_SYMPTOM_VARIANTS = {normalize_phrase(symptom): group for group in SYMPTOM_SYNONYMS for symptom in group}
+
+def symptom_synonyms(symptom: str) -> List[str]:
+    """Return the synonyms of a symptom (empty if it has none)"""
+    key = normalize_phrase(symptom)
+    return [other for other in _SYMPTOM_VARIANTS.get(key, []) if normalize_phrase(other) != key]
+
+# Process-wide in-memory catalog, parsed once and reloaded only when the file changes on
+# disk. Besides the key index on the name it keeps an index of every folded name, generic
+# name and alias, which is maintained with the catalog rather than rebuilt per lookup.
+medicine_store = JsonStore(MEDICINE_DB_PATH, "medicine", key="name", indent=MEDICINE_DB_INDENT,
+                           write_behind=MEDICINE_DB_WRITE_BEHIND_MS / 1000,
+                           record_type=Medicine if MEDICINE_RECORD_MODELS else None,
+                           indexes=(SecondaryIndex("lookup_name", values=medicine_lookup_names, normalize=fold_name),))
+
+# Stock reservations and atomic purchase commits against the catalog
+inventory = Inventory(medicine_store)
+
+# Fields matched by search_medicines
+SEARCH_FIELDS = ('name', 'generic_name', 'category', 'description')
+
+# Catalogs at least this large keep their search index on disk next to the catalog
+SEARCH_INDEX_PERSIST_MIN = 1000
+
+# Index name -> (catalog list, its length, index built from it)
+_catalog_indexes: Dict[str, Tuple[List[Dict], int, Any]] = {}
+_catalog_indexes_lock = threading.Lock()
+
 def load_medicines() -> List[Dict]:
     """
-    Load the medicines from the database file.
+    Load the medicines from the in-memory catalog (re-read only when the file changed).
     
     Returns:
         List[Dict]: A list of medicine dictionaries, each containing details about the medicine.
+        The list is shared with the catalog and must not be modified.
     """
     try:
-        if os.path.exists(MEDICINE_DB_PATH):
-            with open(MEDICINE_DB_PATH, 'r') as f:
-                medicines = json.load(f)
-                return medicines
-        else:
-            print(f"Error: Medicine database file not found at {MEDICINE_DB_PATH}")
-            return []
+        medicines = medicine_store.read()
+        if not medicines and not os.path.exists(medicine_store.path):
+            print(f"Error: Medicine database file not found at {medicine_store.path}")
+        return medicines
     except Exception as e:
         print(f"Error loading medicines: {str(e)}")
         return []
 
 def find_medicine_by_name(name: str) -> Optional[Dict]:
     """
-    Get a specific medicine by its name.
+    Get a specific medicine by its name, generic name or a known alias (case-insensitive).
     
     Args:
         name (str): The name of the medicine to retrieve.
@@ -35,11 +219,88 @@ def find_medicine_by_name(name: str) -> Optional[Dict]:
     Returns:
         Optional[Dict]: The medicine details if found, None otherwise.
     """
-    medicines = load_medicines()
+    try:
+        # A catalog name wins over another medicine's generic name or alias
+        medicine = medicine_store.get(name)
+        if medicine is None:
+            matches = medicine_store.find("lookup_name", name)
+            medicine = matches[0] if matches else None
+        return medicine
+    except Exception as e:
+        print(f"Error loading medicines: {str(e)}")
+        return None
+
+def _build_name_index(medicines: List[Dict]) -> Tuple[BKTree, Dict[str, List[str]]]:
+    """Build a BK-tree of every folded name the catalog medicines are known by, and which medicines each names"""
+    owners: Dict[str, List[str]] = {}
     for medicine in medicines:
-        if medicine.get('name').lower() == name.lower():
-            return medicine
-    return None
+        for lookup_name in medicine_lookup_names(medicine):
+            if lookup_name:
+                names = owners.setdefault(lookup_name, [])
+                if medicine.get('name') not in names:
+                    names.append(medicine.get('name'))
+    return BKTree(owners), owners
+
+def suggest_medicine_names(name: str, limit: int = 3) -> List[Dict]:
+    """
+    Find the catalog medicines whose name, generic name or alias is closest to a (misspelled) name.
+    
+    Args:
+        name (str): The name as given, e.g. "ibuprofin" or "amoxicilin".
+        limit (int): The most suggestions to return.
+        
+    Returns:
+        List[Dict]: Up to limit suggestions, best first, each with the catalog 'name', the
+        name it 'matched' and a similarity 'score' between 0 and 1.
+    """
+    query = fold_name(name)
+    if not query:
+        return []
+    tree, owners = _catalog_index("names", load_medicines(), _build_name_index)
+    
+    # Roughly one typo per four letters, at most three
+    max_distance = min(3, max(1, len(query) // 4))
+    suggestions = []
+    seen = set()
+    for distance, lookup_name in tree.search(query, max_distance):
+        score = round(1 - distance / max(len(query), len(lookup_name)), 2)
+        for medicine_name in owners[lookup_name]:
+            if medicine_name not in seen:
+                seen.add(medicine_name)
+                suggestions.append({'name': medicine_name, 'matched': lookup_name, 'score': score})
+    
+    suggestions.sort(key=lambda suggestion: -suggestion['score'])
+    return suggestions[:limit]
+
+def resolve_medicine(name: str) -> Tuple[Optional[Dict], List[Dict]]:
+    """
+    Find a medicine by name, tolerating misspellings.
+    
+    Args:
+        name (str): The name of the medicine, as given.
+        
+    Returns:
+        Tuple[Optional[Dict], List[Dict]]: The medicine (None if the name is unknown or too
+        ambiguous to pick one) and the suggestions from suggest_medicine_names (empty on an
+        exact match).
+    """
+    medicine = find_medicine_by_name(name)
+    if medicine is not None:
+        return medicine, []
+    
+    suggestions = suggest_medicine_names(name)
+    if suggestions and suggestions[0]['score'] >= FUZZY_MATCH_MIN_SCORE:
+        # Only take the best match when no other medicine is as close
+        if len(suggestions) == 1 or suggestions[1]['score'] < suggestions[0]['score']:
+            return find_medicine_by_name(suggestions[0]['name']), suggestions
+    return None, suggestions
+
+def _unknown_medicine_message(name: str, suggestions: List[Dict]) -> str:
+    """Describe an unknown medicine name, listing the closest names"""
+    message = f"Medicine '{name}' not found."
+    if suggestions:
+        message += " Did you mean: " + ", ".join(f"{s['name']} (score {s['score']})" for s in suggestions) + "?"
+    return message
 
 def get_medicine_by_name(name: str) -> Optional[Dict]:
     """
@@ -53,6 +314,41 @@ def get_medicine_by_name(name: str) -> Optional[Dict]:
     """
     return find_medicine_by_name(name)
 
+def _catalog_index(name: str, medicines: List[Dict], build: Callable[[List[Dict]], Any]) -> Any:
+    """
+    Return an index of the catalog, built by build(medicines) and cached until the catalog
+    is reloaded or grows (stock updates do not touch the indexed fields).
+    """
+    with _catalog_indexes_lock:
+        cached = _catalog_indexes.get(name)
+        if cached is not None and cached[0] is medicines and cached[1] == len(medicines):
+            return cached[2]
+        
+        index = build(medicines)
+        _catalog_indexes[name] = (medicines, len(medicines), index)
+        return index
+
+def _build_search_index(medicines: List[Dict]) -> Tuple[List[Tuple[str, ...]], TrigramIndex]:
+    """
+    Build the lowercased search texts and the trigram index of the catalog.
+    
+    Large catalogs load a saved index whose text digest matches instead of rebuilding it.
+    """
+    texts = [tuple((medicine.get(field) or '').lower() for field in SEARCH_FIELDS) for medicine in medicines]
+    digest = texts_digest(texts)
+    index_path = medicine_store.path + ".search-index"
+    persist = len(medicines) >= SEARCH_INDEX_PERSIST_MIN
+    
+    index = TrigramIndex.load(index_path, digest) if persist else None
+    if index is None:
+        index = TrigramIndex.build(texts, digest)
+        if persist:
+            try:
+                index.save(index_path)
+            except Exception as e:
+                print(f"Warning: Could not save medicine search index: {str(e)}")
+    return texts, index
+
 def search_medicines(query: str) -> List[Dict]:
     """
     Search for medicines by name, category, or description.
@@ -64,18 +360,128 @@ def search_medicines(query: str) -> List[Dict]:
         List[Dict]: A list of matching medicines.
     """
     medicines = load_medicines()
-    results = []
+    texts, index = _catalog_index("search", medicines, _build_search_index)
     query = query.lower()
     
+    # Only medicines holding every trigram of the query can contain it; short queries scan
+    positions = index.candidates(query)
+    if positions is None:
+        positions = range(len(medicines))
+    
+    return [medicines[i] for i in positions if any(query in text for text in texts[i])]
+
+def _build_rank_index(medicines: List[Dict]) -> BM25Index:
+    """Build the BM25 index of the catalog over RANK_FIELDS"""
+    records = []
     for medicine in medicines:
-        if (query in medicine.get('name', '').lower() or 
-            query in medicine.get('generic_name', '').lower() or
-            query in medicine.get('category', '').lower() or
-            query in medicine.get('description', '').lower()):
-            results.append(medicine)
+        fields = []
+        for field in RANK_FIELDS:
+            value = medicine.get(field) or ''
+            fields.append(" ".join(v for v in value if isinstance(v, str)) if isinstance(value, list) else str(value))
+        records.append(fields)
+    return BM25Index.build(records, RANK_FIELD_WEIGHTS)
+
+def rank_medicines(query: str, limit: Optional[int] = MEDICINE_RESULTS_LIMIT) -> List[Dict]:
+    """
+    Search for medicines, most relevant first.
+    
+    Medicines are scored with BM25 over name, generic name, symptoms and description
+    (ties keep catalog order). Medicines that only contain the query as a substring, as
+    search_medicines finds them (e.g. "amox"), follow in catalog order.
+    
+    Args:
+        query (str): The search query.
+        limit (Optional[int]): The most medicines to return (None for all matches).
+        
+    Returns:
+        List[Dict]: The matching medicines, best first.
+    """
+    medicines = load_medicines()
+    index = _catalog_index("rank", medicines, _build_rank_index)
+    ranked = [medicines[position] for _, position in index.search(query, limit)]
+    
+    if limit is None or len(ranked) < limit:
+        seen = {id(medicine) for medicine in ranked}
+        for medicine in search_medicines(query):
+            if limit is not None and len(ranked) >= limit:
+                break
+            if id(medicine) not in seen:
+                ranked.append(medicine)
+    return ranked
+
+def _project(record: Dict, fields: Tuple[str, ...]) -> Dict:
+    """Copy the given fields of a record (those it has)"""
+    return {field: record[field] for field in fields if field in record}
+
+def _build_views(medicines: List[Dict]) -> Tuple[Dict[int, int], Dict[str, List[Dict]]]:
+    """Precompute every view of each catalog medicine (without LIVE_FIELDS), and where each medicine sits"""
+    positions = {id(medicine): position for position, medicine in enumerate(medicines)}
+    views = {}
+    for view, fields in MEDICINE_VIEWS.items():
+        if fields is not None:
+            static = tuple(field for field in fields if field not in LIVE_FIELDS)
+            views[view] = [_project(medicine, static) for medicine in medicines]
+    return positions, views
+
+def project_medicines(medicines: List[Dict], view: str = "summary") -> List[Dict]:
+    """
+    Return the given view of medicines, to keep tool results small.
     
+    Args:
+        medicines (List[Dict]): Medicines from the catalog (or copies of them).
+        view (str): One of MEDICINE_VIEWS: "summary", "stock", "clinical" or "full".
+        
+    Returns:
+        List[Dict]: The medicines with only the fields of the view (plus RESULT_FIELDS).
+        
+    Raises:
+        ValueError: If the view is unknown.
+    """
+    if view not in MEDICINE_VIEWS:
+        raise ValueError(f"Unknown view '{view}'. Use one of: {', '.join(MEDICINE_VIEWS)}")
+    fields = MEDICINE_VIEWS[view]
+    if fields is None:
+        return medicines
+    
+    positions, views = _catalog_index("views", load_medicines(), _build_views)
+    precomputed = views[view]
+    live = [field for field in fields if field in LIVE_FIELDS]
+    results = []
+    for medicine in medicines:
+        position = positions.get(id(medicine))
+        if position is None:
+            # Not a catalog record (e.g. a ranked copy): project it directly
+            result = _project(medicine, fields)
+        else:
+            result = dict(precomputed[position])
+            result.update(_project(medicine, live))
+        result.update(_project(medicine, RESULT_FIELDS))
+        results.append(result)
     return results
 
+def project_history(kind: str, records: List[Dict], view: str = "full") -> List[Dict]:
+    """
+    Return the given view of a patient's history records.
+    
+    Args:
+        kind (str): The history list: 'medications', 'purchased_medicines' or 'medicine_inquiries'.
+        records (List[Dict]): The records of that list.
+        view (str): One of MEDICINE_VIEWS; views the kind does not define give its summary.
+        
+    Returns:
+        List[Dict]: The records with only the fields of the view.
+        
+    Raises:
+        ValueError: If the view is unknown.
+    """
+    if view not in MEDICINE_VIEWS:
+        raise ValueError(f"Unknown view '{view}'. Use one of: {', '.join(MEDICINE_VIEWS)}")
+    if view == "full":
+        return records
+    views = HISTORY_VIEWS[kind]
+    fields = views.get(view, views["summary"])
+    return [_project(record, fields) for record in records]
+
 def get_medicines_by_category(category: str) -> List[Dict]:
     """
     Get all medicines in a specific category.
@@ -102,7 +508,7 @@ def add_patient_medication(patient_email: str, medication_name: str, prescriptio
     Returns:
         bool: True if the medication was successfully added, False otherwise.
     """
-    from .database_utils import read_patient_db, write_patient_db
+    from .database_utils import add_patient_record
     
     try:
         # Get the medicine details
@@ -111,41 +517,19 @@ def add_patient_medication(patient_email: str, medication_name: str, prescriptio
             print(f"Error: Medicine with name {medication_name} not found.")
             return False
         
-        # Get all patients
-        patients = read_patient_db()
-        patient_found = False
-        
-        # Find the patient and add the medication
-        for i, patient in enumerate(patients):
-            if patient.get('email') == patient_email:
-                patient_found = True
-                
-                # Check if the patient already has a medications list
-                if 'medications' not in patient:
-                    patients[i]['medications'] = []
-                
-                # Add the new medication
-                patients[i]['medications'].append({
-                    'name': medicine.get('name'),
-                    'prescription_details': prescription_details,
-                    'prescribed_by': prescribed_by,
-                    'date_prescribed': datetime.datetime.now().strftime("%Y-%m-%d"),
-                    'category': medicine.get('category'),
-                    'active': True
-                })
-                
-                # Save the updated patient data
-                if write_patient_db(patients):
-                    return True
-                else:
-                    print("Error writing to patient database.")
-                    return False
-        
-        if not patient_found:
-            print(f"Error: Patient with email {patient_email} not found.")
+        # Add the new medication to the patient's record
+        if add_patient_record(patient_email, 'medications', {
+            'name': medicine.get('name'),
+            'prescription_details': prescription_details,
+            'prescribed_by': prescribed_by,
+            'date_prescribed': datetime.datetime.now().strftime("%Y-%m-%d"),
+            'category': medicine.get('category'),
+            'active': True
+        }):
+            return True
+        else:
+            print("Error writing to patient database.")
             return False
-        
-        return False
     except Exception as e:
         print(f"Error adding medication to patient: {str(e)}")
         return False
@@ -185,41 +569,24 @@ def update_patient_medication_status(patient_email: str, medication_name: str, a
     Returns:
         bool: True if the medication status was successfully updated, False otherwise.
     """
-    from .database_utils import read_patient_db, write_patient_db
+    from .database_utils import get_patient_by_email, update_patient_record
     
     try:
-        # Get all patients
-        patients = read_patient_db()
-        patient_found = False
-        medication_found = False
-        
-        # Find the patient and update the medication status
-        for i, patient in enumerate(patients):
-            if patient.get('email') == patient_email:
-                patient_found = True
-                
-                if 'medications' in patient:
-                    for j, medication in enumerate(patient['medications']):
-                        if medication.get('name') == medication_name:
-                            medication_found = True
-                            patients[i]['medications'][j]['active'] = active
-                            
-                            # Save the updated patient data
-                            if write_patient_db(patients):
-                                return True
-                            else:
-                                print("Error writing to patient database.")
-                                return False
-                
-                if not medication_found:
-                    print(f"Error: Medication with name {medication_name} not found for patient {patient_email}.")
-                    return False
-        
-        if not patient_found:
+        patient = get_patient_by_email(patient_email)
+        if not patient:
             print(f"Error: Patient with email {patient_email} not found.")
             return False
         
-        return False
+        if not any(medication.get('name') == medication_name for medication in patient.get('medications', [])):
+            print(f"Error: Medication with name {medication_name} not found for patient {patient_email}.")
+            return False
+        
+        # Save the updated medication status
+        if update_patient_record(patient_email, 'medications', medication_name, {'active': active}):
+            return True
+        else:
+            print("Error writing to patient database.")
+            return False
     except Exception as e:
         print(f"Error updating medication status: {str(e)}")
         return False
@@ -236,40 +603,46 @@ def update_medicine_quantity(medicine_name: str, quantity_change: int) -> bool:
         bool: True if the update was successful, False otherwise.
     """
     try:
-        medicines = load_medicines()
-        updated = False
-        
-        for i, medicine in enumerate(medicines):
-            if medicine.get('name') == medicine_name:
-                current_quantity = medicine.get('quantity', 0)
-                new_quantity = current_quantity + quantity_change
-                
-                # Prevent negative quantity
-                if new_quantity < 0:
-                    print(f"Error: Cannot reduce quantity below zero for medicine {medicine_name}")
-                    return False
-                    
-                medicines[i]['quantity'] = new_quantity
-                updated = True
-                break
-                
-        if not updated:
-            print(f"Error: Medicine with name {medicine_name} not found.")
-            return False
+        # Held across threads (async tools run on a thread pool) and processes
+        with medicine_store.locked():
+            medicine = find_medicine_by_name(medicine_name)
+            if not medicine:
+                print(f"Error: Medicine with name {medicine_name} not found.")
+                return False
             
-        # Save the updated medicines data
-        try:
-            with open(MEDICINE_DB_PATH, 'w') as f:
-                json.dump(medicines, f, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error writing to medicine database: {str(e)}")
-            return False
+            current_quantity = medicine.get('quantity', 0)
+            new_quantity = current_quantity + quantity_change
+            
+            # Prevent negative quantity, and taking stock already reserved for purchases
+            if new_quantity < 0:
+                print(f"Error: Cannot reduce quantity below zero for medicine {medicine_name}")
+                return False
+            if quantity_change < 0 and new_quantity < inventory.reserved(medicine['name']):
+                print(f"Error: Cannot reduce quantity below the reserved stock of medicine {medicine_name}")
+                return False
             
+            # Save the updated medicine; the store replaces the file atomically so
+            # concurrent readers never see a partially written file
+            medicine['quantity'] = new_quantity
+            if not medicine_store.put(medicine):
+                print("Error writing to medicine database.")
+                return False
+            return True
     except Exception as e:
         print(f"Error updating medicine quantity: {str(e)}")
         return False
 
+def _purchase_record(medicine: Dict, quantity: int) -> Dict:
+    """Build the purchase record saved with the patient"""
+    return {
+        'name': medicine.get('name'),
+        'quantity': quantity,
+        'price_per_unit': medicine.get('price', 0),
+        'total_cost': quantity * medicine.get('price', 0),
+        'purchase_date': datetime.datetime.now().strftime("%Y-%m-%d"),
+        'category': medicine.get('category')
+    }
+
 def purchase_medicine(patient_email: str, medicine_name: str, quantity: int) -> bool:
     """
     Process a medicine purchase for a patient.
@@ -282,72 +655,129 @@ def purchase_medicine(patient_email: str, medicine_name: str, quantity: int) ->
     Returns:
         bool: True if the purchase was successful, False otherwise.
     """
-    from .database_utils import read_patient_db, write_patient_db, get_patient_by_email
+    from .database_utils import get_patient_by_email, add_patient_record
     
     try:
-        # Check if medicine exists and has enough quantity
         medicine = find_medicine_by_name(medicine_name)
         if not medicine:
             print(f"Error: Medicine with name {medicine_name} not found.")
             return False
             
-        if medicine.get('quantity', 0) < quantity:
-            print(f"Error: Not enough quantity available for medicine {medicine.get('name')}.")
-            return False
-            
-        # Update medicine quantity
-        if not update_medicine_quantity(medicine_name, -quantity):
-            return False
-            
         # Get the patient
         patient = get_patient_by_email(patient_email)
         if not patient:
             print(f"Error: Patient with email {patient_email} not found.")
             return False
-            
-        # Update patient record
-        patients = read_patient_db()
-        updated = False
-        
-        for i, p in enumerate(patients):
-            if p.get('email') == patient_email:
-                # Initialize purchased_medicines list if it doesn't exist
-                if 'purchased_medicines' not in p:
-                    patients[i]['purchased_medicines'] = []
-                    
-                # Add the new purchase
-                purchase_record = {
-                    'name': medicine.get('name'),
-                    'quantity': quantity,
-                    'price_per_unit': medicine.get('price', 0),
-                    'total_cost': quantity * medicine.get('price', 0),
-                    'purchase_date': datetime.datetime.now().strftime("%Y-%m-%d"),
-                    'category': medicine.get('category')
-                }
-                
-                patients[i]['purchased_medicines'].append(purchase_record)
-                updated = True
-                break
-                
-        if not updated:
-            print(f"Error: Could not update patient record for {patient_email}.")
-            # Rollback medicine quantity change
-            update_medicine_quantity(medicine_name, quantity)
+        
+        # Hold the stock (by catalog name, the one asked for may be an alias)
+        try:
+            reservation = inventory.reserve(medicine['name'], quantity)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
             return False
             
-        # Save the updated patient data
-        if write_patient_db(patients):
-            return True
-        else:
+        # Add the new purchase (with the quantity as reserved, e.g. 2 for 2.0)
+        purchase_record = _purchase_record(medicine, reservation.quantity)
+            
+        def record_purchase() -> bool:
+            if add_patient_record(patient_email, 'purchased_medicines', purchase_record):
+                return True
             print("Error writing to patient database.")
-            # Rollback medicine quantity change
-            update_medicine_quantity(medicine_name, quantity)
             return False
+        
+        # Take the stock and save the purchase together; the stock is put back if the
+        # purchase cannot be saved
+        return inventory.commit([reservation], record_purchase)
             
     except Exception as e:
         print(f"Error processing medicine purchase: {str(e)}")
         return False
 
+def purchase_medicines(patient_email: str, items: List[Dict]) -> Dict:
+    """
+    Process a purchase of several medicines for a patient, all or nothing.
+    
+    Every item is checked (and the stock of every valid item reserved) before anything is
+    bought, so one call reports all the problems of a cart; the stock of all items is then
+    taken in one catalog write, together with one write of all the purchase records.
+    
+    Args:
+        patient_email (str): The email of the patient making the purchase.
+        items (List[Dict]): The medicines to buy, each with a 'name' and a 'quantity'
+            (a whole number; 2.0 counts as 2). The same medicine listed twice is bought
+            once, with the quantities added up.
+        
+    Returns:
+        Dict: The receipt. 'success' tells whether the purchase went through. On success
+        it lists the purchase records in 'items', with 'total_quantity', 'total_cost' and
+        'purchase_date'; otherwise 'errors' lists every problem found (unknown medicines,
+        short stock, ...) and nothing was bought.
+    """
+    from .database_utils import get_patient_by_email, add_patient_records
+    
+    errors = []
+    cart: Dict[str, Tuple[Dict, int]] = {}
+    
+    if not isinstance(items, list) or not items:
+        return {'success': False, 'errors': ["No items to purchase."]}
+    
+    for item in items:
+        name = item.get('name') if isinstance(item, dict) else None
+        quantity = item.get('quantity') if isinstance(item, dict) else None
+        if not isinstance(name, str) or not name.strip():
+            errors.append(f"Invalid item {item!r}: a medicine name is required.")
+            continue
+        count = whole_quantity(quantity)
+        if count is None:
+            errors.append(f"Invalid quantity for {name}: {quantity!r}.")
+            continue
+        medicine = find_medicine_by_name(name)
+        if not medicine:
+            errors.append(f"Medicine with name {name} not found.")
+            continue
+        _, held = cart.get(medicine['name'], (medicine, 0))
+        cart[medicine['name']] = (medicine, held + count)
+    
+    try:
+        if not get_patient_by_email(patient_email):
+            errors.append(f"Patient with email {patient_email} not found.")
+        
+        # Hold the stock of every valid item first, so a short item fails the cart before anything
+        # is taken (and is reported along with any invalid ones)
+        reservations = []
+        for medicine, quantity in cart.values():
+            try:
+                reservations.append(inventory.reserve(medicine['name'], quantity))
+            except ValueError as e:
+                errors.append(str(e))
+        if errors:
+            for reservation in reservations:
+                inventory.release(reservation)
+            return {'success': False, 'errors': errors}
+        
+        records = [_purchase_record(medicine, quantity) for medicine, quantity in cart.values()]
+        
+        def record_purchase() -> bool:
+            if add_patient_records(patient_email, 'purchased_medicines', records):
+                return True
+            print("Error writing to patient database.")
+            return False
+        
+        if not inventory.commit(reservations, record_purchase):
+            return {'success': False, 'errors': ["The purchase could not be completed; nothing was bought."]}
+        
+        return {
+            'success': True,
+            'patient_email': patient_email,
+            'items': records,
+            'total_quantity': sum(record['quantity'] for record in records),
+            'total_cost': round(sum(record['total_cost'] for record in records), 2),
+            'purchase_date': records[0]['purchase_date'],
+        }
+    except Exception as e:
+        print(f"Error processing medicine purchase: {str(e)}")
+        return {'success': False, 'errors': [f"Error processing medicine purchase: {str(e)}"]}
+
 def get_medicine_quantity(medicine_name: str) -> int:
     """
     Get the current quantity of a medicine.
@@ -397,16 +827,47 @@ def get_medicines_by_symptom(symptom: str) -> List[Dict]:
         List[Dict]: A list of medicines that address the specified symptom.
     """
     medicines = load_medicines()
-    results = []
-    symptom_lower = symptom.lower().strip()
+    positions = _symptom_matches(medicines, symptom)
+    return [medicines[i] for i in sorted(positions)]
+
+def _symptom_matches(medicines: List[Dict], symptom: str) -> Set[int]:
+    """Return the catalog positions of the medicines that address a symptom or one of its synonyms"""
+    index = _catalog_index("symptoms", medicines,
+                           lambda medicines: PhraseIndex.build([medicine.get("symptoms") or [] for medicine in medicines]))
+    # The symptom matches any listed symptom containing it, also inside a word ("ache" finds
+    # "headache"), or its words ("pain" finds "back pain"); a synonym only the same symptom
+    # ("pyrexia" finds "fever" but not "hay fever")
+    positions = index.lookup(symptom) | index.lookup_substring(symptom)
+    for synonym in symptom_synonyms(symptom):
+        positions |= index.lookup(synonym, exact=True)
+    return positions
+
+def get_medicines_by_symptoms(symptoms: List[str]) -> List[Dict]:
+    """
+    Get the medicines that address any of several symptoms, best matches first.
     
-    for medicine in medicines:
-        if "symptoms" in medicine:
-            # Check if symptom is in the symptoms list
-            if any(symptom_lower in s.lower() for s in medicine.get("symptoms", [])):
-                results.append(medicine)
+    Args:
+        symptoms (List[str]): The symptoms the patient reports (a single string counts
+            as one symptom).
+        
+    Returns:
+        List[Dict]: The matching medicines, ranked by how many of the symptoms each one
+        addresses (catalog order among equals). Each medicine carries the symptoms it
+        matched in 'matched_symptoms'.
+    """
+    # Models often send a bare string for a list parameter; it must not be split into letters
+    if isinstance(symptoms, str):
+        symptoms = [symptoms]
     
-    return results
+    medicines = load_medicines()
+    matched: Dict[int, List[str]] = {}
+    
+    for symptom in dict.fromkeys(s for s in symptoms if isinstance(s, str) and s.strip()):
+        for position in _symptom_matches(medicines, symptom):
+            matched.setdefault(position, []).append(symptom)
+    
+    ranked = sorted(matched, key=lambda position: (-len(matched[position]), position))
+    return [dict(medicines[position], matched_symptoms=matched[position]) for position in ranked]
 
 def record_medicine_inquiry(patient_email: str, medicine_name: str, quantity_needed: int) -> bool:
     """
@@ -421,7 +882,7 @@ def record_medicine_inquiry(patient_email: str, medicine_name: str, quantity_nee
     Returns:
         bool: True if the inquiry was successfully recorded, False otherwise.
     """
-    from .database_utils import read_patient_db, write_patient_db, get_patient_by_email
+    from .database_utils import get_patient_by_email, add_patient_record, update_patient_record
     
     try:
         # Check if medicine exists
@@ -436,44 +897,28 @@ def record_medicine_inquiry(patient_email: str, medicine_name: str, quantity_nee
             print(f"Error: Patient with email {patient_email} not found.")
             return False
             
-        # Update patient record
-        patients = read_patient_db()
-        updated = False
-        
-        for i, p in enumerate(patients):
-            if p.get('email') == patient_email:
-                # Initialize medicine_inquiries list if it doesn't exist
-                if 'medicine_inquiries' not in p:
-                    patients[i]['medicine_inquiries'] = []
-                    
-                # Check if patient already has an inquiry for this medicine
-                inquiry_found = False
-                for j, inquiry in enumerate(patients[i].get('medicine_inquiries', [])):
-                    if inquiry.get('name') == medicine_name:
-                        inquiry_found = True
-                        patients[i]['medicine_inquiries'][j]['quantity_needed'] = quantity_needed
-                        patients[i]['medicine_inquiries'][j]['last_inquiry_date'] = datetime.datetime.now().strftime("%Y-%m-%d")
-                        break
-                        
-                # If medicine not found, add it to the list
-                if not inquiry_found:
-                    patients[i]['medicine_inquiries'].append({
-                        'name': medicine.get('name'),
-                        'quantity_needed': quantity_needed,
-                        'inquiry_date': datetime.datetime.now().strftime("%Y-%m-%d"),
-                        'last_inquiry_date': datetime.datetime.now().strftime("%Y-%m-%d"),
-                        'category': medicine.get('category')
-                    })
-                
-                updated = True
-                break
-                
-        if not updated:
-            print(f"Error: Could not update patient record for {patient_email}.")
-            return False
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        
+        # Check if patient already has an inquiry for this medicine (recorded under its catalog name)
+        inquiry_found = any(inquiry.get('name') == medicine['name'] for inquiry in patient.get('medicine_inquiries', []))
+        
+        if inquiry_found:
+            saved = update_patient_record(patient_email, 'medicine_inquiries', medicine['name'], {
+                'quantity_needed': quantity_needed,
+                'last_inquiry_date': today
+            })
+        else:
+            # If medicine not found, add it to the list
+            saved = add_patient_record(patient_email, 'medicine_inquiries', {
+                'name': medicine.get('name'),
+                'quantity_needed': quantity_needed,
+                'inquiry_date': today,
+                'last_inquiry_date': today,
+                'category': medicine.get('category')
+            })
             
         # Save the updated patient data
-        if write_patient_db(patients):
+        if saved:
             return True
         else:
             print("Error writing to patient database.")
@@ -572,29 +1017,50 @@ def get_medications_counter(patient_email: str) -> Dict:
             "recent_inquiries": []
         }
 
+def _plain_result(func):
+    """Hand catalog records out of a tool as dict copies when the catalog holds Medicine records"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if MEDICINE_RECORD_MODELS:
+            return to_plain(func(*args, **kwargs))
+        return func(*args, **kwargs)
+    return wrapper
+
 class MedicineTool:
     """
     A class to handle medicine-related operations.
     """
     
     @staticmethod
-    def get_medicines_tool(*, category: str = "", search_query: str = ""):
+    @_plain_result
+    def get_medicines_tool(*, category: str = "", search_query: str = "", limit: int = MEDICINE_RESULTS_LIMIT,
+                           view: str = "summary"):
         """
         Get medicines based on category or search query.
         
         Args:
             category (str): The category to filter by. Defaults to empty string.
-            search_query (str): The search query to filter by. Defaults to empty string.
+            search_query (str): The search query to filter by, results are ranked by relevance.
+                Defaults to empty string.
+            limit (int): The most medicines to return. Defaults to 10; 0 returns all of them.
+            view (str): The fields to return: "summary" (name, category, prescription, price,
+                quantity), "stock" (name, quantity, price), "clinical" (dosage, side effects,
+                contraindications, symptoms) or "full". Defaults to "summary".
             
         Returns:
             List[Dict]: A list of medicines matching the criteria.
         """
+        limit = limit if limit and limit > 0 else None
         if category and category.strip():
-            return get_medicines_by_category(category)
+            medicines = get_medicines_by_category(category)[:limit]
         elif search_query and search_query.strip():
-            return search_medicines(search_query)
+            medicines = rank_medicines(search_query, limit)
         else:
-            return load_medicines()
+            medicines = load_medicines()[:limit]
+        try:
+            return project_medicines(medicines, view)
+        except ValueError as e:
+            return f"Error: {str(e)}"
     
     @staticmethod
     def prescribe_medication_tool(patient_email: str, medication_name: str, prescription_details: str, doctor_name: str):
@@ -610,13 +1076,13 @@ class MedicineTool:
         Returns:
             str: A message indicating the result of the prescription.
         """
-        medicine = get_medicine_by_name(medication_name)
+        medicine, suggestions = resolve_medicine(medication_name)
         if not medicine:
-            return f"Error: Medication '{medication_name}' not found."
+            return "Error: " + _unknown_medicine_message(medication_name, suggestions)
         
         success = add_patient_medication(
             patient_email=patient_email,
-            medication_name=medication_name,
+            medication_name=medicine['name'],
             prescription_details=prescription_details,
             prescribed_by=doctor_name
         )
@@ -627,17 +1093,22 @@ class MedicineTool:
             return f"Failed to prescribe medication. Please check patient email and try again."
     
     @staticmethod
-    def get_patient_medications_tool(patient_email: str):
+    def get_patient_medications_tool(patient_email: str, view: str = "full"):
         """
         Get all medications for a specific patient.
         
         Args:
             patient_email (str): The email of the patient.
+            view (str): "summary" (name, date, active), "clinical" (with prescription details)
+                or "full". Defaults to "full".
             
         Returns:
             List[Dict]: A list of medications prescribed to the patient.
         """
-        return get_patient_medications(patient_email)
+        try:
+            return project_history('medications', get_patient_medications(patient_email), view)
+        except ValueError as e:
+            return f"Error: {str(e)}"
     
     @staticmethod
     def update_medication_status_tool(patient_email: str, medication_name: str, active: bool):
@@ -676,22 +1147,73 @@ class MedicineTool:
             quantity (int): The quantity to purchase.
             
         Returns:
-            bool: True if the purchase was successful, False otherwise.
+            bool: True if the purchase was successful, False otherwise. An unknown medicine
+            name gives an error message with the closest medicine names instead.
+        """
+        medicine, suggestions = resolve_medicine(medicine_name)
+        if not medicine:
+            return "Error: " + _unknown_medicine_message(medicine_name, suggestions)
+        return purchase_medicine(patient_email, medicine['name'], quantity)
+    
+    @staticmethod
+    def purchase_medicines_tool(patient_email: str, names: List[str], quantities: List[int]):
+        """
+        Purchase several medicines for a patient in one go, all or nothing.
+        
+        Args:
+            patient_email (str): The email of the patient making the purchase.
+            names (List[str]): The names of the medicines to buy, e.g. ["Aspirin", "Ibuprofen"].
+            quantities (List[int]): The quantity of each medicine, in the same order as names,
+                e.g. [2, 1].
+            
+        Returns:
+            Dict: One receipt for the whole purchase: 'success', the purchased 'items',
+            'total_quantity' and 'total_cost'; or, when nothing was bought, 'errors' listing every
+            problem of the cart at once (unknown medicines with the closest names, invalid
+            quantities, short stock).
         """
-        return purchase_medicine(patient_email, medicine_name, quantity)
+        if not isinstance(names, list) or not isinstance(quantities, list):
+            return {'success': False, 'errors': ["names and quantities must both be lists."]}
+        if len(names) != len(quantities):
+            return {'success': False, 'errors': [
+                f"Got {len(names)} names but {len(quantities)} quantities; give one quantity per medicine."]}
+        items = [{'name': name, 'quantity': quantity} for name, quantity in zip(names, quantities)]
+        
+        # Resolve misspelled names first. Unknown names stay in the cart, so purchase_medicines
+        # reports them together with every other problem; their errors then get the closest names
+        unknown = {}
+        resolved = []
+        for item in items:
+            name = item['name']
+            if isinstance(name, str) and name.strip():
+                medicine, suggestions = resolve_medicine(name)
+                if medicine:
+                    item = dict(item, name=medicine['name'])
+                else:
+                    unknown[f"Medicine with name {name} not found."] = _unknown_medicine_message(name, suggestions)
+            resolved.append(item)
+        receipt = purchase_medicines(patient_email, resolved)
+        if not receipt['success'] and unknown:
+            receipt['errors'] = [unknown.get(error, error) for error in receipt['errors']]
+        return receipt
     
     @staticmethod
-    def get_patient_purchased_medicines_tool(patient_email: str):
+    def get_patient_purchased_medicines_tool(patient_email: str, view: str = "full"):
         """
         Get all purchased medicines for a specific patient.
         
         Args:
             patient_email (str): The email of the patient.
+            view (str): "summary" (name, quantity, date), "stock" (with total cost) or "full".
+                Defaults to "full".
             
         Returns:
             List[Dict]: A list of medicines purchased by the patient.
         """
-        return get_patient_purchased_medicines(patient_email)
+        try:
+            return project_history('purchased_medicines', get_patient_purchased_medicines(patient_email), view)
+        except ValueError as e:
+            return f"Error: {str(e)}"
     
     @staticmethod
     def get_medicine_quantity_tool(medicine_name: str):
@@ -702,22 +1224,52 @@ class MedicineTool:
             medicine_name (str): The name of the medicine.
             
         Returns:
-            int: The current quantity of the medicine, or 0 if not found.
+            int: The current quantity of the medicine. An unknown medicine name gives an
+            error message with the closest medicine names instead.
         """
-        return get_medicine_quantity(medicine_name)
+        medicine, suggestions = resolve_medicine(medicine_name)
+        if not medicine:
+            return "Error: " + _unknown_medicine_message(medicine_name, suggestions)
+        return medicine.get('quantity', 0)
     
     @staticmethod
-    def get_medicines_by_symptom_tool(symptom: str):
+    @_plain_result
+    def get_medicines_by_symptom_tool(symptom: str, view: str = "summary"):
         """
         Get all medicines that address a specific symptom.
         
         Args:
             symptom (str): The symptom to search for.
+            view (str): The fields to return: "summary", "stock", "clinical" or "full".
+                Defaults to "summary".
             
         Returns:
             List[Dict]: A list of medicines that address the specified symptom.
         """
-        return get_medicines_by_symptom(symptom)
+        try:
+            return project_medicines(get_medicines_by_symptom(symptom), view)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+    
+    @staticmethod
+    @_plain_result
+    def get_medicines_by_symptoms_tool(symptoms: List[str], view: str = "summary"):
+        """
+        Get the medicines that address several symptoms at once, best matches first.
+        
+        Args:
+            symptoms (List[str]): All the symptoms the patient reports.
+            view (str): The fields to return: "summary", "stock", "clinical" or "full".
+                Defaults to "summary".
+            
+        Returns:
+            List[Dict]: Matching medicines ranked by how many of the symptoms they address,
+            each with the symptoms it matched in 'matched_symptoms'.
+        """
+        try:
+            return project_medicines(get_medicines_by_symptoms(symptoms), view)
+        except ValueError as e:
+            return f"Error: {str(e)}"
     
     @staticmethod
     def record_medicine_inquiry_tool(patient_email: str, medicine_name: str, quantity_needed: int):
@@ -735,17 +1287,21 @@ class MedicineTool:
         return record_medicine_inquiry(patient_email, medicine_name, quantity_needed)
     
     @staticmethod
-    def get_patient_medicine_inquiries_tool(patient_email: str):
+    def get_patient_medicine_inquiries_tool(patient_email: str, view: str = "full"):
         """
         Get all medicine inquiries for a specific patient.
         
         Args:
             patient_email (str): The email of the patient.
+            view (str): "summary" for the key fields of each record, or "full". Defaults to "full".
             
         Returns:
             List[Dict]: A list of medicine inquiries made by the patient.
         """
-        return get_patient_medicine_inquiries(patient_email)
+        try:
+            return project_history('medicine_inquiries', get_patient_medicine_inquiries(patient_email), view)
+        except ValueError as e:
+            return f"Error: {str(e)}"
     
     @staticmethod
     def get_medications_counter_tool(patient_email: str):
@@ -758,4 +1314,49 @@ class MedicineTool:
         Returns:
             Dict: A dictionary containing various medicine statistics for the patient.
         """
-        return get_medications_counter(patient_email) 
\ No newline at end of file
+        return get_medications_counter(patient_email) 
+
+# Async variants for callers on the event loop; the blocking file I/O runs on the
+# bounded I/O thread pool instead
+aload_medicines = make_async(load_medicines)
+afind_medicine_by_name = make_async(find_medicine_by_name)
+aresolve_medicine = make_async(resolve_medicine)
+aget_medicine_by_name = make_async(get_medicine_by_name)
+asearch_medicines = make_async(search_medicines)
+arank_medicines = make_async(rank_medicines)
+aget_medicines_by_category = make_async(get_medicines_by_category)
+aadd_patient_medication = make_async(add_patient_medication)
+aget_patient_medications = make_async(get_patient_medications)
+aupdate_patient_medication_status = make_async(update_patient_medication_status)
+aupdate_medicine_quantity = make_async(update_medicine_quantity)
+apurchase_medicine = make_async(purchase_medicine)
+apurchase_medicines = make_async(purchase_medicines)
+aget_medicine_quantity = make_async(get_medicine_quantity)
+aget_patient_purchased_medicines = make_async(get_patient_purchased_medicines)
+aget_medicines_by_symptom = make_async(get_medicines_by_symptom)
+aget_medicines_by_symptoms = make_async(get_medicines_by_symptoms)
+arecord_medicine_inquiry = make_async(record_medicine_inquiry)
+aget_patient_medicine_inquiries = make_async(get_patient_medicine_inquiries)
+aget_medications_counter = make_async(get_medications_counter)
+
+class AsyncMedicineTool:
+    """
+    Async versions of the MedicineTool tools, for registering with ADK agents.
+    
+    Each tool keeps its name, docstring and parameters, but runs on the I/O
+    thread pool so a slow disk write does not stall other sessions.
+    """
+    
+    get_medicines_tool = staticmethod(make_async(MedicineTool.get_medicines_tool))
+    prescribe_medication_tool = staticmethod(make_async(MedicineTool.prescribe_medication_tool))
+    get_patient_medications_tool = staticmethod(make_async(MedicineTool.get_patient_medications_tool))
+    update_medication_status_tool = staticmethod(make_async(MedicineTool.update_medication_status_tool))
+    purchase_medicine_tool = staticmethod(make_async(MedicineTool.purchase_medicine_tool))
+    purchase_medicines_tool = staticmethod(make_async(MedicineTool.purchase_medicines_tool))
+    get_patient_purchased_medicines_tool = staticmethod(make_async(MedicineTool.get_patient_purchased_medicines_tool))
+    get_medicine_quantity_tool = staticmethod(make_async(MedicineTool.get_medicine_quantity_tool))
+    get_medicines_by_symptom_tool = staticmethod(make_async(MedicineTool.get_medicines_by_symptom_tool))
+    get_medicines_by_symptoms_tool = staticmethod(make_async(MedicineTool.get_medicines_by_symptoms_tool))
+    record_medicine_inquiry_tool = staticmethod(make_async(MedicineTool.record_medicine_inquiry_tool))
+    get_patient_medicine_inquiries_tool = staticmethod(make_async(MedicineTool.get_patient_medicine_inquiries_tool))
+    get_medications_counter_tool = staticmethod(make_async(MedicineTool.get_medications_counter_tool))
@@ -0,0 +1,230 @@
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, ClassVar, Dict, Iterator, List, Optional
+
+
+class _Missing:
+    """Marks a field the stored record did not have, so it is left out again when saved"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING: Any = _Missing()
+
+
+def slotted(cls):
+    """Make a record dataclass with __slots__ (a plain dataclass before Python 3.10)"""
+    cls = dataclass(cls, slots=True) if sys.version_info >= (3, 10) else dataclass(cls)
+    cls._field_names = frozenset(f.name for f in fields(cls) if f.name != "extra")
+    cls._field_order = tuple(f.name for f in fields(cls) if f.name != "extra")
+    return cls
+
+
+class Record:
+    """
+    Base for the slotted record types held in memory by the stores.
+
+    Records answer the dict protocol (record["name"], get, setdefault, update,
+    items, ...) so code written against dict records keeps working. Keys that
+    are not fields of the type are kept in ``extra``. Lists of nested records
+    named in ``_list_types`` are converted as well. to_dict() gives back the
+    plain dict that is stored on disk and returned to tools.
+    """
+    __slots__ = ()
+
+    # Field name -> record type of the items of that list field
+    _list_types: ClassVar[Dict[str, type]] = {}
+
+    # Set by @slotted
+    _field_names: ClassVar[frozenset] = frozenset()
+    _field_order: ClassVar[tuple] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Record":
+        """Build a record from a stored dict"""
+        values = {}
+        extra = None
+        for key, value in data.items():
+            if key in cls._field_names:
+                item_type = cls._list_types.get(key)
+                if item_type is not None and isinstance(value, list):
+                    value = [item_type.from_dict(item) if isinstance(item, dict) else item for item in value]
+                values[key] = value
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        return cls(extra=extra, **values)
+
+    def to_dict(self) -> Dict:
+        """Return the record as a plain dict (nested records included)"""
+        data = {}
+        for key in self._field_order:
+            value = getattr(self, key)
+            if value is MISSING:
+                continue
+            if key in self._list_types and isinstance(value, list):
+                value = [item.to_dict() if isinstance(item, Record) else item for item in value]
+            data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_names:
+            value = getattr(self, key)
+            if value is MISSING:
+                raise KeyError(key)
+            return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._field_names:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+            return default
+
+    def update(self, changes: Dict):
+        for key, value in changes.items():
+            self[key] = value
+
+    def keys(self) -> List[str]:
+        keys = [key for key in self._field_order if getattr(self, key) is not MISSING]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def items(self) -> List[tuple]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self) -> List[Any]:
+        return [self[key] for key in self.keys()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+@slotted
+class Medication(Record):
+    name: str = MISSING
+    prescription_details: str = MISSING
+    prescribed_by: str = MISSING
+    date_prescribed: str = MISSING
+    category: str = MISSING
+    active: bool = MISSING
+    extra: Optional[Dict[str, Any]] = None
+
+
+@slotted
+class Purchase(Record):
+    name: str = MISSING
+    quantity: int = MISSING
+    price_per_unit: float = MISSING
+    total_cost: float = MISSING
+    purchase_date: str = MISSING
+    category: str = MISSING
+    extra: Optional[Dict[str, Any]] = None
+
+
+@slotted
+class Inquiry(Record):
+    name: str = MISSING
+    quantity_needed: int = MISSING
+    inquiry_date: str = MISSING
+    last_inquiry_date: str = MISSING
+    category: str = MISSING
+    extra: Optional[Dict[str, Any]] = None
+
+
+@slotted
+class Patient(Record):
+    _list_types: ClassVar[Dict[str, type]] = {
+        "medications": Medication,
+        "purchased_medicines": Purchase,
+        "medicine_inquiries": Inquiry,
+    }
+
+    name: str = MISSING
+    email: str = MISSING
+    password: str = MISSING
+    age: Optional[int] = MISSING
+    medical_history: List[str] = MISSING
+    appointments: List[Dict] = MISSING
+    medications: List[Medication] = MISSING
+    purchased_medicines: List[Purchase] = MISSING
+    medicine_inquiries: List[Inquiry] = MISSING
+    extra: Optional[Dict[str, Any]] = None
+
+
+@slotted
+class Doctor(Record):
+    name: str = MISSING
+    email: str = MISSING
+    password: str = MISSING
+    specialization: str = MISSING
+    Slots_available: List[str] = MISSING
+    Bookings: List[Dict] = MISSING
+    extra: Optional[Dict[str, Any]] = None
+
+
+@slotted
+class Medicine(Record):
+    name: str = MISSING
+    generic_name: str = MISSING
+    category: str = MISSING
+    is_antibiotic: bool = MISSING
+    prescription_required: bool = MISSING
+    description: str = MISSING
+    dosage: str = MISSING
+    side_effects: str = MISSING
+    contraindications: str = MISSING
+    quantity: int = MISSING
+    price: float = MISSING
+    symptoms: List[str] = MISSING
+    extra: Optional[Dict[str, Any]] = None
+
+
+def to_plain(value: Any) -> Any:
+    """
+    Convert records (also inside lists and dicts) to plain dicts, e.g. at the tool boundary.
+
+    Containers without records in them are returned as they are, not copied.
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        items = [to_plain(item) for item in value]
+        return value if all(a is b for a, b in zip(items, value)) else items
+    if isinstance(value, dict):
+        items = {key: to_plain(item) for key, item in value.items()}
+        return value if all(items[key] is item for key, item in value.items()) else items
+    return value
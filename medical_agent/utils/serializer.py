@@ -0,0 +1,102 @@
+import json
+import sys
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Which library encodes and decodes JSON: the fastest one installed, stdlib json otherwise
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+# Every backend's parse error, so callers can catch them with one except clause
+if orjson is not None:
+    DecodeError = (json.JSONDecodeError, orjson.JSONDecodeError)
+elif msgspec is not None:
+    DecodeError = (json.JSONDecodeError, msgspec.DecodeError)
+else:
+    DecodeError = (json.JSONDecodeError,)
+
+# Indentation of pretty-printed files (the stores' default and the export); 2 is the only
+# width orjson can write, others fall back to the stdlib encoder
+PRETTY_INDENT = 2
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder()
+    _msgspec_decoder = msgspec.json.Decoder()
+
+
+def dumps(data: Any, indent: Optional[int] = None) -> bytes:
+    """Encode data as UTF-8 JSON bytes; indent=None gives the compact form"""
+    if indent is None:
+        if BACKEND == "orjson":
+            return orjson.dumps(data)
+        if BACKEND == "msgspec":
+            return _msgspec_encoder.encode(data)
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if BACKEND == "orjson" and indent == 2:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    # Other indent widths only exist in the stdlib encoder
+    return json.dumps(data, indent=indent).encode('utf-8')
+
+
+def loads(raw: Any) -> Any:
+    """Decode JSON from bytes or str"""
+    if BACKEND == "orjson":
+        return orjson.loads(raw)
+    if BACKEND == "msgspec":
+        return _msgspec_decoder.decode(raw)
+    return json.loads(raw)
+
+
+def load_file(path: str) -> Any:
+    """Read and decode a JSON file"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(data: Any, path: str, indent: Optional[int] = None):
+    """Encode data and write it to a JSON file"""
+    with open(path, 'wb') as f:
+        f.write(dumps(data, indent=indent))
+
+
+def export_pretty(path: str, output_path: Optional[str] = None) -> bool:
+    """Write a human-readable, indented copy of a (possibly compact) JSON file"""
+    try:
+        data = load_file(path)
+    except (IOError, *DecodeError) as e:
+        print(f"Error reading {path}: {str(e)}")
+        return False
+
+    payload = dumps(data, indent=PRETTY_INDENT)
+    if output_path is None:
+        sys.stdout.write(payload.decode('utf-8') + "\n")
+        return True
+
+    try:
+        with open(output_path, 'wb') as f:
+            f.write(payload + b"\n")
+    except IOError as e:
+        print(f"Error writing {output_path}: {str(e)}")
+        return False
+    print(f"Exported {path} to {output_path}")
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m medical_agent.utils.serializer <file.json> [output.json]")
+        sys.exit(1)
+    sys.exit(0 if export_pretty(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None) else 1)
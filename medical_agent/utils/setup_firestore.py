@@ -1,8 +1,8 @@
 import os
-import json
 import time
 from typing import List, Dict, Any
 from .firebase_config import db, firebase_initialized
+from . import serializer
 
 # Path to existing doctor details JSON file
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -11,9 +11,8 @@ DOCTORS_FILE = os.path.join(os.path.dirname(current_dir), 'database', 'doctor_de
 def load_doctors_from_json() -> List[Dict[str, Any]]:
     """Load existing doctor data from JSON file"""
     try:
-        with open(DOCTORS_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+        return serializer.load_file(DOCTORS_FILE)
+    except (FileNotFoundError, *serializer.DecodeError) as e:
         print(f"Error loading doctor data from JSON: {e}")
         return []
 
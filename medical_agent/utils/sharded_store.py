@@ -0,0 +1,476 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import serializer
+from .json_store import (
+    ConcurrentModificationError,
+    FileLock,
+    SecondaryIndex,
+    _file_signature,
+    _fsync_directory,
+    normalize_key,
+    replace_file,
+)
+from .models import Record
+
+MANIFEST_FILE = "manifest.jsonl"
+
+
+class _StripeLock:
+    """A thread lock paired with a ``.lock`` file, so it is exclusive across threads and processes"""
+
+    def __init__(self, path: str):
+        self._thread_lock = threading.RLock()
+        self._file_lock = FileLock(path)
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self._file_lock.acquire()
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._file_lock.release()
+        finally:
+            self._thread_lock.release()
+
+
+class ShardedJsonStore:
+    """
+    A keyed record store that keeps one JSON file per record.
+
+    Each record lives in ``<dir>/<hh>/<sha1 of the normalized key>.json``, so
+    updating a record rewrites only that file instead of the whole database.
+    ``manifest.jsonl`` lists the keys in insertion order, one JSON string per
+    line; new keys are appended to it and existing records never touch it.
+
+    The interface mirrors JsonStore (read, write, get, contains, put, locked,
+    ensure_initialized), so database_utils can use either one. get() costs a
+    single stat while the record's file is unchanged. read() checks every
+    file, so it stays O(N) and is meant for listings, not lookups.
+
+    Locks are striped by the two-character shard directory: locked(key)
+    holds only the stripe of that key, so writers of different records
+    (threads or processes) mostly proceed in parallel. locked() without a
+    key serializes whole-store operations such as write() against each other.
+
+    find() serves index_fields from in-memory secondary indexes; it loads
+    records added by other processes and re-checks only the matching files.
+
+    As in JsonStore, a record_type keeps the cached records as slotted
+    record objects (see models.py). There is no write-behind mode: a put
+    already rewrites a single small file, so every write is durable and
+    the durable flag is accepted only for compatibility.
+    """
+
+    def __init__(self, path: str, name: str, key: str, indent: Optional[int] = serializer.PRETTY_INDENT,
+                 legacy_path: Optional[str] = None, index_fields: Tuple[str, ...] = (),
+                 record_type: Optional[type] = None):
+        self.path = path
+        self.name = name
+        self.key = key
+        self.indent = indent
+        self.legacy_path = legacy_path
+        self.record_type = record_type
+        self._lock = threading.RLock()
+        self._store_lock: Optional[_StripeLock] = None
+        self._stripe_locks: Dict[str, _StripeLock] = {}
+        # normalized key -> (record, file signature, payload digest)
+        self._records: Dict[str, Tuple[Dict, Any, str]] = {}
+        self._keys: List[str] = []
+        self._known_keys = set()
+        self._secondary = {field: SecondaryIndex(field) for field in index_fields}
+        self._indexed_count = 0
+        self._manifest_offset = 0
+        self._manifest_signature = None
+        self.generation = 0
+        self._verified = False
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def shard_id(self, key_value: Any) -> str:
+        """Return the hash that names the shard file of a key"""
+        return hashlib.sha1(normalize_key(key_value).encode('utf-8')).hexdigest()
+
+    def shard_path(self, key_value: Any) -> str:
+        """Return the path of the file that holds the record with the given key"""
+        shard = self.shard_id(key_value)
+        return os.path.join(self.path, shard[:2], shard + ".json")
+
+    def _stripe_lock(self, key_value: Any) -> _StripeLock:
+        stripe = self.shard_id(key_value)[:2]
+        with self._lock:
+            lock = self._stripe_locks.get(stripe)
+            if lock is None:
+                stripe_dir = os.path.join(self.path, stripe)
+                os.makedirs(stripe_dir, exist_ok=True)
+                lock = self._stripe_locks[stripe] = _StripeLock(os.path.join(stripe_dir, ".lock"))
+            return lock
+
+    @contextmanager
+    def locked(self, key: Any = None):
+        """
+        Hold one record (or, without a key, the whole store) exclusively for a read-modify-write.
+
+        Holding a key lock does not block writers of other records. Holding the
+        store lock blocks other whole-store operations but not single-record puts.
+        """
+        if key is not None:
+            with self._stripe_lock(key):
+                yield self
+            return
+
+        with self._lock:
+            if self._store_lock is None:
+                os.makedirs(self.path, exist_ok=True)
+                self._store_lock = _StripeLock(os.path.join(self.path, ".lock"))
+        with self._store_lock:
+            yield self
+
+    def _refresh_manifest(self):
+        """Pick up keys appended to the manifest since it was last read"""
+        signature = _file_signature(self.manifest_path)
+        if signature == self._manifest_signature:
+            return
+        if signature is None or signature[1] < self._manifest_offset:
+            # Missing or rewritten: start over
+            self._forget_manifest()
+        if signature is not None:
+            try:
+                with open(self.manifest_path, 'rb') as f:
+                    f.seek(self._manifest_offset)
+                    tail = f.read()
+            except IOError as e:
+                print(f"Error reading {self.name} manifest: {str(e)}")
+                return
+
+            # Stop at a torn last line; it is read again once the append completes
+            complete = tail.rfind(b"\n") + 1
+            for line in tail[:complete].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    key = normalize_key(serializer.loads(line))
+                except serializer.DecodeError:
+                    print(f"Warning: Skipping corrupt {self.name} manifest entry")
+                    continue
+                if key not in self._known_keys:
+                    self._known_keys.add(key)
+                    self._keys.append(key)
+            self._manifest_offset += complete
+        self._manifest_signature = signature
+        self.generation += 1
+
+    def _from_disk(self, record: Dict) -> Dict:
+        """Turn a stored dict into the store's record type (if it has one)"""
+        if self.record_type is not None and isinstance(record, dict):
+            return self.record_type.from_dict(record)
+        return record
+
+    def _dumps(self, record: Dict) -> bytes:
+        """Encode a record as the contents of its file"""
+        return serializer.dumps(record.to_dict() if isinstance(record, Record) else record, indent=self.indent)
+
+    def _read_record_file(self, path: str) -> Optional[Tuple[Dict, bytes]]:
+        """Parse a record file, returning the record and its raw bytes"""
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            return self._from_disk(serializer.loads(raw)), raw
+        except (IOError, *serializer.DecodeError) as e:
+            print(f"Error reading {self.name} record {path}: {str(e)}")
+            return None
+
+    def _load_record(self, key: str) -> Optional[Dict]:
+        """Return the cached record for a normalized key, re-reading its file if it changed"""
+        path = self.shard_path(key)
+        signature = _file_signature(path)
+        cached = self._records.get(key)
+        if cached is not None and cached[1] == signature:
+            return cached[0]
+        if signature is None:
+            self._forget_record(key)
+            return None
+
+        loaded = self._read_record_file(path)
+        if loaded is None:
+            return None
+        record, raw = loaded
+
+        self._cache_record(key, record, signature, hashlib.sha1(raw).hexdigest())
+        if cached is not None:
+            # Another process changed the record
+            self.generation += 1
+        return record
+
+    def read(self) -> List[Dict]:
+        """Return all records in insertion order, re-reading the files that changed on disk"""
+        self.ensure_initialized()
+        with self._lock:
+            self._refresh_manifest()
+            records = []
+            for key in self._keys:
+                record = self._load_record(key)
+                if record is not None:
+                    records.append(record)
+            return records
+
+    def iter_records(self, start: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """
+        Yield (position, record) pairs in insertion order, starting at a position.
+
+        Files are read one at a time, and records that are not cached already
+        are not kept, so memory stays flat however many records there are.
+        """
+        self.ensure_initialized()
+        position = start
+        while True:
+            with self._lock:
+                if position == start:
+                    self._refresh_manifest()
+                if position >= len(self._keys):
+                    return
+                key = self._keys[position]
+                cached = self._records.get(key)
+                path = self.shard_path(key)
+                if cached is not None and cached[1] == _file_signature(path):
+                    record = cached[0]
+                else:
+                    loaded = self._read_record_file(path) if os.path.exists(path) else None
+                    record = loaded[0] if loaded else None
+            if record is not None:
+                yield position, record
+            position += 1
+
+    def read_versioned(self) -> Tuple[List[Dict], int]:
+        """Return all records together with their generation, for compare-and-swap"""
+        self.ensure_initialized()
+        with self._lock:
+            data = self.read()
+            return data, self.generation
+
+    def get(self, key_value: Any) -> Optional[Dict]:
+        """Look up a record by its key field (case-insensitive)"""
+        self.ensure_initialized()
+        with self._lock:
+            return self._load_record(normalize_key(key_value))
+
+    def contains(self, key_value: Any) -> bool:
+        """Check whether a record with the given key exists"""
+        return self.get(key_value) is not None
+
+    def find(self, field: str, value: Any) -> List[Dict]:
+        """Return every record whose indexed field equals value (see index_fields)"""
+        self.ensure_initialized()
+        with self._lock:
+            self._refresh_manifest()
+            # Index the records listed since the last lookup
+            for key in self._keys[self._indexed_count:]:
+                if key not in self._records:
+                    self._load_record(key)
+            self._indexed_count = len(self._keys)
+
+            records = []
+            for key in self._secondary[field].keys(value):
+                record = self._load_record(key)
+                if record is not None and record.get(field) == value:
+                    records.append(record)
+            return records
+
+    def _cache_record(self, key: str, record: Dict, signature: Any, digest: str):
+        self._records[key] = (record, signature, digest)
+        for secondary in self._secondary.values():
+            secondary.add(key, record)
+
+    def _forget_record(self, key: str):
+        self._records.pop(key, None)
+        for secondary in self._secondary.values():
+            secondary.remove(key)
+
+    def _append_manifest(self, keys: List[Any]):
+        """Record new keys in the manifest (O_APPEND, so concurrent appends do not interleave)"""
+        payload = b"".join(serializer.dumps(key) + b"\n" for key in keys)
+        fd = os.open(self.manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, payload)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _write_record(self, key: str, record: Dict, payload: bytes):
+        """Atomically replace a record's file and cache it (caller holds the key's stripe lock)"""
+        path = self.shard_path(key)
+        replace_file(path, payload)
+        _fsync_directory(os.path.dirname(path))
+        with self._lock:
+            self._cache_record(key, record, _file_signature(path), hashlib.sha1(payload).hexdigest())
+            self.generation += 1
+
+    def _check_generation(self, expected_generation: Optional[int]):
+        """Raise if the store changed since the caller read the given generation"""
+        if expected_generation is None:
+            return
+        self.read()
+        if self.generation != expected_generation:
+            raise ConcurrentModificationError(
+                f"{self.name.capitalize()} database changed since it was read "
+                f"(generation {expected_generation} -> {self.generation})"
+            )
+
+    def put(self, record: Dict, expected_generation: Optional[int] = None, durable: bool = True) -> bool:
+        """Insert or replace a single record; only that record's file is written"""
+        # Never start a manifest before the legacy database has been migrated into it
+        if not self.ensure_initialized():
+            return False
+        record = self._from_disk(record)
+        key = normalize_key(record.get(self.key))
+        with self._stripe_lock(key):
+            self._check_generation(expected_generation)
+            try:
+                payload = self._dumps(record)
+                if not os.path.exists(self.shard_path(key)):
+                    # Listed first, so a crash leaves a key without a file rather than a hidden record
+                    self._append_manifest([record.get(self.key)])
+                self._write_record(key, record, payload)
+            except Exception as e:
+                print(f"Error writing {self.name} record: {str(e)}")
+                with self._lock:
+                    self._forget_record(key)
+                return False
+            return True
+
+    def put_many(self, records: List[Dict], expected_generation: Optional[int] = None,
+                 durable: bool = True) -> bool:
+        """Insert or replace several records; each one is written to its own file"""
+        self._check_generation(expected_generation)
+        return all([self.put(record) for record in records])
+
+    def write(self, data: List[Dict], expected_generation: Optional[int] = None, durable: bool = True) -> bool:
+        """
+        Replace the whole set of records.
+
+        Only records whose content changed are rewritten, each under its own
+        stripe lock. Records missing from data are removed.
+        """
+        if not self.ensure_initialized():
+            return False
+        with self.locked():
+            self._check_generation(expected_generation)
+            with self._lock:
+                self._refresh_manifest()
+                known_keys = set(self._known_keys)
+            try:
+                data = [self._from_disk(record) for record in data]
+                for record in data:
+                    key = normalize_key(record.get(self.key))
+                    payload = self._dumps(record)
+                    with self._lock:
+                        cached = self._records.get(key)
+                        if key in known_keys and cached is not None and cached[2] == hashlib.sha1(payload).hexdigest():
+                            self._cache_record(key, record, cached[1], cached[2])
+                            continue
+                    if key not in known_keys:
+                        # Listed before the file is written, as in put()
+                        known_keys.add(key)
+                        self._append_manifest([record.get(self.key)])
+                    with self._stripe_lock(key):
+                        self._write_record(key, record, payload)
+
+                kept = {normalize_key(record.get(self.key)) for record in data}
+                removed = [key for key in known_keys if key not in kept]
+                if removed:
+                    with self._lock:
+                        # Keep keys that put() appended while this write was running
+                        self._refresh_manifest()
+                        added = [key for key in self._keys if key not in known_keys]
+                        manifest = b"".join(serializer.dumps(record.get(self.key)) + b"\n" for record in data)
+                        manifest += b"".join(serializer.dumps(key) + b"\n" for key in added)
+                        replace_file(self.manifest_path, manifest)
+                        self._forget_manifest()
+                    for key in removed:
+                        with self._stripe_lock(key):
+                            if os.path.exists(self.shard_path(key)):
+                                os.remove(self.shard_path(key))
+                            with self._lock:
+                                self._forget_record(key)
+            except Exception as e:
+                print(f"Error writing to {self.name} database: {str(e)}")
+                self.invalidate()
+                return False
+            return True
+
+    def flush(self) -> bool:
+        """Nothing is held back, so there is nothing to flush (see JsonStore.flush)"""
+        return True
+
+    def ensure_initialized(self) -> bool:
+        """
+        Make sure the shard directory and manifest exist.
+
+        On first use, records from the single-file database at legacy_path
+        are split into shards. Every read and write calls this first (before
+        taking the store's thread lock, as the migration takes the store lock),
+        so whichever call comes first after switching layouts migrates.
+        """
+        if self._verified:
+            return True
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            if not os.path.exists(self.manifest_path):
+                with self.locked():
+                    if not os.path.exists(self.manifest_path):
+                        self._migrate_legacy()
+        except Exception as e:
+            print(f"Error initializing {self.name} database: {str(e)}")
+            return False
+
+        self._verified = True
+        return True
+
+    def _migrate_legacy(self):
+        """Split the records of the single-file database into shards"""
+        records = []
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            try:
+                records = serializer.load_file(self.legacy_path) or []
+            except (IOError, *serializer.DecodeError) as e:
+                print(f"Error reading {self.name} database {self.legacy_path} for migration: {str(e)}")
+                raise
+
+        for record in records:
+            key = normalize_key(record.get(self.key))
+            with self._stripe_lock(key):
+                self._write_record(key, self._from_disk(record), serializer.dumps(record, indent=self.indent))
+        # The manifest is written last, so an interrupted migration simply runs again
+        replace_file(self.manifest_path, b"".join(serializer.dumps(r.get(self.key)) + b"\n" for r in records))
+        _fsync_directory(self.path)
+        if records:
+            print(f"Migrated {len(records)} {self.name} records from {self.legacy_path} into {self.path}")
+        else:
+            print(f"Initialized {self.name} database at {self.path}")
+
+    def _forget_manifest(self):
+        """Make the next refresh read the manifest from the start"""
+        self._keys, self._known_keys = [], set()
+        self._indexed_count = 0
+        self._manifest_offset = 0
+        self._manifest_signature = None
+
+    def invalidate(self):
+        """Drop the cached records so the next read goes back to the disk"""
+        with self._lock:
+            self._records = {}
+            for secondary in self._secondary.values():
+                secondary.clear()
+            self._forget_manifest()
+            # The path may have changed; check (and migrate) it again
+            self._verified = False
@@ -0,0 +1,752 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Any
+
+from .booking_calendar import MAX_BOOKING_MINUTES, booking_duration, parse_booking_time
+
+# Path to the SQLite database file
+SQLITE_DB_PATH = os.environ.get(
+    "MEDICAL_AGENT_SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "medical_agent.db")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS doctors (
+    email TEXT PRIMARY KEY COLLATE NOCASE,
+    name TEXT NOT NULL,
+    password TEXT,
+    specialization TEXT,
+    slots_available TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doctor_email TEXT NOT NULL COLLATE NOCASE REFERENCES doctors(email) ON DELETE CASCADE,
+    patient_name TEXT,
+    time TEXT NOT NULL,
+    duration INTEGER,
+    start_minute INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_doctor_time ON bookings(doctor_email, time);
+
+CREATE TABLE IF NOT EXISTS patients (
+    email TEXT PRIMARY KEY COLLATE NOCASE,
+    name TEXT NOT NULL,
+    password TEXT,
+    age INTEGER,
+    medical_history TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_patients_name ON patients(name);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_email TEXT NOT NULL COLLATE NOCASE REFERENCES patients(email) ON DELETE CASCADE,
+    doctor_name TEXT,
+    doctor_email TEXT COLLATE NOCASE,
+    time TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments(patient_email);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_time ON appointments(doctor_email, time);
+
+CREATE TABLE IF NOT EXISTS medications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_email TEXT NOT NULL COLLATE NOCASE REFERENCES patients(email) ON DELETE CASCADE,
+    name TEXT,
+    prescription_details TEXT,
+    prescribed_by TEXT,
+    date_prescribed TEXT,
+    category TEXT,
+    active INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_medications_patient_name ON medications(patient_email, name);
+
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_email TEXT NOT NULL COLLATE NOCASE REFERENCES patients(email) ON DELETE CASCADE,
+    name TEXT,
+    quantity INTEGER,
+    price_per_unit REAL,
+    total_cost REAL,
+    purchase_date TEXT,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_purchases_patient_name ON purchases(patient_email, name);
+
+CREATE TABLE IF NOT EXISTS inquiries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_email TEXT NOT NULL COLLATE NOCASE REFERENCES patients(email) ON DELETE CASCADE,
+    name TEXT,
+    quantity_needed INTEGER,
+    inquiry_date TEXT,
+    last_inquiry_date TEXT,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_inquiries_patient_name ON inquiries(patient_email, name);
+"""
+
+# Patient list fields and the table/columns backing each of them
+PATIENT_LIST_TABLES = {
+    "appointments": ("appointments", ["doctor_name", "doctor_email", "time", "status"]),
+    "medications": ("medications", ["name", "prescription_details", "prescribed_by", "date_prescribed", "category", "active"]),
+    "purchased_medicines": ("purchases", ["name", "quantity", "price_per_unit", "total_cost", "purchase_date", "category"]),
+    "medicine_inquiries": ("inquiries", ["name", "quantity_needed", "inquiry_date", "last_inquiry_date", "category"]),
+}
+
+# Columns stored as INTEGER but exposed as bool
+BOOLEAN_COLUMNS = {"active"}
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+def get_connection() -> sqlite3.Connection:
+    """Get the SQLite connection for the current thread, creating the schema on first use"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == SQLITE_DB_PATH:
+        return conn
+
+    db_dir = os.path.dirname(SQLITE_DB_PATH)
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir, exist_ok=True)
+
+    conn = sqlite3.connect(SQLITE_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+    with _schema_lock:
+        if SQLITE_DB_PATH not in _schema_ready:
+            conn.executescript(SCHEMA)
+            _migrate_schema(conn)
+            _schema_ready.add(SQLITE_DB_PATH)
+
+    _local.conn = conn
+    _local.path = SQLITE_DB_PATH
+    return conn
+
+def _migrate_schema(conn: sqlite3.Connection):
+    """Bring tables created by older versions up to the current schema"""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(bookings)")}
+    if "start_minute" not in columns:
+        with conn:
+            conn.execute("ALTER TABLE bookings ADD COLUMN duration INTEGER")
+            conn.execute("ALTER TABLE bookings ADD COLUMN start_minute INTEGER")
+            conn.executemany(
+                "UPDATE bookings SET start_minute = ? WHERE id = ?",
+                [(parse_booking_time(row["time"]), row["id"]) for row in conn.execute("SELECT id, time FROM bookings")]
+            )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_doctor_start ON bookings(doctor_email, start_minute)")
+
+def _to_row_values(columns: List[str], record: Dict) -> List[Any]:
+    """Convert a record dict to column values for an INSERT"""
+    values = []
+    for column in columns:
+        value = record.get(column)
+        if column in BOOLEAN_COLUMNS and value is not None:
+            value = int(bool(value))
+        values.append(value)
+    return values
+
+def _from_row(columns: List[str], row: sqlite3.Row) -> Dict:
+    """Convert a row back to the record dict used by the JSON backend"""
+    record = {}
+    for column in columns:
+        value = row[column]
+        if column in BOOLEAN_COLUMNS and value is not None:
+            value = bool(value)
+        record[column] = value
+    return record
+
+def _insert_list_record(conn: sqlite3.Connection, patient_email: str, field: str, record: Dict):
+    """Insert one entry of a patient list field"""
+    table, columns = PATIENT_LIST_TABLES[field]
+    conn.execute(
+        f"INSERT INTO {table} (patient_email, {', '.join(columns)}) VALUES (?, {', '.join('?' for _ in columns)})",
+        [patient_email] + _to_row_values(columns, record)
+    )
+
+def _doctor_from_row(conn: sqlite3.Connection, row: sqlite3.Row) -> Dict:
+    """Assemble a doctor record, including its bookings"""
+    bookings = conn.execute(
+        "SELECT patient_name, time, duration FROM bookings WHERE doctor_email = ? ORDER BY id",
+        (row["email"],)
+    ).fetchall()
+    return {
+        "name": row["name"],
+        "email": row["email"],
+        "password": row["password"],
+        "specialization": row["specialization"],
+        "Slots_available": json.loads(row["slots_available"] or "[]"),
+        "Bookings": [_booking_from_row(b) for b in bookings]
+    }
+
+def _booking_from_row(row: sqlite3.Row) -> Dict:
+    """Build a booking dict; the duration is only present when the booking has one"""
+    booking = {"patient_name": row["patient_name"], "time": row["time"]}
+    if row["duration"] is not None:
+        booking["duration"] = row["duration"]
+    return booking
+
+def _check_booking(conn: sqlite3.Connection, doctor_email: str, time: str, duration: Optional[int]):
+    """Raise if the time is already booked or overlaps a booking (both are index lookups)"""
+    if conn.execute("SELECT 1 FROM bookings WHERE doctor_email = ? AND time = ?", (doctor_email, time)).fetchone():
+        raise ValueError(f"Slot at {time} is already booked")
+
+    start = parse_booking_time(time)
+    if start is None:
+        return
+    end = start + booking_duration(duration)
+    clash = conn.execute(
+        "SELECT time FROM bookings WHERE doctor_email = ? AND start_minute BETWEEN ? AND ? "
+        "AND (start_minute = ? OR (start_minute < ? AND start_minute + COALESCE(duration, 0) > ?)) LIMIT 1",
+        (doctor_email, start - MAX_BOOKING_MINUTES, end, start, end, start)
+    ).fetchone()
+    if clash:
+        raise ValueError(f"Slot at {time} overlaps the booking at {clash['time']}")
+
+def _insert_booking(conn: sqlite3.Connection, doctor_email: str, patient_name: str, time: str,
+                    duration: Optional[int] = None):
+    """Insert a booking row, with its start time in minutes for overlap checks"""
+    conn.execute(
+        "INSERT INTO bookings (doctor_email, patient_name, time, duration, start_minute) VALUES (?, ?, ?, ?, ?)",
+        (doctor_email, patient_name, time, duration, parse_booking_time(time))
+    )
+
+def _patient_from_row(conn: sqlite3.Connection, row: sqlite3.Row, fields: Optional[List[str]] = None) -> Dict:
+    """Assemble a patient record, including its list fields (only those in fields, if given)"""
+    patient = {
+        "name": row["name"],
+        "email": row["email"],
+        "password": row["password"],
+        "age": row["age"],
+        "medical_history": json.loads(row["medical_history"] or "[]"),
+    }
+    for field, (table, columns) in PATIENT_LIST_TABLES.items():
+        if fields is not None and field not in fields:
+            continue
+        rows = conn.execute(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE patient_email = ? ORDER BY id",
+            (row["email"],)
+        ).fetchall()
+        # As in the JSON records, the medicine lists appear once they have an entry
+        if rows or field == "appointments":
+            patient[field] = [_from_row(columns, r) for r in rows]
+    return patient
+
+def _insert_doctor(conn: sqlite3.Connection, doctor: Dict):
+    """Insert a full doctor record, including bookings"""
+    conn.execute(
+        "INSERT INTO doctors (email, name, password, specialization, slots_available) VALUES (?, ?, ?, ?, ?)",
+        (doctor.get("email"), doctor.get("name"), doctor.get("password"),
+         doctor.get("specialization"), json.dumps(doctor.get("Slots_available", [])))
+    )
+    conn.executemany(
+        "INSERT INTO bookings (doctor_email, patient_name, time, duration, start_minute) VALUES (?, ?, ?, ?, ?)",
+        [(doctor.get("email"), b.get("patient_name"), b.get("time"), b.get("duration"), parse_booking_time(b.get("time")))
+         for b in doctor.get("Bookings", [])]
+    )
+
+def _insert_patient(conn: sqlite3.Connection, patient: Dict):
+    """Insert a full patient record, including all of its list fields"""
+    conn.execute(
+        "INSERT INTO patients (email, name, password, age, medical_history) VALUES (?, ?, ?, ?, ?)",
+        (patient.get("email"), patient.get("name"), patient.get("password"),
+         patient.get("age"), json.dumps(patient.get("medical_history") or []))
+    )
+    for field in PATIENT_LIST_TABLES:
+        for record in patient.get(field, []):
+            _insert_list_record(conn, patient.get("email"), field, record)
+
+def initialize_db_if_empty():
+    """Create the SQLite schema if it does not exist yet"""
+    try:
+        get_connection()
+        return True
+    except Exception as e:
+        print(f"Error initializing database: {str(e)}")
+        return False
+
+# Doctor database functions
+def read_doctor_db() -> List[Dict]:
+    """Read the doctor database"""
+    conn = get_connection()
+    rows = conn.execute("SELECT * FROM doctors ORDER BY rowid").fetchall()
+    return [_doctor_from_row(conn, row) for row in rows]
+
+def write_doctor_db(data: List[Dict]):
+    """Replace the whole doctor database"""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute("DELETE FROM bookings")
+            conn.execute("DELETE FROM doctors")
+            for doctor in data:
+                _insert_doctor(conn, doctor)
+        return True
+    except sqlite3.Error as e:
+        print(f"Error writing to doctor database: {str(e)}")
+        return False
+
+def doctor_exists(email: str) -> bool:
+    """Check if a doctor exists in the database"""
+    print(f"Checking if doctor exists: {email}")
+    row = get_connection().execute("SELECT 1 FROM doctors WHERE email = ?", (email.strip(),)).fetchone()
+    return row is not None
+
+def authenticate_doctor(email: str, password: str) -> Optional[Dict]:
+    """Authenticate a doctor with email and password"""
+    print(f"Authenticating doctor: {email}")
+    doctor = get_doctor_by_email(email)
+    if doctor and doctor.get('password') == password:
+        print(f"Doctor authenticated successfully: {email}")
+        return doctor
+
+    print(f"Invalid credentials for doctor: {email}")
+    return None
+
+def register_doctor(name: str, email: str, password: str, specialization: str) -> Dict:
+    """Register a new doctor"""
+    print(f"Registering doctor: {email}")
+    new_doctor = {
+        "name": name,
+        "email": email,
+        "password": password,
+        "specialization": specialization,
+        "Slots_available": [],
+        "Bookings": []
+    }
+
+    conn = get_connection()
+    try:
+        with conn:
+            _insert_doctor(conn, new_doctor)
+    except sqlite3.IntegrityError:
+        print(f"Doctor already exists: {email}")
+        raise ValueError("Doctor with this email already exists")
+
+    return new_doctor
+
+def add_booking(doctor_email: str, patient_name: str, time: str, duration: Optional[int] = None) -> Dict:
+    """Add a booking for a doctor (duration in minutes), rejecting taken or overlapping times"""
+    booking_duration(duration)
+    conn = get_connection()
+    with conn:
+        # Take the write lock before the clash check, so no other process can book in between
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT 1 FROM doctors WHERE email = ?", (doctor_email,)).fetchone() is None:
+            raise ValueError("Doctor not found")
+
+        # Check if slot is already booked
+        _check_booking(conn, doctor_email, time, duration)
+        _insert_booking(conn, doctor_email, patient_name, time, duration)
+
+    booking = {
+        "patient_name": patient_name,
+        "time": time
+    }
+    if duration is not None:
+        booking["duration"] = duration
+    return booking
+
+def get_doctor_bookings(doctor_email: str) -> List[Dict]:
+    """Get all bookings for a doctor"""
+    doctor = get_doctor_by_email(doctor_email)
+    if not doctor:
+        raise ValueError("Doctor not found")
+
+    return doctor['Bookings']
+
+def update_doctor_slots(doctor_email: str, slots: List[str]) -> Dict:
+    """Update available slots for a doctor"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute(
+            "UPDATE doctors SET slots_available = ? WHERE email = ?",
+            (json.dumps(slots), doctor_email)
+        )
+    if cursor.rowcount == 0:
+        raise ValueError("Doctor not found")
+
+    return get_doctor_by_email(doctor_email)
+
+def get_all_doctors() -> List[Dict]:
+    """Get all doctors with basic information (without sensitive data)"""
+    rows = get_connection().execute(
+        "SELECT name, email, specialization, slots_available FROM doctors ORDER BY rowid"
+    ).fetchall()
+    return [
+        {
+            "name": row["name"],
+            "email": row["email"],
+            "specialization": row["specialization"],
+            "Slots_available": json.loads(row["slots_available"] or "[]")
+        }
+        for row in rows
+    ]
+
+def _page_rows(table: str, cursor: Optional[str], page_size: int) -> tuple:
+    """Fetch the rows of one page (keyed by rowid) and the cursor of the next page"""
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    try:
+        after = int(cursor) if cursor else 0
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    conn = get_connection()
+    rows = conn.execute(
+        f"SELECT rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (after, page_size + 1)
+    ).fetchall()
+    next_cursor = str(rows[page_size - 1]["rowid"]) if len(rows) > page_size else None
+    return conn, rows[:page_size], next_cursor
+
+def get_doctors_page(cursor: Optional[str] = None, page_size: int = 50, fields: Optional[List[str]] = None) -> Dict:
+    """Get one page of doctors (basic information by default) and the cursor of the next page"""
+    from .database_utils import DOCTOR_LIST_FIELDS, project_record
+    fields = list(fields or DOCTOR_LIST_FIELDS)
+    conn, rows, next_cursor = _page_rows("doctors", cursor, page_size)
+    return {
+        "doctors": [project_record(_doctor_from_row(conn, row), fields) for row in rows],
+        "next_cursor": next_cursor
+    }
+
+def get_doctor_by_email(email: str) -> Optional[Dict]:
+    """Get a doctor by email"""
+    conn = get_connection()
+    row = conn.execute("SELECT * FROM doctors WHERE email = ?", (email.strip(),)).fetchone()
+    return _doctor_from_row(conn, row) if row else None
+
+# Patient database functions
+def read_patient_db() -> List[Dict]:
+    """Read the patient database"""
+    conn = get_connection()
+    rows = conn.execute("SELECT * FROM patients ORDER BY rowid").fetchall()
+    return [_patient_from_row(conn, row) for row in rows]
+
+def write_patient_db(data: List[Dict]):
+    """Replace the whole patient database"""
+    conn = get_connection()
+    try:
+        with conn:
+            for table, _ in PATIENT_LIST_TABLES.values():
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("DELETE FROM patients")
+            for patient in data:
+                _insert_patient(conn, patient)
+        return True
+    except sqlite3.Error as e:
+        print(f"Error writing to patient database: {str(e)}")
+        return False
+
+def patient_exists(email: str) -> bool:
+    """Check if a patient exists in the database"""
+    print(f"Checking if patient exists: {email}")
+    row = get_connection().execute("SELECT 1 FROM patients WHERE email = ?", (email.strip(),)).fetchone()
+    return row is not None
+
+def authenticate_patient(email: str, password: str) -> Optional[Dict]:
+    """Authenticate a patient with email and password"""
+    print(f"Authenticating patient: {email}")
+    patient = get_patient_by_email(email)
+    if patient and patient.get('password') == password:
+        print(f"Patient authenticated successfully: {email}")
+        return patient
+
+    print(f"Invalid credentials for patient: {email}")
+    return None
+
+def register_patient(name: str, email: str, password: str, age: int = None, medical_history: List[str] = None) -> Dict:
+    """Register a new patient"""
+    print(f"Registering patient: {email}")
+    new_patient = {
+        "name": name,
+        "email": email,
+        "password": password,
+        "age": age,
+        "medical_history": medical_history or [],
+        "appointments": []
+    }
+
+    conn = get_connection()
+    try:
+        with conn:
+            _insert_patient(conn, new_patient)
+    except sqlite3.IntegrityError:
+        print(f"Patient already exists: {email}")
+        raise ValueError("Patient with this email already exists")
+
+    return new_patient
+
+def _register_bulk(table: str, kind: str, rows: List[Dict], build, insert) -> Dict:
+    """Validate rows against the table and the batch itself, then insert the valid ones in one transaction"""
+    registered = []
+    errors = []
+    seen = set()
+
+    conn = get_connection()
+    with conn:
+        # Take the write lock before the duplicate checks, so no other process can insert in between
+        conn.execute("BEGIN IMMEDIATE")
+        for index, row in enumerate(rows):
+            try:
+                # Rejects rows without a text email before it is used as a key
+                record = build(row)
+                key = record["email"].lower()
+                if key in seen or conn.execute(f"SELECT 1 FROM {table} WHERE email = ?", (record["email"],)).fetchone():
+                    raise ValueError(f"{kind.capitalize()} with this email already exists")
+            except ValueError as e:
+                errors.append({"index": index, "email": row.get("email") if isinstance(row, dict) else None, "error": str(e)})
+                continue
+
+            seen.add(key)
+            registered.append(record)
+
+        for record in registered:
+            insert(conn, record)
+
+    print(f"Registered {len(registered)} {kind}s ({len(errors)} rejected)")
+    return {"registered": registered, "errors": errors}
+
+def register_doctors_bulk(doctors: List[Dict]) -> Dict:
+    """Register many doctors in a single transaction, reporting invalid or duplicate rows"""
+    from .database_utils import build_doctor_record
+    return _register_bulk("doctors", "doctor", doctors, build_doctor_record, _insert_doctor)
+
+def register_patients_bulk(patients: List[Dict]) -> Dict:
+    """Register many patients in a single transaction, reporting invalid or duplicate rows"""
+    from .database_utils import build_patient_record
+    return _register_bulk("patients", "patient", patients, build_patient_record, _insert_patient)
+
+def add_patient_appointment(patient_email: str, doctor_email: str, time: str, duration: Optional[int] = None) -> Dict:
+    """Add an appointment to a patient's record (duration in minutes, kept on the doctor's booking)"""
+    booking_duration(duration)
+    conn = get_connection()
+    with conn:
+        # Take the write lock before the clash check, so no other process can book in between
+        conn.execute("BEGIN IMMEDIATE")
+        doctor = conn.execute("SELECT name FROM doctors WHERE email = ?", (doctor_email,)).fetchone()
+        if not doctor:
+            raise ValueError("Doctor not found")
+
+        patient = conn.execute("SELECT email, name FROM patients WHERE email = ?", (patient_email,)).fetchone()
+        if not patient:
+            raise ValueError("Patient not found")
+
+        _check_booking(conn, doctor_email, time, duration)
+
+        appointment = {
+            "doctor_name": doctor["name"],
+            "doctor_email": doctor_email,
+            "time": time,
+            "status": "scheduled"
+        }
+
+        # Both rows are written in the same transaction
+        _insert_list_record(conn, patient["email"], "appointments", appointment)
+        _insert_booking(conn, doctor_email, patient["name"], time, duration)
+
+    return appointment
+
+def get_patient_appointments(patient_email: str) -> List[Dict]:
+    """Get all appointments for a patient"""
+    patient = get_patient_by_email(patient_email)
+    if not patient:
+        raise ValueError("Patient not found")
+
+    return patient['appointments']
+
+def update_patient_medical_history(patient_email: str, medical_history: List[str]) -> Dict:
+    """Update medical history for a patient"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute(
+            "UPDATE patients SET medical_history = ? WHERE email = ?",
+            (json.dumps(medical_history), patient_email)
+        )
+    if cursor.rowcount == 0:
+        raise ValueError("Patient not found")
+
+    return get_patient_by_email(patient_email)
+
+def get_patient_by_email(email: str) -> Optional[Dict]:
+    """Get a patient by email"""
+    conn = get_connection()
+    row = conn.execute("SELECT * FROM patients WHERE email = ?", (email.strip(),)).fetchone()
+    return _patient_from_row(conn, row) if row else None
+
+def get_all_patients() -> List[Dict]:
+    """Get all patients with basic information (without sensitive data)"""
+    result = []
+    for patient in read_patient_db():
+        # Create a copy without password
+        patient_info = {k: v for k, v in patient.items() if k != "password"}
+        result.append(patient_info)
+
+    return result
+
+def get_patients_page(cursor: Optional[str] = None, page_size: int = 50, fields: Optional[List[str]] = None) -> Dict:
+    """Get one page of patients (without sensitive data) and the cursor of the next page"""
+    from .database_utils import project_record
+    conn, rows, next_cursor = _page_rows("patients", cursor, page_size)
+    return {
+        "patients": [project_record(_patient_from_row(conn, row, fields), fields) for row in rows],
+        "next_cursor": next_cursor
+    }
+
+def delete_appointment(doctor_email: str, patient_name: str, time: str) -> bool:
+    """Delete an appointment from both doctor's bookings and patient's appointments"""
+    return delete_appointments(doctor_email, [{"patient_name": patient_name, "time": time}])
+
+def delete_appointments(doctor_email: str, appointments: List[Dict]) -> bool:
+    """Delete several of a doctor's appointments ({patient_name, time} each) in one transaction"""
+    conn = get_connection()
+    with conn:
+        if conn.execute("SELECT 1 FROM doctors WHERE email = ?", (doctor_email,)).fetchone() is None:
+            return False
+
+        for appointment in appointments:
+            patient_name, time = appointment["patient_name"], appointment["time"]
+            conn.execute(
+                "DELETE FROM bookings WHERE doctor_email = ? AND patient_name = ? AND time = ?",
+                (doctor_email, patient_name, time)
+            )
+
+            # Find patient by name since we might not have email for booking-only patients;
+            # several patients may share a name, so pick the one holding this appointment
+            patient = conn.execute(
+                "SELECT p.email FROM patients p JOIN appointments a ON a.patient_email = p.email "
+                "WHERE p.name = ? AND a.doctor_email = ? AND a.time = ? ORDER BY p.rowid LIMIT 1",
+                (patient_name, doctor_email, time)
+            ).fetchone()
+            if patient:
+                conn.execute(
+                    "DELETE FROM appointments WHERE patient_email = ? AND doctor_email = ? AND time = ?",
+                    (patient["email"], doctor_email, time)
+                )
+
+    # Return true even if patient record wasn't found (they might be booking-only)
+    return True
+
+def add_patient_record(patient_email: str, field: str, record: Dict) -> bool:
+    """Append a record (medication, purchase, inquiry, ...) to one of a patient's lists"""
+    if field not in PATIENT_LIST_TABLES:
+        print(f"Error: Unknown patient record type {field}.")
+        return False
+
+    conn = get_connection()
+    try:
+        with conn:
+            patient = conn.execute("SELECT email FROM patients WHERE email = ?", (patient_email.strip(),)).fetchone()
+            if not patient:
+                print(f"Error: Patient with email {patient_email} not found.")
+                return False
+            _insert_list_record(conn, patient["email"], field, record)
+        return True
+    except sqlite3.Error as e:
+        print(f"Error writing to patient database: {str(e)}")
+        return False
+
+def add_patient_records(patient_email: str, field: str, records: List[Dict]) -> bool:
+    """Append several records to one of a patient's lists in a single transaction"""
+    if field not in PATIENT_LIST_TABLES:
+        print(f"Error: Unknown patient record type {field}.")
+        return False
+
+    conn = get_connection()
+    try:
+        with conn:
+            patient = conn.execute("SELECT email FROM patients WHERE email = ?", (patient_email.strip(),)).fetchone()
+            if not patient:
+                print(f"Error: Patient with email {patient_email} not found.")
+                return False
+            for record in records:
+                _insert_list_record(conn, patient["email"], field, record)
+        return True
+    except sqlite3.Error as e:
+        print(f"Error writing to patient database: {str(e)}")
+        return False
+
+def update_patient_record(patient_email: str, field: str, name: str, changes: Dict) -> bool:
+    """Update the first record with the given name in one of a patient's lists"""
+    if field not in PATIENT_LIST_TABLES:
+        print(f"Error: Unknown patient record type {field}.")
+        return False
+
+    table, columns = PATIENT_LIST_TABLES[field]
+    changed_columns = [column for column in changes if column in columns]
+    if not changed_columns:
+        return True
+
+    conn = get_connection()
+    try:
+        with conn:
+            row = conn.execute(
+                f"SELECT id FROM {table} WHERE patient_email = ? AND name = ? ORDER BY id LIMIT 1",
+                (patient_email.strip(), name)
+            ).fetchone()
+            if not row:
+                print(f"Error: Record {name} not found in {field} for patient {patient_email}.")
+                return False
+            conn.execute(
+                f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in changed_columns)} WHERE id = ?",
+                _to_row_values(changed_columns, changes) + [row["id"]]
+            )
+        return True
+    except sqlite3.Error as e:
+        print(f"Error writing to patient database: {str(e)}")
+        return False
+
+def migrate_from_json(doctor_db_path: str = None, patient_db_path: str = None) -> bool:
+    """
+    One-shot import of doctor_details.json and patient_details.json into SQLite.
+
+    Existing SQLite records with the same email are replaced.
+
+    Args:
+        doctor_db_path (str): Path to the doctor JSON file. Defaults to the JSON backend's path.
+        patient_db_path (str): Path to the patient JSON file. Defaults to the JSON backend's path.
+
+    Returns:
+        bool: True if the migration was successful, False otherwise.
+    """
+    from .database_utils import DOCTOR_DB_PATH, PATIENT_DB_PATH
+
+    doctor_db_path = doctor_db_path or DOCTOR_DB_PATH
+    patient_db_path = patient_db_path or PATIENT_DB_PATH
+
+    def load(path):
+        if not os.path.exists(path):
+            print(f"Skipping missing file: {path}")
+            return []
+        with open(path, 'r') as f:
+            content = f.read().strip()
+        return json.loads(content) if content else []
+
+    try:
+        doctors = load(doctor_db_path)
+        patients = load(patient_db_path)
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Error reading JSON database: {str(e)}")
+        return False
+
+    conn = get_connection()
+    try:
+        with conn:
+            for doctor in doctors:
+                conn.execute("DELETE FROM doctors WHERE email = ?", (doctor.get("email"),))
+                _insert_doctor(conn, doctor)
+            for patient in patients:
+                conn.execute("DELETE FROM patients WHERE email = ?", (patient.get("email"),))
+                _insert_patient(conn, patient)
+    except sqlite3.Error as e:
+        print(f"Error migrating to SQLite: {str(e)}")
+        return False
+
+    print(f"Migrated {len(doctors)} doctors and {len(patients)} patients to {SQLITE_DB_PATH}")
+    return True
+
+if __name__ == "__main__":
+    migrate_from_json()
@@ -0,0 +1,297 @@
+import hashlib
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from . import serializer
+from .json_store import replace_file
+
+# Bumped whenever the saved layout changes, so older index files are rebuilt
+INDEX_FORMAT_VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the set of three-character substrings of a text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def texts_digest(texts: Iterable[Sequence[str]]) -> str:
+    """Fingerprint the indexed texts, so a saved index is only reused for the same catalog text"""
+    digest = hashlib.sha1()
+    for fields in texts:
+        digest.update("\x1f".join(fields).encode('utf-8'))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def stem(word: str) -> str:
+    """Strip common English inflections, so "eyes"/"eye" and "sneezing"/"sneeze" compare equal"""
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("sses"):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            word = word[:-len(suffix)]
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def normalize_phrase(text: str) -> Tuple[str, ...]:
+    """Split a short phrase into lowercased, stemmed words ("Itchy Eyes" -> ("itchy", "eye"))"""
+    return tuple(stem(word) for word in _WORD.findall(str(text).lower().replace("'", "")))
+
+
+class PhraseIndex:
+    """
+    Inverted index over the short phrases (e.g. symptoms) that records list.
+
+    Each distinct phrase is kept once, with the set of record positions
+    listing it; each word maps to the phrases containing it. A query phrase
+    matches the catalog phrases holding all of its words (or exactly its
+    words), found by intersecting the (small) word postings, and the records
+    are the union of their position sets.
+    """
+
+    def __init__(self):
+        self.records: Dict[str, Set[int]] = {}
+        self.normalized: Dict[str, Tuple[str, ...]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def build(cls, phrase_lists: Sequence[Iterable[str]]) -> "PhraseIndex":
+        """Index the phrases of each record (the record's position is its id)"""
+        index = cls()
+        for position, phrases in enumerate(phrase_lists):
+            for phrase in phrases:
+                if not isinstance(phrase, str):
+                    continue
+                phrase = phrase.lower().strip()
+                if phrase not in index.records:
+                    index.records[phrase] = set()
+                    index.normalized[phrase] = normalize_phrase(phrase)
+                    for word in index.normalized[phrase]:
+                        index.postings.setdefault(word, set()).add(phrase)
+                index.records[phrase].add(position)
+        return index
+
+    def lookup(self, phrase: str, exact: bool = False) -> Set[int]:
+        """
+        Return the positions of the records listing a phrase that contains all words of the
+        query ("pain" finds "back pain"), or with exact=True the same words only.
+        """
+        query = normalize_phrase(phrase)
+        if not query:
+            return set()
+        lists = sorted((self.postings.get(word, set()) for word in set(query)), key=len)
+        phrases = set(lists[0])
+        for other in lists[1:]:
+            phrases &= other
+        if exact:
+            phrases = {p for p in phrases if self.normalized[p] == query}
+        return set().union(*(self.records[p] for p in phrases))
+
+    def lookup_substring(self, text: str) -> Set[int]:
+        """Return the positions of the records listing a phrase that contains text (scans the distinct phrases)"""
+        text = text.lower().strip()
+        return set().union(*(positions for phrase, positions in self.records.items() if text in phrase))
+
+
+class BM25Index:
+    """
+    Okapi BM25 ranking over records made of several text fields.
+
+    Words are normalized with normalize_phrase. A field's words count with
+    the field's weight (a word in the name counts more than one in the
+    description), both for term frequency and for the record length used in
+    length normalization. Postings map each word to (position, weighted
+    frequency) pairs, so a query only touches the records sharing a word
+    with it.
+    """
+
+    def __init__(self, postings: Dict[str, List[Tuple[int, float]]], lengths: List[float], k1: float = 1.2, b: float = 0.75):
+        self.postings = postings
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        self.average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, records: Sequence[Sequence[str]], weights: Sequence[float], **params) -> "BM25Index":
+        """Index the field texts of each record (the record's position is its id)"""
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        lengths = []
+        for position, fields in enumerate(records):
+            frequencies: Dict[str, float] = {}
+            for text, weight in zip(fields, weights):
+                for word in normalize_phrase(text):
+                    frequencies[word] = frequencies.get(word, 0.0) + weight
+            for word, frequency in frequencies.items():
+                postings.setdefault(word, []).append((position, frequency))
+            lengths.append(sum(frequencies.values()))
+        return cls(postings, lengths, **params)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[float, int]]:
+        """Return (score, position) of the records sharing a word with query, best first (ties by position)"""
+        count = len(self.lengths)
+        scores: Dict[int, float] = {}
+        for word in set(normalize_phrase(query)):
+            postings = self.postings.get(word)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[position] / (self.average_length or 1))
+                scores[position] = scores.get(position, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        ranked = sorted(((score, position) for position, score in scores.items()), key=lambda item: (-item[0], item[1]))
+        return ranked[:limit] if limit is not None else ranked
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Levenshtein distance between two strings.
+
+    With a limit, gives up as soon as the distance must exceed it and returns limit + 1.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree of words, for finding the words within an edit distance of a query.
+
+    Each child hangs off its parent at their distance; by the triangle
+    inequality a search only descends into children whose distance lies
+    within max_distance of the query's distance to the parent, so most of
+    the vocabulary is never compared.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        """Add a word (duplicates are ignored)"""
+        if self._root is None:
+            self._root = (word, {})
+            return
+        node = self._root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """Return (distance, word) for the words within max_distance of word, closest first"""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                found.append((distance, node_word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to the positions of the records whose text contains them.
+
+    Each record is a tuple of (already lowercased) field texts. Trigrams are
+    taken per field, never across field boundaries. A substring query of three
+    or more characters can only match records holding every one of its
+    trigrams, so the intersection of their postings is a small candidate set
+    that the caller verifies with a plain ``in`` check. Shorter queries have no
+    trigrams and must be answered by a scan.
+    """
+
+    def __init__(self, postings: Dict[str, List[int]], digest: str):
+        self.postings = postings
+        self.digest = digest
+
+    @classmethod
+    def build(cls, texts: Sequence[Sequence[str]], digest: Optional[str] = None) -> "TrigramIndex":
+        """Index the field texts of each record (the record's position is its id)"""
+        postings: Dict[str, List[int]] = {}
+        for position, fields in enumerate(texts):
+            grams = set()
+            for text in fields:
+                grams |= trigrams(text)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        return cls(postings, digest if digest is not None else texts_digest(texts))
+
+    def candidates(self, query: str) -> Optional[List[int]]:
+        """
+        Return the positions (ascending) of the records that may contain query.
+
+        Returns None when the query is too short to use the index.
+        """
+        grams = trigrams(query)
+        if not grams:
+            return None
+
+        lists = sorted((self.postings.get(gram, []) for gram in grams), key=len)
+        if not lists[0]:
+            return []
+        positions = set(lists[0])
+        for other in lists[1:]:
+            positions.intersection_update(other)
+            if not positions:
+                return []
+        return sorted(positions)
+
+    def save(self, path: str):
+        """Write the index to disk (atomically) for the next process to load"""
+        payload = serializer.dumps({
+            "version": INDEX_FORMAT_VERSION,
+            "digest": self.digest,
+            "postings": self.postings,
+        })
+        replace_file(path, payload)
+
+    @classmethod
+    def load(cls, path: str, digest: str) -> Optional["TrigramIndex"]:
+        """Load a saved index, or return None if it is missing, unreadable or built from other text"""
+        if not os.path.exists(path):
+            return None
+        try:
+            data = serializer.load_file(path)
+        except (IOError, *serializer.DecodeError) as e:
+            print(f"Warning: Ignoring unreadable search index {path}: {str(e)}")
+            return None
+        if not isinstance(data, dict) or data.get("version") != INDEX_FORMAT_VERSION or data.get("digest") != digest:
+            return None
+        return cls(data["postings"], digest)
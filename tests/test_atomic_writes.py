@@ -0,0 +1,85 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from medical_agent.utils import json_store, serializer
+from medical_agent.utils.json_store import JsonStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JsonStore(str(tmp_path / "doctor_details.json"), "doctor", key="email", commit_window=0.05)
+    assert store.write([{"email": "a@example.com", "name": "A"}])
+    return store
+
+
+def write_concurrently(store, count):
+    """Have count threads put one record each at once; returns their results"""
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def writer(i):
+        start.wait()
+        results[i] = store.put({"email": f"w{i}@example.com", "name": f"W{i}"})
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_writes_share_flushes(store, monkeypatch):
+    flushes = []
+    write_snapshot = store._write_snapshot
+    monkeypatch.setattr(store, "_write_snapshot", lambda payload: flushes.append(payload) or write_snapshot(payload))
+
+    assert write_concurrently(store, 8) == [True] * 8
+    assert len(flushes) < 8
+    assert len(serializer.load_file(store.path)) == 9
+
+
+def test_snapshot_has_a_matching_checksum(store):
+    with open(store.path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    with open(store.checksum_path) as f:
+        assert f.read() == digest
+
+
+def test_failed_flush_fails_every_writer_in_the_group(store, monkeypatch):
+    def broken(path, payload):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_replace_file", broken)
+    assert write_concurrently(store, 4) == [False] * 4
+
+    # The disk and, after the cache was dropped, the store still hold the old records
+    monkeypatch.undo()
+    assert serializer.load_file(store.path) == [{"email": "a@example.com", "name": "A"}]
+    assert store.read() == [{"email": "a@example.com", "name": "A"}]
+    assert store.put({"email": "b@example.com", "name": "B"})
+    assert len(serializer.load_file(store.path)) == 2
+
+
+def test_failed_replace_keeps_the_old_file_and_no_temp_file(store, monkeypatch):
+    def broken_replace(source, target):
+        raise OSError("rename failed")
+
+    monkeypatch.setattr(json_store.os, "replace", broken_replace)
+    assert not store.put({"email": "b@example.com", "name": "B"})
+
+    monkeypatch.undo()
+    directory = os.path.dirname(store.path)
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    assert serializer.load_file(store.path) == [{"email": "a@example.com", "name": "A"}]
+
+
+def test_outside_edit_is_reported_by_the_checksum(store, capsys):
+    with open(store.path, "w") as f:
+        f.write('[{"email": "x@example.com"}]')
+
+    assert JsonStore(store.path, "doctor", key="email").get("x@example.com")
+    assert "checksum mismatch" in capsys.readouterr().out
@@ -0,0 +1,89 @@
+import copy
+
+import pytest
+
+from medical_agent.utils import database_utils, sqlite_store
+
+
+@pytest.fixture
+def use_backend(tmp_path, monkeypatch):
+    """Return a function that switches to a backend with its own scratch databases"""
+    def use(name):
+        directory = tmp_path / name
+        directory.mkdir()
+        monkeypatch.setattr(database_utils, "DB_BACKEND", name)
+        monkeypatch.setattr(sqlite_store, "SQLITE_DB_PATH", str(directory / "medical_agent.db"))
+        for store, file_name in ((database_utils.doctor_store, "doctor_details.json"),
+                                 (database_utils.patient_store, "patient_details.json")):
+            monkeypatch.setattr(store, "path", str(directory / file_name))
+            store.invalidate()
+
+    yield use
+    database_utils.doctor_store.invalidate()
+    database_utils.patient_store.invalidate()
+
+
+def outcome(func, *args):
+    """Return what a call returned, or the exception it raised, as comparable data"""
+    try:
+        return "ok", copy.deepcopy(func(*args))
+    except Exception as e:
+        return type(e).__name__, str(e)
+
+
+def run_clinic_day():
+    db = database_utils
+    calls = [
+        (db.register_doctor, "Dr. Who", "who@example.com", "secret", "GP"),
+        (db.register_doctor, "Dr. Who", "WHO@example.com", "secret", "GP"),
+        (db.register_patient, "Pat", "pat@example.com", "secret", 30, ["flu"]),
+        (db.register_patient, "Pat", "pat@example.com", "secret"),
+        (db.doctor_exists, "who@example.com"),
+        (db.patient_exists, "nobody@example.com"),
+        (db.authenticate_patient, "pat@example.com", "secret"),
+        (db.authenticate_patient, "pat@example.com", "wrong"),
+        (db.authenticate_doctor, "who@example.com", "secret"),
+        (db.get_patient_by_email, "pat@example.com"),
+        (db.get_patient_by_email, "nobody@example.com"),
+        (db.add_patient_appointment, "pat@example.com", "who@example.com", "2025-01-01 10:00"),
+        (db.add_patient_appointment, "pat@example.com", "who@example.com", "2025-01-01 10:00"),
+        (db.add_patient_appointment, "pat@example.com", "who@example.com", "2025-01-01 10:15"),
+        (db.add_patient_appointment, "pat@example.com", "nobody@example.com", "2025-01-01 11:00"),
+        (db.add_patient_appointment, "nobody@example.com", "who@example.com", "2025-01-01 11:00"),
+        (db.add_booking, "who@example.com", "Walk-in", "2025-01-01 09:00", 30),
+        (db.add_booking, "who@example.com", "Walk-in", "2025-01-01 09:15"),
+        (db.get_doctor_bookings, "who@example.com"),
+        (db.get_patient_appointments, "pat@example.com"),
+        (db.delete_appointment, "who@example.com", "Pat", "2025-01-01 10:00"),
+        (db.get_doctor_bookings, "who@example.com"),
+        (db.update_patient_medical_history, "pat@example.com", ["cold"]),
+        (db.update_doctor_slots, "who@example.com", ["Mon 9-12"]),
+        (db.register_patients_bulk, [
+            {"name": "A", "email": "a@example.com", "password": "x"},
+            {"name": "B", "email": "PAT@example.com", "password": "x"},
+            {"name": "C"},
+        ]),
+        (db.get_patients_page, None, 2, ["email", "appointments"]),
+        (db.get_all_doctors,),
+    ]
+    return [outcome(func, *args) for func, *args in calls]
+
+
+def test_backends_agree_on_a_clinic_day(use_backend):
+    use_backend("json")
+    expected = run_clinic_day()
+    use_backend("sqlite")
+    actual = run_clinic_day()
+
+    for call, (want, got) in enumerate(zip(expected, actual)):
+        assert got == want, f"call {call}"
+
+
+@pytest.mark.parametrize("name", ["json", "sqlite"])
+def test_new_patients_have_the_same_fields(use_backend, name):
+    use_backend(name)
+    database_utils.register_patient("Pat", "pat@example.com", "secret")
+
+    patient = database_utils.get_patient_by_email("pat@example.com")
+    assert sorted(patient) == ["age", "appointments", "email", "medical_history", "name", "password"]
+    assert patient["appointments"] == []
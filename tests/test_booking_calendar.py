@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from medical_agent.utils.booking_calendar import (MAX_BOOKING_MINUTES, BookingCalendar, booking_duration,
+                                                  intervals_overlap, parse_booking_time)
+
+
+def calendar_of(*bookings):
+    return BookingCalendar({"time": time, "duration": duration} for time, duration in bookings)
+
+
+def test_touching_bookings_do_not_clash():
+    calendar = calendar_of(("2025-01-01-10:00", 60))
+    assert calendar.conflict("2025-01-01-11:00", 30) is None
+    assert calendar.conflict("2025-01-01-09:00", 60) is None
+    assert calendar.conflict("2025-01-01-09:01", 60) == "2025-01-01-10:00"
+    assert calendar.conflict("2025-01-01-10:59", 30) == "2025-01-01-10:00"
+
+
+def test_point_bookings():
+    calendar = calendar_of(("2025-01-01-10:00", None))
+    # Only the same minute clashes with a point booking...
+    assert calendar.conflict("2025-01-01-10:00") == "2025-01-01-10:00"
+    assert calendar.conflict("2025-01-01 10:00") == "2025-01-01-10:00"
+    assert calendar.conflict("2025-01-01-10:01") is None
+    # ...unless a longer booking runs over it
+    assert calendar.conflict("2025-01-01-09:30", 31) == "2025-01-01-10:00"
+    assert calendar.conflict("2025-01-01-09:30", 30) is None
+
+    calendar = calendar_of(("2025-01-01-10:00", 60))
+    assert calendar.conflict("2025-01-01-10:30") == "2025-01-01-10:00"
+    assert calendar.conflict("2025-01-01-11:00") is None
+
+
+def test_same_start_clashes_whatever_the_durations():
+    calendar = calendar_of(("2025-01-01-10:00", MAX_BOOKING_MINUTES))
+    assert calendar.conflict("2025-01-01 10:00", 0) == "2025-01-01-10:00"
+    assert calendar.conflict("2025-01-02-09:59", 1) == "2025-01-01-10:00"
+    assert calendar.conflict("2025-01-02-10:00", 1) is None
+
+
+def test_times_without_a_date_only_clash_when_identical():
+    calendar = calendar_of(("16:00", 60))
+    assert calendar.conflict("16:00") == "16:00"
+    assert calendar.conflict("16:30", 60) is None
+
+
+def test_removed_booking_frees_its_slot():
+    calendar = calendar_of(("2025-01-01-10:00", 60), ("2025-01-01-12:00", 30))
+    calendar.remove("2025-01-01-10:00", 60)
+    assert len(calendar) == 1
+    assert calendar.conflict("2025-01-01-10:30", 10) is None
+    assert calendar.conflict("2025-01-01-12:15") == "2025-01-01-12:00"
+    # Removing an unknown booking is a no-op
+    calendar.remove("2025-01-01-15:00")
+    assert len(calendar) == 1
+
+
+@pytest.mark.parametrize("duration", [-1, MAX_BOOKING_MINUTES + 1, 1.5, True, "30"])
+def test_invalid_durations_are_rejected(duration):
+    with pytest.raises(ValueError):
+        booking_duration(duration)
+
+
+def test_parse_booking_time_formats():
+    minute = parse_booking_time("2025-01-01-09:30")
+    assert minute is not None
+    for time in ("2025-01-01 at 09:30", "2025-01-01 09:30", "2025-01-01T09:30", " 2025-01-01-09:30 "):
+        assert parse_booking_time(time) == minute
+    assert parse_booking_time("09:30") is None
+    assert parse_booking_time(None) is None
+
+
+def test_conflicts_match_a_scan_of_every_booking():
+    rng = random.Random(5)
+    for _ in range(50):
+        calendar = BookingCalendar()
+        booked = []
+        for _ in range(40):
+            minute = rng.randrange(3 * 24 * 60)
+            time = f"2025-01-{1 + minute // 1440:02d}-{minute % 1440 // 60:02d}:{minute % 60:02d}"
+            duration = rng.choice([None, 0, 15, 30, 60, 240, MAX_BOOKING_MINUTES])
+            length = booking_duration(duration)
+
+            clashes = [other for other, other_start, other_length in booked
+                       if intervals_overlap(minute, length, other_start, other_length)]
+            found = calendar.conflict(time, duration)
+            if clashes:
+                assert found in clashes
+            else:
+                assert found is None
+                calendar.add(time, duration)
+                booked.append((time, minute, length))
+        assert len(calendar) == len(booked)
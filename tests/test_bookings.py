@@ -0,0 +1,41 @@
+import pytest
+
+from medical_agent.utils import database_utils
+
+
+@pytest.fixture
+def clinic(tmp_path, monkeypatch):
+    """Scratch doctor and patient stores holding one doctor and one patient"""
+    monkeypatch.setattr(database_utils, "DB_BACKEND", "json")
+    for store, name in ((database_utils.doctor_store, "doctor_details.json"),
+                        (database_utils.patient_store, "patient_details.json")):
+        monkeypatch.setattr(store, "path", str(tmp_path / name))
+        store.invalidate()
+    database_utils.register_doctor("Dr. Who", "who@example.com", "secret", "GP")
+    database_utils.register_patient("Pat", "pat@example.com", "secret")
+    yield
+    database_utils.doctor_store.invalidate()
+    database_utils.patient_store.invalidate()
+
+
+def test_failed_booking_write_is_reported(clinic, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(database_utils.doctor_store, "put", lambda record, *args, **kwargs: False)
+        with pytest.raises(ValueError, match="Failed to save booking"):
+            database_utils.add_booking("who@example.com", "Pat", "2025-01-01 10:00")
+
+    assert database_utils.get_doctor_bookings("who@example.com") == []
+
+
+def test_failed_patient_write_takes_the_booking_back(clinic, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(database_utils.patient_store, "put", lambda record, *args, **kwargs: False)
+        with pytest.raises(ValueError, match="Failed to save appointment"):
+            database_utils.add_patient_appointment("pat@example.com", "who@example.com", "2025-01-01 10:00")
+
+    database_utils.doctor_store.invalidate()
+    database_utils.patient_store.invalidate()
+    assert database_utils.get_doctor_bookings("who@example.com") == []
+    assert database_utils.get_patient_appointments("pat@example.com") == []
+    # The slot is free again
+    assert database_utils.add_patient_appointment("pat@example.com", "who@example.com", "2025-01-01 10:00")
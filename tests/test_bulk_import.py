@@ -0,0 +1,75 @@
+import pytest
+
+from medical_agent.utils import database_utils
+from medical_agent.utils.database_utils import build_doctor_record, build_patient_record
+
+
+@pytest.fixture
+def patient_db(tmp_path, monkeypatch):
+    """Point the patient store at an empty scratch directory"""
+    store = database_utils.patient_store
+    monkeypatch.setattr(database_utils, "DB_BACKEND", "json")
+    monkeypatch.setattr(store, "path", str(tmp_path / "patient_details.json"))
+    store.invalidate()
+    yield store
+    store.invalidate()
+
+
+def patient_row(**changes):
+    row = {"name": "Pat", "email": "pat@example.com", "password": "secret"}
+    row.update(changes)
+    return row
+
+
+@pytest.mark.parametrize("email", [42, None, 3.5, ["pat@example.com"]])
+def test_patient_row_with_non_text_email_is_rejected(email):
+    with pytest.raises(ValueError):
+        build_patient_record(patient_row(email=email))
+
+
+def test_doctor_row_with_non_text_email_is_rejected():
+    with pytest.raises(ValueError):
+        build_doctor_record({"name": "Doc", "email": 7, "password": "secret", "specialization": "GP"})
+
+
+def test_row_that_is_not_an_object_is_rejected():
+    with pytest.raises(ValueError):
+        build_patient_record(["Pat", "pat@example.com", "secret"])
+
+
+def test_single_string_medical_history_becomes_one_item():
+    record = build_patient_record(patient_row(medical_history="asthma"))
+    assert record["medical_history"] == ["asthma"]
+
+
+def test_medical_history_list_is_kept():
+    record = build_patient_record(patient_row(medical_history=["asthma", "hypertension"]))
+    assert record["medical_history"] == ["asthma", "hypertension"]
+
+
+@pytest.mark.parametrize("history", [42, {"asthma": True}, ["asthma", 3]])
+def test_invalid_medical_history_is_rejected(history):
+    with pytest.raises(ValueError):
+        build_patient_record(patient_row(medical_history=history))
+
+
+def test_single_string_slots_become_one_item():
+    record = build_doctor_record({"name": "Doc", "email": "doc@example.com", "password": "secret",
+                                  "specialization": "GP", "Slots_available": "2025-01-01-09:00"})
+    assert record["Slots_available"] == ["2025-01-01-09:00"]
+
+
+def test_bulk_import_reports_bad_rows_and_keeps_the_rest(patient_db):
+    rows = [
+        patient_row(email="a@example.com", medical_history="asthma"),
+        patient_row(email=12345),
+        patient_row(email=None),
+        "not an object",
+        patient_row(email="b@example.com"),
+    ]
+
+    result = database_utils.register_patients_bulk(rows)
+
+    assert [record["email"] for record in result["registered"]] == ["a@example.com", "b@example.com"]
+    assert [error["index"] for error in result["errors"]] == [1, 2, 3]
+    assert database_utils.get_patient_by_email("a@example.com")["medical_history"] == ["asthma"]
@@ -0,0 +1,112 @@
+import shutil
+import threading
+
+import pytest
+
+from medical_agent.utils import database_utils, medicine_tool, serializer
+from medical_agent.utils.inventory import whole_quantity
+
+BUYERS = 4
+THREADS = 12
+ROUNDS = 25
+
+
+@pytest.fixture
+def shop(tmp_path, monkeypatch):
+    """A scratch catalog and patient store with a few registered buyers"""
+    catalog = medicine_tool.medicine_store
+    patients = database_utils.patient_store
+    monkeypatch.setattr(database_utils, "DB_BACKEND", "json")
+    monkeypatch.setattr(catalog, "path", str(tmp_path / "medicines.json"))
+    monkeypatch.setattr(patients, "path", str(tmp_path / "patient_details.json"))
+    shutil.copy(medicine_tool.MEDICINE_DB_PATH, catalog.path)
+    catalog.invalidate()
+    patients.invalidate()
+    for i in range(BUYERS):
+        assert database_utils.register_patient(f"Buyer {i}", f"buyer{i}@example.com", "secret")
+    yield catalog
+    catalog.invalidate()
+    patients.invalidate()
+
+
+def on_disk(catalog, names):
+    """Stock and purchased quantities as written to the files"""
+    database_utils.flush_pending_writes()
+    catalog.invalidate()
+    database_utils.patient_store.invalidate()
+    stock = {name: medicine_tool.get_medicine_quantity(name) for name in names}
+    bought = dict.fromkeys(names, 0)
+    for i in range(BUYERS):
+        for purchase in database_utils.get_patient_by_email(f"buyer{i}@example.com").get("purchased_medicines", []):
+            bought[purchase["name"]] += purchase["quantity"]
+    return stock, bought
+
+
+def run_threads(target):
+    threads = [threading.Thread(target=target, args=(worker,)) for worker in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@pytest.mark.parametrize("quantity, expected", [(2, 2), (2.0, 2), (2.5, None), (0, None), (-1, None),
+                                                (True, None), ("2", None)])
+def test_whole_quantity(quantity, expected):
+    assert whole_quantity(quantity) == expected
+
+
+def test_whole_float_quantities_work_for_single_and_cart_purchases(shop):
+    before = medicine_tool.get_medicine_quantity("Aspirin")
+    assert medicine_tool.purchase_medicine("buyer0@example.com", "Aspirin", 2.0)
+    assert medicine_tool.purchase_medicines("buyer0@example.com", [{"name": "Aspirin", "quantity": 1.0}])["success"]
+    assert not medicine_tool.purchase_medicine("buyer0@example.com", "Aspirin", 1.5)
+
+    stock, bought = on_disk(shop, ["Aspirin"])
+    assert stock["Aspirin"] == before - 3
+    assert bought["Aspirin"] == 3
+
+
+def test_concurrent_purchases_never_oversell(shop):
+    names = [medicine["name"] for medicine in serializer.load_file(shop.path)[:3]]
+    start = {name: medicine_tool.get_medicine_quantity(name) for name in names}
+    sold = dict.fromkeys(names, 0)
+    sold_lock = threading.Lock()
+
+    def buyer(worker):
+        email = f"buyer{worker % BUYERS}@example.com"
+        for i in range(ROUNDS):
+            first, second = names[(worker + i) % 3], names[(worker + i + 1) % 3]
+            quantity = 1 + i % 3
+            if i % 2:
+                receipt = medicine_tool.purchase_medicines(
+                    email, [{"name": first, "quantity": quantity}, {"name": second, "quantity": 1}])
+                bought = [(item["name"], item["quantity"]) for item in receipt.get("items", [])]
+            else:
+                bought = [(first, quantity)] if medicine_tool.purchase_medicine(email, first, quantity) else []
+            with sold_lock:
+                for name, count in bought:
+                    sold[name] += count
+
+    run_threads(buyer)
+
+    stock, recorded = on_disk(shop, names)
+    for name in names:
+        assert stock[name] >= 0
+        assert medicine_tool.inventory.reserved(name) == 0
+        assert start[name] - stock[name] == sold[name] == recorded[name]
+    # The load is big enough to sell at least one medicine out
+    assert any(stock[name] < 4 for name in names)
+
+
+def test_cart_reports_unknown_names_and_short_stock_together(shop):
+    before = medicine_tool.get_medicine_quantity("Ibuprofen")
+    receipt = medicine_tool.MedicineTool.purchase_medicines_tool(
+        "buyer0@example.com", ["Ibuprofen", "Qwertyzine"], [before + 1, 1])
+
+    assert not receipt["success"]
+    assert len(receipt["errors"]) == 2
+    assert receipt["errors"][0].startswith("Medicine 'Qwertyzine' not found.")
+    assert receipt["errors"][1] == "Not enough quantity available for medicine Ibuprofen."
+    assert medicine_tool.inventory.reserved("Ibuprofen") == 0
+    assert medicine_tool.get_medicine_quantity("Ibuprofen") == before
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from medical_agent.utils import serializer
+from medical_agent.utils.json_store import JsonStore
+
+
+def open_store(path, **options):
+    """A fresh store on the files, as a restarted process would see them"""
+    return JsonStore(str(path), "patient", key="email", journal=True, **options)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "patient_details.json"
+    store = open_store(path)
+    assert store.write([{"email": "a@example.com", "visits": 0}])
+    return path
+
+
+def test_journaled_changes_survive_a_restart(path):
+    store = open_store(path)
+    assert store.put({"email": "a@example.com", "visits": 1})
+    assert store.put({"email": "b@example.com", "visits": 0})
+
+    # Only the journal was appended; the snapshot still holds the old record
+    assert serializer.load_file(str(path)) == [{"email": "a@example.com", "visits": 0}]
+    assert open_store(path).read() == [{"email": "a@example.com", "visits": 1}, {"email": "b@example.com", "visits": 0}]
+
+
+def test_torn_last_entry_is_dropped(path):
+    store = open_store(path)
+    assert store.put({"email": "a@example.com", "visits": 1})
+    with open(store.journal_path, "ab") as f:
+        f.write(b'{"op": "put", "key": "a@example.com", "record": {"email": "a@exa')
+
+    assert open_store(path).get("a@example.com")["visits"] == 1
+
+
+def test_corrupt_entry_in_the_middle_is_skipped(path, capsys):
+    store = open_store(path)
+    assert store.put({"email": "a@example.com", "visits": 1})
+    with open(store.journal_path, "ab") as f:
+        f.write(b"garbage\n")
+    assert store.put({"email": "b@example.com", "visits": 2})
+
+    restarted = open_store(path)
+    assert restarted.get("a@example.com")["visits"] == 1
+    assert restarted.get("b@example.com")["visits"] == 2
+    assert "Skipping corrupt patient journal entry at line 2" in capsys.readouterr().out
+
+
+def test_crash_between_compaction_steps_loses_nothing(path):
+    store = open_store(path)
+    for visits in range(1, 4):
+        assert store.put({"email": "a@example.com", "visits": visits})
+    assert store.put({"email": "b@example.com", "visits": 0})
+    with open(store.journal_path, "rb") as f:
+        journal = f.read()
+
+    assert store.compact()
+    assert open_store(path).read() == store.read()
+    # The process died after writing the snapshot but before truncating the journal
+    with open(store.journal_path, "wb") as f:
+        f.write(journal)
+
+    assert open_store(path).read() == [{"email": "a@example.com", "visits": 3}, {"email": "b@example.com", "visits": 0}]
+
+
+def test_large_journal_is_compacted_in_the_background(path):
+    store = open_store(path, compact_threshold=512)
+    for i in range(20):
+        assert store.put({"email": f"patient{i}@example.com", "visits": i})
+
+    deadline = time.monotonic() + 5
+    while store._compacting and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # The journaled records were folded into the snapshot
+    assert len(serializer.load_file(str(path))) > 1
+    assert len(open_store(path).read()) == 21
@@ -0,0 +1,65 @@
+import pytest
+
+from medical_agent.utils import database_utils
+from medical_agent.utils.sharded_store import ShardedJsonStore
+
+
+@pytest.fixture(params=["single-file", "sharded"])
+def patients(request, tmp_path, monkeypatch):
+    """A scratch patient store (single file or sharded) holding ten patients"""
+    monkeypatch.setattr(database_utils, "DB_BACKEND", "json")
+    if request.param == "sharded":
+        store = ShardedJsonStore(str(tmp_path / "patients"), "patient", key="email", index_fields=("name",))
+        monkeypatch.setattr(database_utils, "patient_store", store)
+    else:
+        store = database_utils.patient_store
+        monkeypatch.setattr(store, "path", str(tmp_path / "patient_details.json"))
+        store.invalidate()
+    for i in range(10):
+        database_utils.register_patient(f"Patient {i}", f"patient{i}@example.com", "secret")
+    yield store
+    store.invalidate()
+
+
+def emails(page):
+    return [patient["email"] for patient in page["patients"]]
+
+
+def remove_patients(*removed):
+    database_utils.write_patient_db([patient for patient in database_utils.read_patient_db()
+                                     if patient["email"] not in removed])
+
+
+def test_pages_cover_every_patient_once(patients):
+    assert [patient["email"] for patient in database_utils.iter_patients(page_size=3)] == \
+        [f"patient{i}@example.com" for i in range(10)]
+
+
+def test_insert_between_pages_skips_and_repeats_nothing(patients):
+    first = database_utils.get_patients_page(page_size=4)
+    database_utils.register_patient("Late", "late@example.com", "secret")
+    rest = database_utils.get_patients_page(first["next_cursor"], page_size=20)
+
+    assert emails(first) + emails(rest) == [f"patient{i}@example.com" for i in range(10)] + ["late@example.com"]
+
+
+def test_delete_before_the_cursor_skips_nothing(patients):
+    first = database_utils.get_patients_page(page_size=4)
+    remove_patients("patient0@example.com", "patient1@example.com")
+    rest = database_utils.get_patients_page(first["next_cursor"], page_size=20)
+
+    assert emails(rest) == [f"patient{i}@example.com" for i in range(4, 10)]
+
+
+def test_delete_of_the_last_record_served_skips_nothing(patients):
+    first = database_utils.get_patients_page(page_size=4)
+    remove_patients("patient3@example.com")
+    rest = database_utils.get_patients_page(first["next_cursor"], page_size=20)
+
+    assert emails(rest) == [f"patient{i}@example.com" for i in range(4, 10)]
+
+
+@pytest.mark.parametrize("cursor", ["zz", "3", ":x", "x:patient1@example.com"])
+def test_malformed_cursor_is_rejected(patients, cursor):
+    with pytest.raises(ValueError):
+        database_utils.get_patients_page(cursor)
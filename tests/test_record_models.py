@@ -0,0 +1,50 @@
+import json
+import shutil
+
+import pytest
+
+from medical_agent.utils import medicine_tool, serializer
+from medical_agent.utils.models import Medicine
+
+
+@pytest.fixture
+def record_catalog(tmp_path, monkeypatch):
+    """A scratch catalog cached as Medicine records"""
+    store = medicine_tool.medicine_store
+    monkeypatch.setattr(medicine_tool, "MEDICINE_RECORD_MODELS", True)
+    monkeypatch.setattr(store, "record_type", Medicine)
+    monkeypatch.setattr(store, "path", str(tmp_path / "medicines.json"))
+    shutil.copy(medicine_tool.MEDICINE_DB_PATH, store.path)
+    store.invalidate()
+    yield store
+    store.invalidate()
+
+
+def test_medicine_records_round_trip_to_the_stored_dicts():
+    for medicine in serializer.load_file(medicine_tool.MEDICINE_DB_PATH):
+        assert Medicine.from_dict(medicine).to_dict() == medicine
+
+
+def test_catalog_is_cached_as_records(record_catalog):
+    assert all(isinstance(medicine, Medicine) for medicine in medicine_tool.load_medicines())
+    assert isinstance(medicine_tool.find_medicine_by_name("paracetamol"), Medicine)
+
+
+@pytest.mark.parametrize("view", ["summary", "full"])
+def test_tools_return_plain_dicts(record_catalog, view):
+    results = medicine_tool.MedicineTool.get_medicines_tool(search_query="pain", view=view)
+    by_symptom = medicine_tool.MedicineTool.get_medicines_by_symptoms_tool(["fever", "cough"], view=view)
+
+    assert results and by_symptom
+    for medicine in results + by_symptom:
+        assert type(medicine) is dict
+    json.dumps(results + by_symptom)
+
+
+def test_stock_changes_are_saved_from_records(record_catalog):
+    before = medicine_tool.get_medicine_quantity("Aspirin")
+    assert medicine_tool.update_medicine_quantity("Aspirin", -1)
+
+    saved = {medicine["name"]: medicine for medicine in serializer.load_file(record_catalog.path)}
+    assert saved["Aspirin"]["quantity"] == before - 1
+    assert "extra" not in saved["Aspirin"]
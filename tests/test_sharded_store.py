@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+from medical_agent.utils import serializer
+from medical_agent.utils.sharded_store import ShardedJsonStore
+
+PATIENTS = [{"email": f"p{i}@example.com", "name": f"Patient {i}"} for i in range(5)]
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    path = tmp_path / "patient_details.json"
+    path.write_text(json.dumps(PATIENTS))
+    return str(path)
+
+
+def open_store(tmp_path, legacy=None):
+    return ShardedJsonStore(str(tmp_path / "patients"), "patient", key="email", legacy_path=legacy)
+
+
+def manifest_keys(store):
+    with open(store.manifest_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_legacy_records_are_migrated_on_first_use(tmp_path, legacy):
+    store = open_store(tmp_path, legacy)
+
+    assert store.read() == PATIENTS
+    assert manifest_keys(store) == [p["email"] for p in PATIENTS]
+    for patient in PATIENTS:
+        assert serializer.load_file(store.shard_path(patient["email"])) == patient
+    # The single-file database is left alone
+    assert json.loads(open(legacy).read()) == PATIENTS
+
+
+def test_migration_runs_once(tmp_path, legacy):
+    open_store(tmp_path, legacy).put({"email": "new@example.com", "name": "New"})
+
+    # A fresh process must not migrate (and lose the new record) again
+    store = open_store(tmp_path, legacy)
+    assert [p["email"] for p in store.read()] == [p["email"] for p in PATIENTS] + ["new@example.com"]
+
+
+def test_interrupted_migration_runs_again(tmp_path, legacy):
+    store = open_store(tmp_path, legacy)
+    store.read()
+    # Shards were written but the manifest, written last, never made it
+    os.remove(store.manifest_path)
+
+    assert open_store(tmp_path, legacy).read() == PATIENTS
+
+
+def test_unreadable_legacy_database_creates_no_manifest(tmp_path):
+    legacy = tmp_path / "patient_details.json"
+    legacy.write_text("[{not json")
+    store = open_store(tmp_path, str(legacy))
+
+    assert not store.ensure_initialized()
+    assert not store.put({"email": "a@example.com"})
+    assert not os.path.exists(store.manifest_path)
+
+    # Once the file is fixed, the next call migrates it
+    legacy.write_text(json.dumps(PATIENTS))
+    assert store.read() == PATIENTS
+
+
+def test_write_rebuilds_the_manifest_without_removed_keys(tmp_path, legacy):
+    store = open_store(tmp_path, legacy)
+    kept = PATIENTS[::2]
+
+    assert store.write(kept)
+    assert manifest_keys(store) == [p["email"] for p in kept]
+    assert not os.path.exists(store.shard_path(PATIENTS[1]["email"]))
+    assert open_store(tmp_path, legacy).read() == kept
+
+
+def test_rewritten_manifest_is_reread_by_other_stores(tmp_path, legacy):
+    reader = open_store(tmp_path, legacy)
+    assert len(reader.read()) == 5
+
+    open_store(tmp_path, legacy).write(PATIENTS[:2])
+    assert reader.read() == PATIENTS[:2]
+    assert reader.get(PATIENTS[3]["email"]) is None
+
+
+def test_corrupt_and_torn_manifest_lines_are_skipped(tmp_path, legacy, capsys):
+    store = open_store(tmp_path, legacy)
+    store.read()
+    with open(store.manifest_path, "ab") as f:
+        f.write(b"{broken\n" + json.dumps(PATIENTS[0]["email"]).encode())
+
+    other = open_store(tmp_path, legacy)
+    assert other.read() == PATIENTS
+    assert "corrupt patient manifest entry" in capsys.readouterr().out
+
+    # Completing the torn line makes it a (duplicate, so ignored) entry
+    with open(store.manifest_path, "ab") as f:
+        f.write(b"\n")
+    assert other.read() == PATIENTS
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from medical_agent.utils import sqlite_store
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Point the SQLite backend at a scratch database"""
+    monkeypatch.setattr(sqlite_store, "SQLITE_DB_PATH", str(tmp_path / "medical_agent.db"))
+    yield sqlite_store
+
+
+def patient_rows(count):
+    return [{"name": f"Patient {i}", "email": f"patient{i}@example.com", "password": "secret"}
+            for i in range(count)]
+
+
+def test_concurrent_bulk_imports_reject_duplicates_row_by_row(sqlite_db):
+    results = []
+
+    def importer():
+        results.append(sqlite_db.register_patients_bulk(patient_rows(100)))
+
+    threads = [threading.Thread(target=importer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    assert sum(len(result["registered"]) for result in results) == 100
+    for result in results:
+        assert len(result["registered"]) + len(result["errors"]) == 100
+    assert len(sqlite_db.get_all_patients()) == 100
+
+
+def test_bulk_import_rejects_rows_without_a_text_email(sqlite_db):
+    result = sqlite_db.register_patients_bulk([
+        {"name": "No Email", "password": "secret"},
+        {"name": "Number", "email": 5, "password": "secret"},
+        {"name": "Pat", "email": "pat@example.com", "password": "secret"},
+    ])
+
+    assert [error["index"] for error in result["errors"]] == [0, 1]
+    assert [record["email"] for record in result["registered"]] == ["pat@example.com"]
@@ -0,0 +1,45 @@
+import pytest
+
+from medical_agent.utils import medicine_tool, serializer
+from medical_agent.utils.medicine_tool import MEDICINE_DB_PATH, _symptom_matches, get_medicines_by_symptoms
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return serializer.load_file(MEDICINE_DB_PATH)
+
+
+def substring_matches(medicines, symptom):
+    """The medicines the plain substring scan used to return"""
+    query = symptom.lower()
+    return {medicine["name"] for medicine in medicines
+            if any(query in listed.lower() for listed in medicine.get("symptoms", []))}
+
+
+def symptom_matches(medicines, symptom):
+    return {medicines[i]["name"] for i in _symptom_matches(medicines, symptom)}
+
+
+@pytest.mark.parametrize("symptom, expected", [
+    ("ache", {"Aspirin", "Ibuprofen", "Naproxen"}),
+    ("itch", {"Cetirizine", "Diphenhydramine", "Loratadine"}),
+    ("heart", {"Omeprazole", "Ranitidine"}),
+])
+def test_word_fragments_still_find_substring_matches(catalog, symptom, expected):
+    found = symptom_matches(catalog, symptom)
+    assert expected <= found
+    assert substring_matches(catalog, symptom) <= found
+
+
+@pytest.mark.parametrize("symptom", ["pain", "fever", "cough", "nausea", "allergy"])
+def test_search_finds_everything_the_substring_scan_did(catalog, symptom):
+    assert substring_matches(catalog, symptom) <= symptom_matches(catalog, symptom)
+
+
+def test_a_bare_string_counts_as_one_symptom(catalog, monkeypatch):
+    monkeypatch.setattr(medicine_tool, "load_medicines", lambda: catalog)
+    as_string = get_medicines_by_symptoms("fever")
+
+    assert as_string == get_medicines_by_symptoms(["fever"])
+    assert as_string and len(as_string) < len(catalog)
+    assert all(medicine["matched_symptoms"] == ["fever"] for medicine in as_string)
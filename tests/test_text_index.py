@@ -0,0 +1,207 @@
+import math
+import random
+import string
+
+import pytest
+
+from medical_agent.utils import medicine_tool, serializer
+from medical_agent.utils.medicine_tool import (MEDICINE_DB_PATH, RANK_FIELD_WEIGHTS, RANK_FIELDS, SEARCH_FIELDS,
+                                               medicine_lookup_names)
+from medical_agent.utils.text_index import (BKTree, BM25Index, TrigramIndex, edit_distance, normalize_phrase,
+                                            texts_digest)
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return serializer.load_file(MEDICINE_DB_PATH)
+
+
+@pytest.fixture(scope="module")
+def catalog_texts(catalog):
+    return [tuple((medicine.get(field) or "").lower() for field in SEARCH_FIELDS) for medicine in catalog]
+
+
+@pytest.fixture(scope="module")
+def vocabulary(catalog):
+    """Every folded name, generic name and alias of the catalog"""
+    return sorted({name for medicine in catalog for name in medicine_lookup_names(medicine) if name})
+
+
+def scan(texts, query):
+    """The brute-force substring search the index replaces"""
+    return [position for position, fields in enumerate(texts) if any(query in text for text in fields)]
+
+
+def indexed(index, texts, query):
+    candidates = index.candidates(query)
+    if candidates is None:
+        candidates = range(len(texts))
+    return [position for position in candidates if any(query in text for text in texts[position])]
+
+
+def sample_queries(texts, count=300, seed=7):
+    """Substrings of the catalog text (some spanning two fields' boundary), plus random strings"""
+    rng = random.Random(seed)
+    queries = ["", "a", "pa", "pain", "blood pressure", "zzz", "tion", "in fe"]
+    for _ in range(count):
+        text = " ".join(rng.choice(texts))
+        start = rng.randrange(len(text))
+        queries.append(text[start:start + rng.randint(1, 12)])
+        queries.append("".join(rng.choice(string.ascii_lowercase + " ") for _ in range(rng.randint(1, 5))))
+    return queries
+
+
+def test_trigram_search_matches_a_scan(catalog_texts):
+    index = TrigramIndex.build(catalog_texts)
+    for query in sample_queries(catalog_texts):
+        assert indexed(index, catalog_texts, query) == scan(catalog_texts, query), query
+
+
+def test_candidates_never_miss_a_match(catalog_texts):
+    index = TrigramIndex.build(catalog_texts)
+    for query in sample_queries(catalog_texts):
+        candidates = index.candidates(query)
+        if candidates is not None:
+            assert set(scan(catalog_texts, query)) <= set(candidates), query
+
+
+def test_short_queries_ask_for_a_scan(catalog_texts):
+    index = TrigramIndex.build(catalog_texts)
+    assert index.candidates("ab") is None
+    assert index.candidates("") is None
+
+
+def test_saved_index_is_reused_only_for_the_same_text(catalog_texts, tmp_path):
+    path = str(tmp_path / "medicines.json.search-index")
+    digest = texts_digest(catalog_texts)
+    TrigramIndex.build(catalog_texts, digest).save(path)
+
+    loaded = TrigramIndex.load(path, digest)
+    assert loaded is not None
+    assert indexed(loaded, catalog_texts, "pain") == scan(catalog_texts, "pain")
+    assert TrigramIndex.load(path, texts_digest(catalog_texts[1:])) is None
+    assert TrigramIndex.load(str(tmp_path / "missing"), digest) is None
+
+
+def test_unreadable_saved_index_is_ignored(tmp_path):
+    path = tmp_path / "broken.search-index"
+    path.write_text("{not json")
+    assert TrigramIndex.load(str(path), "digest") is None
+
+
+def reference_distance(a, b):
+    """Textbook Levenshtein distance over the full table"""
+    table = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            table[i][j] = min(table[i - 1][j] + 1, table[i][j - 1] + 1, table[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+    return table[-1][-1]
+
+
+def misspellings(words, count=200, seed=11):
+    """Words with up to three random edits, plus a few unrelated strings"""
+    rng = random.Random(seed)
+    queries = ["", "x", "qqqq", "zzzzzzzzzz"]
+    for _ in range(count):
+        word = list(rng.choice(words))
+        for _ in range(rng.randint(0, 3)):
+            edit, at = rng.randrange(3), rng.randrange(len(word) + 1)
+            if edit == 0:
+                word.insert(at, rng.choice(string.ascii_lowercase))
+            elif word and at < len(word):
+                if edit == 1:
+                    del word[at]
+                else:
+                    word[at] = rng.choice(string.ascii_lowercase)
+        queries.append("".join(word))
+    return queries
+
+
+def test_edit_distance_matches_the_reference(vocabulary):
+    rng = random.Random(3)
+    for query in misspellings(vocabulary, 100):
+        other = rng.choice(vocabulary)
+        expected = reference_distance(query, other)
+        assert edit_distance(query, other) == expected
+        for limit in (0, 1, 2, 3):
+            assert edit_distance(query, other, limit) == (expected if expected <= limit else limit + 1)
+
+
+def test_bk_tree_finds_the_same_words_as_a_scan(vocabulary):
+    tree = BKTree(vocabulary)
+    for query in misspellings(vocabulary, 100):
+        distances = sorted((reference_distance(query, word), word) for word in vocabulary)
+        for max_distance in (0, 1, 2, 3):
+            expected = [(distance, word) for distance, word in distances if distance <= max_distance]
+            assert tree.search(query, max_distance) == expected, (query, max_distance)
+
+
+def test_bk_tree_ignores_duplicates():
+    tree = BKTree(["aspirin", "aspirin", "asprin"])
+    assert tree.search("aspirin", 1) == [(0, "aspirin"), (1, "asprin")]
+    assert BKTree().search("aspirin", 3) == []
+
+
+def test_suggestions_name_the_misspelled_medicine(catalog, monkeypatch):
+    monkeypatch.setattr(medicine_tool, "load_medicines", lambda: catalog)
+    assert medicine_tool.suggest_medicine_names("ibuprofin")[0]["name"] == "Ibuprofen"
+    assert medicine_tool.suggest_medicine_names("amoxicilin")[0]["name"] == "Amoxicillin"
+    assert medicine_tool.suggest_medicine_names("paracetamole")[0]["name"] == "Acetaminophen"
+    assert medicine_tool.suggest_medicine_names("qqqqqqqq") == []
+
+
+def reference_bm25(records, weights, query, k1=1.2, b=0.75):
+    """Score every record with the BM25 formula directly, best first (ties by position)"""
+    frequencies = []
+    for fields in records:
+        counts = {}
+        for text, weight in zip(fields, weights):
+            for word in normalize_phrase(text):
+                counts[word] = counts.get(word, 0.0) + weight
+        frequencies.append(counts)
+    lengths = [sum(counts.values()) for counts in frequencies]
+    average = sum(lengths) / len(lengths)
+    scores = {}
+    for word in set(normalize_phrase(query)):
+        holders = [position for position, counts in enumerate(frequencies) if word in counts]
+        if not holders:
+            continue
+        idf = math.log(1 + (len(records) - len(holders) + 0.5) / (len(holders) + 0.5))
+        for position in holders:
+            tf = frequencies[position][word]
+            norm = k1 * (1 - b + b * lengths[position] / average)
+            scores[position] = scores.get(position, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return sorted(((score, position) for position, score in scores.items()), key=lambda item: (-item[0], item[1]))
+
+
+@pytest.fixture(scope="module")
+def rank_records(catalog):
+    return [[" ".join(value) if isinstance(value, list) else str(value or "")
+             for value in (medicine.get(field) for field in RANK_FIELDS)] for medicine in catalog]
+
+
+@pytest.mark.parametrize("query", ["pain", "blood pressure", "eye drops for allergies", "fever headache",
+                                   "Ibuprofen", "infection", "nothing-matches-this"])
+def test_bm25_scores_match_the_formula(rank_records, query):
+    index = BM25Index.build(rank_records, RANK_FIELD_WEIGHTS)
+    expected = reference_bm25(rank_records, RANK_FIELD_WEIGHTS, query)
+
+    found = index.search(query)
+    assert [position for _, position in found] == [position for _, position in expected]
+    assert [score for score, _ in found] == pytest.approx([score for score, _ in expected])
+    assert index.search(query, 3) == found[:3]
+
+
+def test_name_matches_rank_first(catalog, monkeypatch):
+    monkeypatch.setattr(medicine_tool, "load_medicines", lambda: catalog)
+    assert medicine_tool.rank_medicines("ibuprofen")[0]["name"] == "Ibuprofen"
+    assert len(medicine_tool.rank_medicines("pain", limit=3)) == 3
+
+
+@pytest.mark.parametrize("query", ["amox", "pain", "eye", "cough"])
+def test_unlimited_ranking_keeps_every_substring_match(catalog, monkeypatch, query):
+    monkeypatch.setattr(medicine_tool, "load_medicines", lambda: catalog)
+    ranked = [medicine["name"] for medicine in medicine_tool.rank_medicines(query, limit=None)]
+
+    assert len(ranked) == len(set(ranked))
+    assert {medicine["name"] for medicine in medicine_tool.search_medicines(query)} <= set(ranked)
@@ -0,0 +1,56 @@
+import os
+import shutil
+
+import pytest
+
+from medical_agent.utils import json_store
+from medical_agent.utils.json_store import JsonStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JsonStore(str(tmp_path / "patients.json"), "patient", key="email", journal=True, write_behind=60)
+    yield store
+    store.invalidate()
+
+
+def test_clean_store_flushes_without_taking_the_file_lock(store):
+    assert store.flush()
+    assert not os.path.exists(store.path + ".lock")
+
+
+def test_deferred_changes_reach_the_disk_on_flush(store):
+    assert store.put({"email": "a@example.com", "name": "A"})
+    assert not os.path.exists(store.journal_path)
+    assert store.flush()
+
+    reader = JsonStore(store.path, "patient", key="email", journal=True)
+    assert reader.get("A@example.com")["name"] == "A"
+
+
+def test_failed_flush_keeps_the_changes_for_a_retry(store, monkeypatch):
+    assert store.put({"email": "a@example.com", "name": "A"})
+
+    def broken(records):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write_journal", broken)
+    assert not store.flush()
+    assert store.get("a@example.com")["name"] == "A"
+
+    monkeypatch.undo()
+    assert store.flush()
+    reader = JsonStore(store.path, "patient", key="email", journal=True)
+    assert reader.get("a@example.com")["name"] == "A"
+
+
+def test_flush_reports_a_deleted_database_directory(tmp_path):
+    directory = tmp_path / "database"
+    directory.mkdir()
+    store = JsonStore(str(directory / "patients.json"), "patient", key="email", write_behind=60)
+    assert store.put({"email": "a@example.com"})
+    shutil.rmtree(directory)
+
+    assert not store.flush()
+    assert not json_store.flush_all()
+    store.invalidate()